@@ -1,17 +1,35 @@
+import asyncio
+import random
+import time
 import requests
 import os
+from urllib.parse import quote_plus, urlparse
 from bs4 import BeautifulSoup
 
-def find_website(company_name):
-    query = f"{company_name} site oficial"
-    url = f"https://www.google.com/search?q={query}"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36",
-        "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
-        "Referer": "https://www.google.com/"
-    }
-    response = requests.get(url, headers=headers, timeout=30)
-    soup = BeautifulSoup(response.text, "html.parser")
+try:
+    import aiohttp  # Necessário apenas para o modo assíncrono
+except ImportError:
+    aiohttp = None
+
+SEARCH_URL = "https://www.google.com/search"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36",
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Referer": "https://www.google.com/"
+}
+NOT_FOUND = "Website não encontrado"
+
+# Status HTTP que indicam falha temporária (vale a pena tentar de novo)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def build_search_url(company_name, search_url=SEARCH_URL):
+    query = quote_plus(f"{company_name} site oficial")
+    return f"{search_url}?q={query}"
+
+
+def extract_website(html):
+    soup = BeautifulSoup(html, "html.parser")
 
     # Captura todos os links (atributo href) da página
     links = []
@@ -25,28 +43,234 @@ def find_website(company_name):
     ]
 
     # Retorna o primeiro link relevante encontrado ou uma mensagem
-    return filtered_links[0] if filtered_links else "Website não encontrado"
+    return filtered_links[0] if filtered_links else NOT_FOUND
+
+
+def find_website(company_name, search_url=SEARCH_URL):
+    url = build_search_url(company_name, search_url)
+    response = requests.get(url, headers=HEADERS, timeout=30)
+    return extract_website(response.text)
 
 
-def process_links(input_file, output_file):
+def resolve_paths(input_file, output_file):
     # Obter o diretório do script atual
     script_dir = os.path.dirname(os.path.abspath(__file__))
 
     # Construir os caminhos absolutos dos arquivos
     input_path = os.path.join(script_dir, input_file)
     output_path = os.path.join(script_dir, output_file)
+    return input_path, output_path
 
+
+def read_companies(input_path):
+    """
+    Lê cada linha do arquivo como uma empresa. Linhas vazias são mantidas (como
+    ''), para que a linha N de sites.txt continue sendo a empresa da linha N de
+    empresas.txt: coletar_paginas e arquivo_respostas usam o número da linha como ID.
+    """
     with open(input_path, "r", encoding='utf-8') as file:
-        companies = file.read().splitlines()  # Lê cada linha do arquivo como uma empresa
+        return [line.strip() for line in file.read().splitlines()]
+
+
+def _import_resolution_cache():
+    # Importado só quando o cache é usado; funciona tanto rodando o script de
+    # dentro de URLS/ quanto importando URLS.get_url a partir da raiz do repositório
+    try:
+        from . import resolution_cache
+    except ImportError:
+        import resolution_cache
+    return resolution_cache
+
+
+def open_cache(cache_file, ttl=None):
+    """
+    Abre o cache de resoluções (se configurado) e descarta as entradas expiradas.
+    `ttl` em segundos; None usa resolution_cache.DEFAULT_TTL (um ano).
+    """
+    if cache_file is None:
+        return None
+    resolution_cache = _import_resolution_cache()
+    ttl = resolution_cache.DEFAULT_TTL if ttl is None else ttl
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), cache_file)
+    cache = resolution_cache.ResolutionCache(cache_path, ttl)
+    removed = cache.evict_expired()
+    print(f"Cache '{cache_path}': {len(cache)} resoluções válidas ({removed} expiradas removidas).")
+    return cache
+
+
+def store_in_cache(cache, company, website):
+    # Só guarda sites realmente encontrados; falhas e "não encontrado" são buscados de novo
+    if cache is not None and website and website != NOT_FOUND:
+        cache.set(company, website)
+
+
+def process_links(input_file, output_file, search_url=SEARCH_URL, cache_file=None,
+                  ttl=None, misses_only=True):
+    """
+    Resolve o site de cada empresa, uma por vez. Com `cache_file`, os sites
+    encontrados são guardados em cache; se `misses_only` for True, só as empresas
+    novas ou com resolução expirada são buscadas de novo.
+    """
+    input_path, output_path = resolve_paths(input_file, output_file)
+    companies = read_companies(input_path)
+    cache = open_cache(cache_file, ttl)
+
+    try:
+        with open(output_path, "w", encoding='utf-8') as outfile:
+            for company in companies:
+                if not company:
+                    # Linha vazia: mantém a posição sem buscar nada
+                    outfile.write(f"{NOT_FOUND}\n")
+                    continue
+                website = cache.get(company) if cache is not None and misses_only else None
+                if website is None:
+                    website = find_website(company, search_url)
+                    store_in_cache(cache, company, website)
+                outfile.write(f"{website}\n")
+                print(f"{company}: {website}")
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+# --- Modo assíncrono ---
+
+class TokenBucket:
+    """
+    Limitador de taxa por host (token bucket): permite até `capacity` requisições
+    em rajada e repõe `rate` fichas por segundo.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        # O lock garante que as tarefas consumam as fichas por ordem de chegada
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def find_website_async(session, company_name, buckets, rate_per_host=2.0,
+                             max_retries=3, backoff=1.0, search_url=SEARCH_URL):
+    """
+    Versão assíncrona de find_website. Respeita o token bucket do host de busca e
+    tenta novamente (com backoff exponencial e jitter) em erros de rede e status
+    temporários. Retorna None se todas as tentativas falharem.
+    """
+    url = build_search_url(company_name, search_url)
+    host = urlparse(url).netloc
+    if host not in buckets:
+        buckets[host] = TokenBucket(rate_per_host)
+    bucket = buckets[host]
+
+    for attempt in range(max_retries + 1):
+        await bucket.acquire()
+        try:
+            async with session.get(url, headers=HEADERS) as response:
+                if response.status not in RETRY_STATUS:
+                    html = await response.text()
+                    return extract_website(html)
+                error = f"status HTTP {response.status}"
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = repr(e)
+
+        if attempt < max_retries:
+            await asyncio.sleep(backoff * (2 ** attempt) + random.uniform(0, backoff))
+
+    print(f"Erro ao buscar '{company_name}' após {max_retries + 1} tentativas: {error}")
+    return None
+
+
+async def process_links_async(input_file, output_file, concurrency=10, rate_per_host=2.0,
+                              max_retries=3, backoff=1.0, search_url=SEARCH_URL, timeout=30,
+                              cache_file=None, ttl=None, misses_only=True):
+    """
+    Resolve os sites de todas as empresas de forma concorrente, usando uma única
+    sessão HTTP (pool de conexões) e no máximo `concurrency` buscas simultâneas.
+    Os resultados são gravados na ordem do arquivo de entrada assim que ficam
+    disponíveis, sem esperar o fim de todas as buscas. O cache funciona como em
+    process_links: só as empresas ausentes do cache geram buscas.
+    """
+    if aiohttp is None:
+        raise ImportError("O modo assíncrono requer o pacote 'aiohttp' (pip install aiohttp).")
+
+    input_path, output_path = resolve_paths(input_file, output_file)
+    companies = read_companies(input_path)
+    cache = open_cache(cache_file, ttl)
+
+    # Resultados que chegaram fora de ordem (ou vieram do cache) ficam aguardando a vez deles;
+    # linhas vazias já entram como não encontradas, mantendo a posição das demais
+    pending = {index: NOT_FOUND for index, company in enumerate(companies) if not company}
+    if cache is not None and misses_only:
+        for index, company in enumerate(companies):
+            if not company:
+                continue
+            website = cache.get(company)
+            if website is not None:
+                pending[index] = website
+        vazias = sum(1 for company in companies if not company)
+        print(f"{len(pending) - vazias} de {len(companies) - vazias} empresas resolvidas pelo cache.")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    buckets = {}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        async def resolve(index, company):
+            async with semaphore:
+                website = await find_website_async(session, company, buckets, rate_per_host,
+                                                   max_retries, backoff, search_url)
+                store_in_cache(cache, company, website)
+                return index, website
+
+        tasks = [asyncio.create_task(resolve(i, company))
+                 for i, company in enumerate(companies) if i not in pending]
+
+        next_index = 0
+        try:
+            with open(output_path, "w", encoding='utf-8') as outfile:
+                def flush_ready():
+                    nonlocal next_index
+                    while next_index in pending:
+                        website = pending.pop(next_index) or NOT_FOUND
+                        outfile.write(f"{website}\n")
+                        outfile.flush()
+                        print(f"{companies[next_index]}: {website}")
+                        next_index += 1
+
+                flush_ready()
+                for finished in asyncio.as_completed(tasks):
+                    index, website = await finished
+                    pending[index] = website
+                    flush_ready()
+        finally:
+            if cache is not None:
+                cache.close()
+
+
+if __name__ == "__main__":
+    input_file = "empresas.txt"  # Nomes das empresas
+    output_file = "sites.txt"  # Resultados salvos
 
-    with open(output_path, "w") as outfile:
-        for company in companies:
-            website = find_website(company)
-            outfile.write(f"{website}\n")
-            print(f"{company}: {website}")
-            break
+    cache_file = "sites_cache.sqlite"  # Resoluções de execuções anteriores (None desativa)
 
-input_file = "empresas.txt"  # Nomes das empresas
-output_file = "sites.txt"  # Resultados salvos
+    # True: resolve as empresas em paralelo (requer aiohttp); False: uma por vez
+    use_async = True
 
-process_links(input_file, output_file)
\ No newline at end of file
+    if use_async:
+        asyncio.run(process_links_async(input_file, output_file, concurrency=10, rate_per_host=2.0,
+                                        cache_file=cache_file))
+    else:
+        process_links(input_file, output_file, cache_file=cache_file)
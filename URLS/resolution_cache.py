@@ -0,0 +1,81 @@
+import re
+import sqlite3
+import time
+import unicodedata
+
+# Validade padrão de uma resolução: os rankings mudam pouco de um ano para o outro
+DEFAULT_TTL = 365 * 24 * 60 * 60
+
+
+def normalize_company_name(company_name):
+    """
+    Normaliza o nome da empresa para usar como chave do cache: remove acentos,
+    converte para minúsculas e colapsa espaços ("Grupo  Carrefour Brasil " e
+    "grupo carrefour brasil" geram a mesma chave).
+    """
+    text = unicodedata.normalize("NFKD", str(company_name))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class ResolutionCache:
+    """
+    Cache em disco (SQLite) de nome da empresa -> site resolvido, com o horário
+    da busca. Entradas mais antigas que `ttl` segundos são tratadas como ausentes
+    e podem ser removidas com evict_expired().
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path)
+        # WAL deixa cada commit barato, já que gravamos uma resolução por vez
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS resolucoes (
+                   chave TEXT PRIMARY KEY,
+                   empresa TEXT NOT NULL,
+                   url TEXT NOT NULL,
+                   obtido_em REAL NOT NULL
+               )"""
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def get(self, company_name, now=None):
+        """Retorna o site em cache ou None se não existir ou estiver expirado."""
+        now = time.time() if now is None else now
+        row = self.conn.execute(
+            "SELECT url, obtido_em FROM resolucoes WHERE chave = ?",
+            (normalize_company_name(company_name),),
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def set(self, company_name, url, fetched_at=None):
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        self.conn.execute(
+            "INSERT OR REPLACE INTO resolucoes (chave, empresa, url, obtido_em) VALUES (?, ?, ?, ?)",
+            (normalize_company_name(company_name), company_name, url, fetched_at),
+        )
+        self.conn.commit()
+
+    def evict_expired(self, now=None):
+        """Remove as entradas expiradas e retorna quantas foram apagadas."""
+        now = time.time() if now is None else now
+        cursor = self.conn.execute("DELETE FROM resolucoes WHERE obtido_em < ?", (now - self.ttl,))
+        self.conn.commit()
+        return cursor.rowcount
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM resolucoes").fetchone()[0]
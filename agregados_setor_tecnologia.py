@@ -0,0 +1,201 @@
+import os
+
+import pandas as pd
+
+from formatos_tabela import caminho_com_extensao, ler_tabela, salvar_tabela
+from instrumentacao import instrumentar
+
+COLUNA_ID = 'ID'
+COLUNA_SETOR = 'Setor primário'
+COLUNA_CATEGORIA = 'Categoria_Tecnologia'
+COLUNA_TECNOLOGIA = 'Nome_Ferramenta_Tecnologia'
+CHAVES = [COLUNA_SETOR, COLUNA_CATEGORIA, COLUNA_TECNOLOGIA]
+COLUNAS_AGREGADOS = CHAVES + ['Quantidade_Empresas', 'Total_Empresas_Setor', 'Percentual']
+
+
+def _preparar_principal(df_principal):
+    return df_principal[[COLUNA_ID, COLUNA_SETOR]].dropna().drop_duplicates(COLUNA_ID)
+
+
+def _preparar_tecnologias(df_longo):
+    return df_longo[[COLUNA_ID, COLUNA_CATEGORIA, COLUNA_TECNOLOGIA]].dropna().drop_duplicates()
+
+
+def _juntar(df_longo, df_principal):
+    """Pares (ID, setor, categoria, tecnologia) únicos; tecnologias de IDs sem setor são descartadas."""
+    return _preparar_tecnologias(df_longo).merge(_preparar_principal(df_principal), on=COLUNA_ID, how='inner')
+
+
+def _contagens(df_longo, df_principal):
+    """Empresas por (setor, categoria, tecnologia) e total de empresas por setor."""
+    contagens = _juntar(df_longo, df_principal).groupby(CHAVES, sort=False).size()
+    totais = _preparar_principal(df_principal).groupby(COLUNA_SETOR, sort=False).size()
+    return contagens, totais
+
+
+def _montar_tabela(contagens, totais):
+    contagens = contagens[contagens > 0]
+    tabela = contagens.rename('Quantidade_Empresas').reset_index()
+    tabela['Total_Empresas_Setor'] = tabela[COLUNA_SETOR].map(totais).astype('int64')
+    tabela['Quantidade_Empresas'] = tabela['Quantidade_Empresas'].astype('int64')
+    tabela['Percentual'] = (tabela['Quantidade_Empresas'] / tabela['Total_Empresas_Setor'] * 100).round(4)
+    return tabela[COLUNAS_AGREGADOS].sort_values(CHAVES).reset_index(drop=True)
+
+
+def calcular_agregados(df_longo, df_principal):
+    """
+    Calcula, para cada (setor, categoria, tecnologia), quantas empresas do setor
+    usam a tecnologia e o percentual que isso representa do total do setor.
+
+    Args:
+        df_longo (DataFrame): Tabela longa (ID, Nome_Ferramenta_Tecnologia, Categoria_Tecnologia).
+        df_principal (DataFrame): Tabela principal com ID e 'Setor primário'.
+
+    Returns:
+        DataFrame: Colunas 'Setor primário', Categoria_Tecnologia, Nome_Ferramenta_Tecnologia,
+                   Quantidade_Empresas, Total_Empresas_Setor e Percentual (0 a 100).
+    """
+    return _montar_tabela(*_contagens(df_longo, df_principal))
+
+
+def _assinaturas_por_id(df_longo, df_principal):
+    """Hash do conteúdo de cada ID (setor + tecnologias), independente da ordem das linhas."""
+    tecnologias = _preparar_tecnologias(df_longo)
+    principal = _preparar_principal(df_principal)
+    hashes = pd.concat([
+        pd.Series(pd.util.hash_pandas_object(tecnologias, index=False).to_numpy(),
+                  index=tecnologias[COLUNA_ID].to_numpy()),
+        pd.Series(pd.util.hash_pandas_object(principal, index=False).to_numpy(),
+                  index=principal[COLUNA_ID].to_numpy()),
+    ])
+    # Soma com overflow em uint64: a ordem das linhas não altera o resultado
+    return hashes.groupby(level=0).sum()
+
+
+def ids_alterados(longo_antigo, principal_antigo, longo_novo, principal_novo):
+    """IDs cujo setor ou conjunto de tecnologias mudou (incluindo IDs novos ou removidos)."""
+    antigas = _assinaturas_por_id(longo_antigo, principal_antigo)
+    novas = _assinaturas_por_id(longo_novo, principal_novo)
+    antigas, novas = antigas.align(novas)
+    diferentes = antigas.isna() | novas.isna() | (antigas != novas)
+    return antigas.index[diferentes].to_numpy()
+
+
+def atualizar_agregados(agregados, longo_antigo, principal_antigo, longo_novo, principal_novo, ids=None):
+    """
+    Atualiza os agregados só nas células afetadas pelos IDs alterados: subtrai a
+    contribuição antiga desses IDs e soma a nova, sem reprocessar a tabela longa inteira.
+
+    Args:
+        agregados (DataFrame): Resultado anterior de calcular_agregados.
+        longo_antigo, principal_antigo (DataFrame): Entradas que geraram `agregados`.
+        longo_novo, principal_novo (DataFrame): Entradas atuais.
+        ids (array): IDs alterados. Se None, são detectados por ids_alterados.
+
+    Returns:
+        DataFrame: Agregados equivalentes a calcular_agregados(longo_novo, principal_novo).
+    """
+    if ids is None:
+        ids = ids_alterados(longo_antigo, principal_antigo, longo_novo, principal_novo)
+    if len(ids) == 0:
+        return agregados
+
+    def so_ids(df):
+        return df[df[COLUNA_ID].isin(ids)]
+
+    contagens_antigas, totais_antigos = _contagens(so_ids(longo_antigo), so_ids(principal_antigo))
+    contagens_novas, totais_novos = _contagens(so_ids(longo_novo), so_ids(principal_novo))
+
+    contagens = agregados.set_index(CHAVES)['Quantidade_Empresas']
+    totais = agregados.drop_duplicates(COLUNA_SETOR).set_index(COLUNA_SETOR)['Total_Empresas_Setor']
+    # Setores sem nenhuma tecnologia não aparecem nos agregados; o total vem da tabela principal
+    setores_sem_linhas = _preparar_principal(principal_antigo)
+    setores_sem_linhas = setores_sem_linhas[~setores_sem_linhas[COLUNA_SETOR].isin(totais.index)]
+    totais = pd.concat([totais, setores_sem_linhas.groupby(COLUNA_SETOR).size()])
+
+    contagens = contagens.sub(contagens_antigas, fill_value=0).add(contagens_novas, fill_value=0)
+    totais = totais.sub(totais_antigos, fill_value=0).add(totais_novos, fill_value=0)
+    return _montar_tabela(contagens.astype('int64'), totais[totais > 0].astype('int64'))
+
+
+@instrumentar
+def gerar_agregados(arquivo_unificado, arquivo_principal, arquivo_saida, pasta_estado=None, formato='csv'):
+    """
+    Gera (ou atualiza) a tabela de agregados setor × tecnologia usada pelo dashboard.
+
+    Se `pasta_estado` for informada, uma cópia das entradas é guardada nela; na
+    execução seguinte, só os IDs que mudaram desde então são reprocessados.
+
+    Args:
+        arquivo_unificado (str): Tecnologias_Unificadas (CSV ou Parquet).
+        arquivo_principal (str): Tabela principal com os setores padronizados.
+        arquivo_saida (str): Arquivo de agregados a ser gerado.
+        pasta_estado (str): Pasta para as cópias das entradas da última execução.
+        formato (str): Formato da saída ('csv' ou 'parquet').
+    """
+    try:
+        df_longo = ler_tabela(arquivo_unificado)
+        df_principal = ler_tabela(arquivo_principal)
+        print(f"Arquivos lidos: '{arquivo_unificado}' ({len(df_longo)} linhas) e "
+              f"'{arquivo_principal}' ({len(df_principal)} linhas).")
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo não encontrado: {e}")
+        return
+    except Exception as e:
+        print(f"Erro ao ler os arquivos de entrada: {e}")
+        return
+
+    for coluna, df, nome in ((COLUNA_SETOR, df_principal, arquivo_principal),
+                             (COLUNA_TECNOLOGIA, df_longo, arquivo_unificado)):
+        if coluna not in df.columns:
+            print(f"Erro: Coluna '{coluna}' não encontrada em '{nome}'.")
+            return
+
+    caminho_saida = caminho_com_extensao(arquivo_saida, formato)
+    base_tecnologias = base_principal = None
+    if pasta_estado:
+        base_tecnologias = caminho_com_extensao(os.path.join(pasta_estado, 'base_tecnologias'), formato)
+        base_principal = caminho_com_extensao(os.path.join(pasta_estado, 'base_principal'), formato)
+
+    incremental = (pasta_estado and os.path.exists(caminho_saida)
+                   and os.path.exists(base_tecnologias) and os.path.exists(base_principal))
+    if incremental:
+        longo_antigo = ler_tabela(base_tecnologias)
+        principal_antigo = ler_tabela(base_principal)
+        ids = ids_alterados(longo_antigo, principal_antigo, df_longo, df_principal)
+        print(f"{len(ids)} empresas alteradas desde a última execução.")
+        if len(ids) == 0:
+            print(f"Agregados em '{caminho_saida}' já estão atualizados.")
+            # Atualiza o mtime: o pipeline trata uma saída intacta como etapa que falhou
+            os.utime(caminho_saida)
+            return
+        agregados = atualizar_agregados(ler_tabela(caminho_saida), longo_antigo, principal_antigo,
+                                        df_longo, df_principal, ids)
+    else:
+        print("Calculando agregados a partir das tabelas completas...")
+        agregados = calcular_agregados(df_longo, df_principal)
+
+    sem_setor = ~df_longo[COLUNA_ID].isin(df_principal[COLUNA_ID])
+    if sem_setor.any():
+        print(f"Aviso: {sem_setor.sum()} linhas de tecnologia com ID sem setor na tabela principal foram ignoradas.")
+
+    try:
+        caminho_saida = salvar_tabela(agregados, caminho_saida, formato)
+        print(f"Agregados salvos em '{caminho_saida}' ({len(agregados)} linhas).")
+        if pasta_estado:
+            os.makedirs(pasta_estado, exist_ok=True)
+            salvar_tabela(_preparar_tecnologias(df_longo), base_tecnologias, formato)
+            salvar_tabela(_preparar_principal(df_principal), base_principal, formato)
+    except Exception as e:
+        print(f"Erro ao salvar os agregados em '{caminho_saida}': {e}")
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    arquivo_unificado = 'novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv'
+    arquivo_principal = 'tabela_principal_padronizada_exame.csv'
+    arquivo_agregados = 'novos_arquivos_csv_refatorados/Agregados_Setor_Tecnologia.csv'
+    # Cópia das entradas da última execução (permite atualizar só os IDs alterados)
+    pasta_estado = '.estado_agregados'
+
+    gerar_agregados(arquivo_unificado, arquivo_principal, arquivo_agregados, pasta_estado)
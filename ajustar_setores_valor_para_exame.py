@@ -1,7 +1,100 @@
 import pandas as pd
+import numpy as np
 import os
+from formatos_tabela import ler_tabela, salvar_tabela
+from instrumentacao import instrumentar
 
-def padronizar_setores_para_exame(arquivo_entrada, arquivo_saida, coluna_a_padronizar='Setor primário'):
+# --- Tabelas de Mapeamento por Fonte (-> padrão Exame) ---
+# Setores usados pela Revista Exame (o padrão adotado no trabalho)
+SETORES_EXAME = [
+    "Agronegócio", "Alimentos e Bebidas", "Atacado e Varejo", "Bancos",
+    "Bens de Capital e Eletroeletrônicos", "Cooperativas", "Educação", "Energia",
+    "Farmacêutico e Beleza", "Imobiliário e Construção Civil", "Moda e Vestuário",
+    "Operadoras de Planos de Saúde", "Papel e Celulose", "Participações e Mídia",
+    "Petróleo e Químico", "Saneamento e Meio Ambiente", "Saúde e Serviços de Saúde",
+    "Seguradoras", "Serviços Financeiros", "Siderurgia, Mineração e Metalurgia",
+    "Tecnologia e Telecomunicações", "Transporte, Logística e Serviços Logísticos",
+]
+
+# --- Dicionário de Mapeamento (Valor Econômico -> Exame) ---
+# Usado para converter APENAS os setores que forem identificados como sendo da Valor.
+MAPA_VALOR_PARA_EXAME = {
+    "Veículos e Peças": "Bens de Capital e Eletroeletrônicos",
+    "Agronegócio": "Agronegócio",
+    "Bioenergia": "Energia",
+    "Petróleo e Gás": "Petróleo e Químico",
+    "TI & Telecom": "Tecnologia e Telecomunicações",
+    "Comércio Varejista": "Atacado e Varejo",
+    "Transportes e Logística": "Transporte, Logística e Serviços Logísticos",
+    "Química e Petroquímica": "Petróleo e Químico",
+    "Eletroeletrônica": "Bens de Capital e Eletroeletrônicos",
+    "Alimentos e Bebidas": "Alimentos e Bebidas",
+    "Comércio Atacadista e Exterior": "Atacado e Varejo",
+    "Energia Elétrica": "Energia",
+    "Serviços Médicos": "Saúde e Serviços de Saúde",
+    "Serviços Especializados": "Participações e Mídia", # Mapeamento forçado da análise anterior
+    "Mineração": "Siderurgia, Mineração e Metalurgia",
+    "Serviços Financeiros": "Serviços Financeiros",
+    "Farmacêutica e Cosméticos": "Farmacêutico e Beleza",
+    "Metalurgia e Siderurgia": "Siderurgia, Mineração e Metalurgia",
+    "Mat. de Constr. e de Acabamento": "Imobiliário e Construção Civil",
+    "Plásticos e Borracha": "Petróleo e Químico",
+    "Água, Saneamento e Serviços Ambientais": "Saneamento e Meio Ambiente"
+}
+
+# Uma tabela de consulta por fonte de ranking; para incluir outra fonte,
+# basta adicionar aqui o dicionário {setor da fonte: setor Exame}
+MAPEAMENTOS_SETORES = {
+    'exame': {setor: setor for setor in SETORES_EXAME},
+    'valor': MAPA_VALOR_PARA_EXAME,
+}
+FONTES_PADRAO = ('exame', 'valor')
+
+def harmonizar_setores(serie, fontes=FONTES_PADRAO, mapeamentos=None):
+    """
+    Converte os setores de uma coluna para o padrão Exame usando as tabelas de
+    mapeamento das fontes informadas. A coluna é convertida em categórica e o
+    mapeamento é feito uma vez por setor distinto (não por linha); depois os
+    códigos das linhas são usados como índice no vetor de setores convertidos.
+
+    Setores que não aparecem em nenhuma tabela são mantidos como estão e listados
+    no relatório de não mapeados.
+
+    Args:
+        serie (Series): Coluna de setores (pode misturar fontes).
+        fontes (tuple): Fontes a consultar, em ordem de prioridade.
+        mapeamentos (dict): {fonte: {setor: setor Exame}}. Padrão: MAPEAMENTOS_SETORES.
+
+    Returns:
+        tuple: (Series harmonizada, DataFrame com 'Setor' e 'Quantidade' dos não mapeados)
+    """
+    mapeamentos = MAPEAMENTOS_SETORES if mapeamentos is None else mapeamentos
+    tabela = {}
+    for fonte in reversed(fontes):  # a primeira fonte tem prioridade
+        if fonte not in mapeamentos:
+            raise ValueError(f"Fonte de setores desconhecida '{fonte}'. Use uma de {list(mapeamentos)}.")
+        tabela.update(mapeamentos[fonte])
+
+    categorica = serie.astype('category')
+    codigos = categorica.cat.codes.to_numpy()
+    setores = categorica.cat.categories
+
+    # Trabalho proporcional ao número de setores distintos
+    convertidos = pd.Index(setores.astype(str)).str.strip().map(tabela)
+    mapeado = np.asarray(convertidos.notna())
+    novos = np.where(mapeado, np.asarray(convertidos, dtype=object), np.asarray(setores, dtype=object))
+
+    # O código -1 (valor ausente) cai na última posição, que é NaN
+    resultado = pd.Series(np.append(novos, np.nan)[codigos], index=serie.index, name=serie.name)
+
+    quantidades = np.bincount(codigos[codigos >= 0], minlength=len(setores))
+    nao_mapeados = pd.DataFrame({'Setor': setores[~mapeado], 'Quantidade': quantidades[~mapeado]})
+    nao_mapeados = nao_mapeados.sort_values(['Quantidade', 'Setor'], ascending=[False, True]).reset_index(drop=True)
+    return resultado, nao_mapeados
+
+@instrumentar
+def padronizar_setores_para_exame(arquivo_entrada, arquivo_saida, coluna_a_padronizar='Setor primário', formato='csv',
+                                  fontes=FONTES_PADRAO):
     """
     Lê um arquivo CSV, identifica setores no formato Valor Econômico na coluna especificada,
     mapeia-os para o formato da Revista Exame e salva o resultado (com a coluna padronizada)
@@ -13,40 +106,15 @@ def padronizar_setores_para_exame(arquivo_entrada, arquivo_saida, coluna_a_padro
         coluna_a_padronizar (str): Nome da coluna no arquivo de entrada que contém os setores misturados
                                     (Valor e Exame) a serem padronizados para o formato Exame.
                                     *** IMPORTANTE: Verifique e ajuste este nome de coluna! ***
+        formato (str): Formato do arquivo de saída ('csv' ou 'parquet'). A entrada pode
+                       estar em qualquer um dos dois.
+        fontes (tuple): Fontes de ranking cujas tabelas de mapeamento são consultadas
+                        (ver MAPEAMENTOS_SETORES).
     """
 
-    # --- Dicionário de Mapeamento (Valor Econômico -> Exame) ---
-    # Usado para converter APENAS os setores que forem identificados como sendo da Valor.
-    mapa_valor_para_exame = {
-        "Veículos e Peças": "Bens de Capital e Eletroeletrônicos",
-        "Agronegócio": "Agronegócio",
-        "Bioenergia": "Energia",
-        "Petróleo e Gás": "Petróleo e Químico",
-        "TI & Telecom": "Tecnologia e Telecomunicações",
-        "Comércio Varejista": "Atacado e Varejo",
-        "Transportes e Logística": "Transporte, Logística e Serviços Logísticos",
-        "Química e Petroquímica": "Petróleo e Químico",
-        "Eletroeletrônica": "Bens de Capital e Eletroeletrônicos",
-        "Alimentos e Bebidas": "Alimentos e Bebidas",
-        "Comércio Atacadista e Exterior": "Atacado e Varejo",
-        "Energia Elétrica": "Energia",
-        "Serviços Médicos": "Saúde e Serviços de Saúde",
-        "Serviços Especializados": "Participações e Mídia", # Mapeamento forçado da análise anterior
-        "Mineração": "Siderurgia, Mineração e Metalurgia",
-        "Serviços Financeiros": "Serviços Financeiros",
-        "Farmacêutica e Cosméticos": "Farmacêutico e Beleza",
-        "Metalurgia e Siderurgia": "Siderurgia, Mineração e Metalurgia",
-        "Mat. de Constr. e de Acabamento": "Imobiliário e Construção Civil",
-        "Plásticos e Borracha": "Petróleo e Químico",
-        "Água, Saneamento e Serviços Ambientais": "Saneamento e Meio Ambiente"
-    }
-
-    # Cria um conjunto com os nomes dos setores da Valor para verificação rápida
-    setores_valor_conhecidos = set(mapa_valor_para_exame.keys())
-
     # --- Leitura do Arquivo de Entrada ---
     try:
-        df = pd.read_csv(arquivo_entrada)
+        df = ler_tabela(arquivo_entrada)
         print(f"Arquivo '{arquivo_entrada}' lido com sucesso ({len(df)} linhas).")
     except FileNotFoundError:
         print(f"Erro: Arquivo de entrada não encontrado em '{arquivo_entrada}'")
@@ -62,27 +130,16 @@ def padronizar_setores_para_exame(arquivo_entrada, arquivo_saida, coluna_a_padro
         print(f"*** Por favor, ajuste o parâmetro 'coluna_a_padronizar' na chamada da função ou no código para o nome correto da coluna de setores. ***")
         return
 
-    # --- Função Auxiliar para Padronização ---
-    def get_setor_exame(setor_atual):
-        # Converte para string para segurança, remove espaços extras
-        setor_str = str(setor_atual).strip()
-        # Verifica se o setor atual está na lista de setores conhecidos da Valor
-        if setor_str in setores_valor_conhecidos:
-            # Se for da Valor, retorna o correspondente da Exame
-            # .get() é usado para segurança, caso um setor_str esteja no set mas não no dict (improvável)
-            return mapa_valor_para_exame.get(setor_str, setor_str)
-        else:
-            # Se não for um setor conhecido da Valor (pode ser Exame ou outro), retorna o valor original
-            return setor_atual # Mantém o valor como está
-
     # --- Aplicação da Padronização na Coluna ---
-    # Aplica a função 'get_setor_exame' a cada célula da coluna especificada,
-    # modificando a coluna original (in-place).
     print(f"Padronizando a coluna '{coluna_a_padronizar}' para o padrão Exame...")
-    # Garante que a coluna seja tratada como texto antes de aplicar
-    df[coluna_a_padronizar] = df[coluna_a_padronizar].astype(str).apply(get_setor_exame)
+    df[coluna_a_padronizar], nao_mapeados = harmonizar_setores(df[coluna_a_padronizar], fontes)
     print("Padronização concluída.")
 
+    if not nao_mapeados.empty:
+        print(f"Aviso: {len(nao_mapeados)} setores não constam em nenhuma tabela de mapeamento e foram mantidos:")
+        for linha in nao_mapeados.itertuples(index=False):
+            print(f"  - {linha.Setor} ({linha.Quantidade} linhas)")
+
     # --- Salvamento do Arquivo de Saída ---
     try:
         # Garante que a pasta de destino exista, se o caminho incluir pastas
@@ -90,21 +147,22 @@ def padronizar_setores_para_exame(arquivo_entrada, arquivo_saida, coluna_a_padro
         if pasta_destino and not os.path.exists(pasta_destino):
             os.makedirs(pasta_destino)
 
-        df.to_csv(arquivo_saida, index=False, encoding='utf-8')
+        arquivo_saida = salvar_tabela(df, arquivo_saida, formato)
         print(f"Arquivo com coluna de setores padronizada salvo com sucesso em: '{arquivo_saida}'")
     except Exception as e:
         print(f"Erro ao salvar o arquivo CSV '{arquivo_saida}': {e}")
 
 # --- Configuração e Execução ---
-# Defina o nome do seu arquivo de entrada que contém os setores MISTURADOS (Valor e Exame)
-arquivo_entrada_csv = 'tabelas_divididas_corrigido/tabela_principal.csv' # Ou o nome correto do seu arquivo
+if __name__ == "__main__":
+    # Defina o nome do seu arquivo de entrada que contém os setores MISTURADOS (Valor e Exame)
+    arquivo_entrada_csv = 'tabelas_divididas_corrigido/tabela_principal.csv' # Ou o nome correto do seu arquivo
 
-# Defina o nome desejado para o arquivo de saída (padronizado)
-arquivo_saida_csv = 'tabela_principal_padronizada_exame.csv'
+    # Defina o nome desejado para o arquivo de saída (padronizado)
+    arquivo_saida_csv = 'tabela_principal_padronizada_exame.csv'
 
-# *** ATENÇÃO: Defina o nome EXATO da coluna no seu CSV que contém os setores MISTURADOS ***
-# Este é o nome da coluna que será lida e modificada.
-coluna_com_setores_misturados = 'Setor primário'
+    # *** ATENÇÃO: Defina o nome EXATO da coluna no seu CSV que contém os setores MISTURADOS ***
+    # Este é o nome da coluna que será lida e modificada.
+    coluna_com_setores_misturados = 'Setor primário'
 
-# Chama a função para realizar a padronização
-padronizar_setores_para_exame(arquivo_entrada_csv, arquivo_saida_csv, coluna_com_setores_misturados)
+    # Chama a função para realizar a padronização
+    padronizar_setores_para_exame(arquivo_entrada_csv, arquivo_saida_csv, coluna_com_setores_misturados)
@@ -0,0 +1,169 @@
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _exigir_zstandard():
+    if zstandard is None:
+        raise ImportError("O arquivo de respostas requer o pacote 'zstandard' (pip install zstandard).")
+
+
+class ArquivoRespostas:
+    """
+    Arquivo append-only de respostas HTTP brutas, no estilo WARC.
+
+    Cada registro (cabeçalho WARC + cabeçalhos HTTP + corpo) é comprimido como um
+    frame zstd independente e anexado ao final de '<caminho>'. Um índice em
+    '<caminho>.idx' (uma linha JSON por registro) guarda o deslocamento e o
+    tamanho de cada frame, de modo que um registro pode ser lido com um seek,
+    sem descomprimir o arquivo inteiro.
+
+    Args:
+        caminho (str): Caminho do arquivo de dados (ex: 'paginas.warc.zst').
+        nivel (int): Nível de compressão zstd.
+    """
+
+    def __init__(self, caminho, nivel=10):
+        _exigir_zstandard()
+        self.caminho = caminho
+        self.caminho_indice = caminho + '.idx'
+        self._compressor = zstandard.ZstdCompressor(level=nivel)
+        self._dados = open(caminho, 'ab')
+        self._indice = open(self.caminho_indice, 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fechar()
+
+    def fechar(self):
+        self._dados.close()
+        self._indice.close()
+
+    def adicionar(self, url, status, cabecalhos, corpo, id_registro=None, url_solicitada=None):
+        """
+        Anexa uma resposta ao arquivo e retorna sua entrada no índice.
+
+        Args:
+            url (str): URL final (após redirecionamentos).
+            status (int): Status HTTP.
+            cabecalhos (list): Pares (nome, valor) dos cabeçalhos HTTP, na ordem recebida.
+            corpo (bytes): Corpo já decodificado (sem gzip/brotli).
+            id_registro: Identificador livre (ex: número da linha em sites.txt).
+            url_solicitada (str): URL pedida originalmente, se diferente de `url`.
+        """
+        data = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        linhas_http = [f"HTTP/1.1 {status}"]
+        for nome, valor in cabecalhos:
+            # O corpo é guardado descomprimido, então estes cabeçalhos deixam de valer
+            if nome.lower() not in ('content-encoding', 'content-length', 'transfer-encoding'):
+                linhas_http.append(f"{nome}: {valor}")
+        bloco_http = ("\r\n".join(linhas_http) + "\r\n\r\n").encode('utf-8') + corpo
+
+        linhas_warc = [
+            "WARC/1.0",
+            "WARC-Type: response",
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+            f"WARC-Date: {data}",
+            f"WARC-Target-URI: {url}",
+            "Content-Type: application/http; msgtype=response",
+            f"Content-Length: {len(bloco_http)}",
+        ]
+        if url_solicitada and url_solicitada != url:
+            linhas_warc.append(f"X-Requested-URI: {url_solicitada}")
+        registro = ("\r\n".join(linhas_warc) + "\r\n\r\n").encode('utf-8') + bloco_http + b"\r\n\r\n"
+
+        frame = self._compressor.compress(registro)
+        deslocamento = self._dados.tell()
+        self._dados.write(frame)
+        self._dados.flush()
+
+        entrada = {'id': id_registro, 'url': url, 'status': status, 'data': data,
+                   'deslocamento': deslocamento, 'tamanho': len(frame)}
+        self._indice.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        self._indice.flush()
+        return entrada
+
+
+def carregar_indice(caminho):
+    """Lê o índice '<caminho>.idx' e retorna a lista de entradas."""
+    with open(caminho + '.idx', 'r', encoding='utf-8') as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+
+def _interpretar_registro(bruto):
+    cabecalho_warc, _, resto = bruto.partition(b"\r\n\r\n")
+    campos_warc = {}
+    for linha in cabecalho_warc.decode('utf-8').split("\r\n")[1:]:
+        nome, _, valor = linha.partition(": ")
+        campos_warc[nome] = valor
+    bloco_http = resto[:int(campos_warc['Content-Length'])]
+
+    cabecalho_http, _, corpo = bloco_http.partition(b"\r\n\r\n")
+    linhas_http = cabecalho_http.decode('utf-8').split("\r\n")
+    cabecalhos = [tuple(linha.split(": ", 1)) for linha in linhas_http[1:] if ": " in linha]
+    return {
+        'url': campos_warc.get('WARC-Target-URI'),
+        'url_solicitada': campos_warc.get('X-Requested-URI', campos_warc.get('WARC-Target-URI')),
+        'data': campos_warc.get('WARC-Date'),
+        'status': int(linhas_http[0].split(" ")[1]),
+        'cabecalhos': cabecalhos,
+        'corpo': corpo,
+    }
+
+
+def ler_registro(caminho, entrada, arquivo=None):
+    """
+    Lê um único registro a partir da sua entrada no índice (seek direto ao frame).
+    `arquivo` permite reaproveitar um arquivo já aberto em modo binário.
+    """
+    _exigir_zstandard()
+    if arquivo is None:
+        with open(caminho, 'rb') as f:
+            return ler_registro(caminho, entrada, f)
+    arquivo.seek(entrada['deslocamento'])
+    frame = arquivo.read(entrada['tamanho'])
+    registro = _interpretar_registro(zstandard.ZstdDecompressor().decompress(frame))
+    registro['id'] = entrada.get('id')
+    return registro
+
+
+def iterar_registros(caminho):
+    """Percorre todos os registros do arquivo na ordem do índice."""
+    indice = carregar_indice(caminho)
+    with open(caminho, 'rb') as arquivo:
+        for entrada in indice:
+            yield ler_registro(caminho, entrada, arquivo)
+
+
+def decodificar_corpo(registro):
+    """Converte o corpo em texto usando o charset do Content-Type (UTF-8 por padrão)."""
+    charset = 'utf-8'
+    for nome, valor in registro['cabecalhos']:
+        if nome.lower() == 'content-type' and 'charset=' in valor.lower():
+            charset = valor.lower().split('charset=')[1].split(';')[0].strip().strip('"')
+    try:
+        return registro['corpo'].decode(charset, errors='replace')
+    except LookupError:
+        return registro['corpo'].decode('utf-8', errors='replace')
+
+
+if __name__ == "__main__":
+    # Mostra um resumo do arquivo gerado por coletar_paginas.py
+    arquivo_paginas = 'paginas.warc.zst'
+
+    if not os.path.exists(arquivo_paginas):
+        print(f"Erro: Arquivo '{arquivo_paginas}' não encontrado.")
+    else:
+        indice = carregar_indice(arquivo_paginas)
+        print(f"{len(indice)} registros em '{arquivo_paginas}' "
+              f"({os.path.getsize(arquivo_paginas) / 1024 / 1024:.1f} MB comprimidos).")
+        for entrada in indice[:10]:
+            print(f"- [{entrada['status']}] {entrada['url']}")
@@ -0,0 +1,293 @@
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from multiprocessing import get_context
+
+import pandas as pd
+
+from gerar_dados_sinteticos import ModeloPlanilha, caminho_planilha_sintetica, gerar_planilha_sintetica
+from pipeline import estado_saida
+
+ARQUIVO_RESULTADOS = 'resultados_benchmark.jsonl'
+PASTA_DADOS = 'dados_sinteticos'
+TAMANHOS_PADRAO = (10_000, 100_000)
+TOLERANCIA_PADRAO = 0.2
+
+# Etapas medidas, na ordem em que rodam: (nome, módulo, função, parâmetros, saídas).
+# Nos parâmetros e saídas, {planilha} é a planilha sintética e {trabalho} a pasta de trabalho.
+ETAPAS = [
+    ('processar_csv', 'remove_duplicates_and_replace_0_and_1_in_columns', 'processar_csv',
+     {'nome_arquivo': '{planilha}', 'pasta_destino': '{trabalho}/planilha_sem_duplicatas.csv'},
+     ['{trabalho}/planilha_sem_duplicatas.csv']),
+    ('processar_csv_split', 'create_individuals_files_from_columns', 'processar_csv_split',
+     {'nome_arquivo': '{trabalho}/planilha_sem_duplicatas.csv', 'pasta_destino': '{trabalho}/tabelas'},
+     ['{trabalho}/tabelas']),
+    ('unificar_arquivos_tecnologia', 'unificar_tecnologias_csv', 'unificar_arquivos_tecnologia',
+     {'pasta_entrada': '{trabalho}/tabelas', 'arquivo_saida': '{trabalho}/Tecnologias_Unificadas.csv'},
+     ['{trabalho}/Tecnologias_Unificadas.csv']),
+    ('consolidar_valores_unicos_de_pasta', 'consolidar_valores_unicos', 'consolidar_valores_unicos_de_pasta',
+     {'pasta_entrada': '{trabalho}/tabelas', 'arquivo_saida': '{trabalho}/consolidado_valores_unicos.csv'},
+     ['{trabalho}/consolidado_valores_unicos.csv']),
+    ('padronizar_setores_para_exame', 'ajustar_setores_valor_para_exame', 'padronizar_setores_para_exame',
+     {'arquivo_entrada': '{trabalho}/tabelas/tabela_principal.csv',
+      'arquivo_saida': '{trabalho}/tabela_principal_padronizada_exame.csv'},
+     ['{trabalho}/tabela_principal_padronizada_exame.csv']),
+]
+NOMES_ETAPAS = [etapa[0] for etapa in ETAPAS]
+
+
+def _memoria_pico_mb():
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _saidas_desatualizadas(saidas, inicio_ns):
+    """Saídas que não existem ou que não foram escritas depois de `inicio_ns` (time.time_ns)."""
+    return [saida for saida in saidas if estado_saida(saida) is None or estado_saida(saida)[0] < inicio_ns]
+
+
+def _medir_etapa(nome_modulo, nome_funcao, parametros, saidas, arquivo_log):
+    """
+    Roda uma etapa no processo atual (um processo novo por etapa) e mede o tempo
+    de relógio, o tempo de CPU e o pico de memória residente. A saída da etapa
+    (os prints) é acrescentada a `arquivo_log`.
+
+    Os scripts imprimem os erros e retornam normalmente; por isso, se a etapa
+    levantar uma exceção ou não escrever todas as `saidas`, o resultado traz
+    'erro' no lugar das medidas (um tempo curto de uma etapa que falhou pareceria
+    uma melhora na comparação).
+    """
+    funcao = getattr(importlib.import_module(nome_modulo), nome_funcao)
+    memoria_base = _memoria_pico_mb()
+    inicio_ns = time.time_ns()
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    with open(arquivo_log, 'a', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        print(f"--- {nome_modulo}.{nome_funcao} ({datetime.now().isoformat(timespec='seconds')})")
+        try:
+            funcao(**parametros)
+        except Exception as e:
+            return {'erro': repr(e), 'log': arquivo_log}
+    desatualizadas = _saidas_desatualizadas(saidas, inicio_ns)
+    if desatualizadas:
+        return {'erro': f"saídas não geradas: {desatualizadas}", 'log': arquivo_log}
+    return {
+        'segundos': round(time.perf_counter() - inicio, 4),
+        'cpu_segundos': round(time.process_time() - inicio_cpu, 4),
+        'pico_memoria_mb': round(_memoria_pico_mb(), 1),
+        'memoria_base_mb': round(memoria_base, 1),
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar_benchmark(tamanhos=TAMANHOS_PADRAO, etapas=None, repeticoes=1, pasta_dados=PASTA_DADOS,
+                       pasta_trabalho=None, arquivo_resultados=ARQUIVO_RESULTADOS, manter_arquivos=False):
+    """
+    Mede as etapas do pipeline sobre planilhas sintéticas de cada tamanho.
+
+    Cada etapa roda num processo novo, para que o pico de memória seja só dela,
+    e as etapas de um tamanho usam as saídas das anteriores (como no pipeline
+    real). As planilhas que ainda não existem em `pasta_dados` são geradas.
+
+    Args:
+        tamanhos (iterable): Números de linhas das planilhas sintéticas.
+        etapas (list): Nomes das etapas a medir (padrão: todas; as anteriores
+                       rodam do mesmo jeito, para gerar as entradas, mas não entram
+                       nos resultados).
+        repeticoes (int): Vezes que cada etapa é medida.
+        pasta_dados (str): Onde ficam as planilhas sintéticas.
+        pasta_trabalho (str): Onde as etapas escrevem as saídas (padrão: pasta temporária).
+        arquivo_resultados (str): Arquivo JSONL ao qual os resultados são acrescentados.
+        manter_arquivos (bool): Se True, não apaga as saídas das etapas.
+
+    Os prints das etapas vão para '<pasta de trabalho>.log'. Uma etapa que falha
+    é gravada com 'erro' no lugar das medidas, e as seguintes do mesmo tamanho
+    não rodam.
+
+    Returns:
+        list: Um dicionário por medição (o mesmo conteúdo gravado no JSONL).
+    """
+    etapas = set(etapas or NOMES_ETAPAS)
+    desconhecidas = etapas - set(NOMES_ETAPAS)
+    if desconhecidas:
+        raise ValueError(f"Etapas desconhecidas: {sorted(desconhecidas)}. Use algumas de {NOMES_ETAPAS}.")
+    ultima_etapa = max(NOMES_ETAPAS.index(nome) for nome in etapas)
+
+    execucao = datetime.now().isoformat(timespec='seconds')
+    ambiente = {'commit': _commit_atual(), 'python': platform.python_version(), 'pandas': pd.__version__,
+                'cpus': os.cpu_count()}
+    modelo = None
+    resultados = []
+
+    for linhas in tamanhos:
+        planilha = caminho_planilha_sintetica(pasta_dados, linhas)
+        if not os.path.exists(planilha):
+            modelo = modelo or ModeloPlanilha.de_arquivo()
+            gerar_planilha_sintetica(linhas, planilha, modelo)
+
+        trabalho = tempfile.mkdtemp(prefix=f'benchmark_{linhas}_', dir=pasta_trabalho)
+        # O log fica ao lado da pasta de trabalho, que é apagada no fim
+        arquivo_log = trabalho + '.log'
+        try:
+            for nome, modulo, funcao, parametros, saidas in ETAPAS[:ultima_etapa + 1]:
+                parametros = {chave: valor.format(planilha=planilha, trabalho=trabalho)
+                              for chave, valor in parametros.items()}
+                saidas = [saida.format(planilha=planilha, trabalho=trabalho) for saida in saidas]
+                medicao = {}
+                for repeticao in range(repeticoes if nome in etapas else 1):
+                    # spawn: processo limpo, sem a memória herdada do processo principal
+                    try:
+                        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                            medicao = executor.submit(_medir_etapa, modulo, funcao, parametros, saidas,
+                                                      arquivo_log).result()
+                    except BrokenProcessPool as e:
+                        # O processo morreu (ex: sem memória nos tamanhos maiores)
+                        medicao = {'erro': f"processo da etapa encerrado: {e!r}", 'log': arquivo_log}
+                    if nome in etapas or 'erro' in medicao:
+                        resultados.append({'execucao': execucao, 'etapa': nome, 'linhas': linhas,
+                                           'repeticao': repeticao + 1, **medicao, **ambiente})
+                    if 'erro' in medicao:
+                        print(f"{nome:<36} {linhas:>10} linhas: ERRO: {medicao['erro']} (ver '{arquivo_log}')")
+                        break
+                    if nome in etapas:
+                        print(f"{nome:<36} {linhas:>10} linhas: {medicao['segundos']:>9.3f} s, "
+                              f"pico de memória {medicao['pico_memoria_mb']:>8.1f} MB")
+                if 'erro' in medicao:
+                    # As etapas seguintes deste tamanho dependem das saídas desta
+                    break
+        finally:
+            if manter_arquivos:
+                print(f"Saídas das etapas mantidas em '{trabalho}'.")
+            else:
+                shutil.rmtree(trabalho, ignore_errors=True)
+
+    with open(arquivo_resultados, 'a', encoding='utf-8') as arquivo:
+        for resultado in resultados:
+            arquivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+    print(f"\n{len(resultados)} medições acrescentadas a '{arquivo_resultados}'.")
+    return resultados
+
+
+def carregar_resultados(arquivo_resultados=ARQUIVO_RESULTADOS):
+    """Todas as medições gravadas, como DataFrame (vazio se o arquivo não existir)."""
+    if not os.path.exists(arquivo_resultados):
+        return pd.DataFrame()
+    with open(arquivo_resultados, encoding='utf-8') as arquivo:
+        return pd.DataFrame([json.loads(linha) for linha in arquivo if linha.strip()])
+
+
+def comparar_execucoes(resultados, atual=None, referencia=None, tolerancia=TOLERANCIA_PADRAO):
+    """
+    Compara a mediana do tempo e do pico de memória de cada (etapa, linhas) entre
+    duas execuções do benchmark.
+
+    Args:
+        resultados (DataFrame): Medições (ver carregar_resultados).
+        atual (str): Execução (data ISO) ou commit a avaliar. Padrão: a mais recente.
+        referencia (str): Execução ou commit de referência. Padrão: a anterior à atual.
+        tolerancia (float): Aumento relativo aceito antes de marcar regressão (0.2 = 20%).
+
+    Returns:
+        DataFrame: etapa, linhas, tempos e memórias das duas execuções, as razões
+                   atual/referência e as colunas Falhou (a etapa terminou com erro
+                   na execução atual) e Regressao (que inclui as falhas).
+    """
+    execucoes = list(dict.fromkeys(resultados.sort_values('execucao')['execucao']))
+
+    def selecionar(chave, padrao):
+        if chave is None:
+            return resultados[resultados['execucao'] == padrao]
+        selecionadas = resultados[(resultados['execucao'] == chave) | (resultados['commit'] == chave)]
+        if selecionadas.empty:
+            raise ValueError(f"Nenhuma execução ou commit '{chave}' nos resultados.")
+        # De um commit medido várias vezes, usa a execução mais recente
+        return selecionadas[selecionadas['execucao'] == selecionadas['execucao'].max()]
+
+    if atual is None and not execucoes:
+        raise ValueError("Não há resultados para comparar.")
+    medicoes_atuais = selecionar(atual, execucoes[-1] if execucoes else None)
+    anteriores = [execucao for execucao in execucoes if execucao < medicoes_atuais['execucao'].iloc[0]]
+    if referencia is None and not anteriores:
+        raise ValueError("Não há execução anterior para usar como referência.")
+    medicoes_referencia = selecionar(referencia, anteriores[-1] if anteriores else None)
+
+    def com_erro(medicoes):
+        return medicoes['erro'].notna() if 'erro' in medicoes else pd.Series(False, index=medicoes.index)
+
+    def medianas(medicoes):
+        # Medições com erro não têm tempo: não entram nas medianas
+        medicoes = medicoes[~com_erro(medicoes)]
+        return medicoes.groupby(['etapa', 'linhas'])[['segundos', 'pico_memoria_mb']].median()
+
+    falhas = pd.MultiIndex.from_frame(medicoes_atuais.loc[com_erro(medicoes_atuais), ['etapa', 'linhas']])
+    medidas = pd.MultiIndex.from_frame(medicoes_atuais[['etapa', 'linhas']])
+    comparacao = medianas(medicoes_referencia).join(medianas(medicoes_atuais), how='left',
+                                                    lsuffix='_referencia', rsuffix='_atual')
+    comparacao = comparacao[comparacao.index.isin(medidas)]
+    comparacao['razao_tempo'] = (comparacao['segundos_atual'] / comparacao['segundos_referencia']).round(3)
+    comparacao['razao_memoria'] = (comparacao['pico_memoria_mb_atual']
+                                   / comparacao['pico_memoria_mb_referencia']).round(3)
+    comparacao['Falhou'] = comparacao.index.isin(falhas)
+    comparacao['Regressao'] = ((comparacao['razao_tempo'] > 1 + tolerancia)
+                               | (comparacao['razao_memoria'] > 1 + tolerancia) | comparacao['Falhou'])
+    return comparacao.reset_index()
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # python benchmark_pipeline.py --tamanhos 10000 100000 --repeticoes 3
+    # python benchmark_pipeline.py --comparar                 (última execução x anterior)
+    # python benchmark_pipeline.py --comparar --referencia 1a2b3c4
+    parser = argparse.ArgumentParser(description="Mede tempo e memória das etapas do pipeline em dados sintéticos.")
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=list(TAMANHOS_PADRAO),
+                        help="Números de linhas das planilhas sintéticas (ex: 10000 100000 1000000 10000000).")
+    parser.add_argument('--etapas', nargs='+', choices=NOMES_ETAPAS, help="Etapas a medir (padrão: todas).")
+    parser.add_argument('--repeticoes', type=int, default=1)
+    parser.add_argument('--pasta-dados', default=PASTA_DADOS)
+    parser.add_argument('--pasta-trabalho', default=None)
+    parser.add_argument('--resultados', default=ARQUIVO_RESULTADOS)
+    parser.add_argument('--manter-arquivos', action='store_true')
+    parser.add_argument('--comparar', action='store_true',
+                        help="Só compara execuções já gravadas, sem medir de novo.")
+    parser.add_argument('--atual', help="Execução (data ISO) ou commit a avaliar na comparação.")
+    parser.add_argument('--referencia', help="Execução (data ISO) ou commit de referência na comparação.")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO)
+    argumentos = parser.parse_args()
+
+    if not argumentos.comparar:
+        executar_benchmark(argumentos.tamanhos, argumentos.etapas, argumentos.repeticoes, argumentos.pasta_dados,
+                           argumentos.pasta_trabalho, argumentos.resultados, argumentos.manter_arquivos)
+
+    resultados = carregar_resultados(argumentos.resultados)
+    try:
+        comparacao = comparar_execucoes(resultados, argumentos.atual, argumentos.referencia, argumentos.tolerancia)
+    except (KeyError, ValueError) as e:
+        if argumentos.comparar:
+            print(f"Erro na comparação: {e}")
+        raise SystemExit(1 if argumentos.comparar else 0)
+
+    print(f"\nComparação com a execução de referência (tolerância de {argumentos.tolerancia:.0%}):")
+    print(comparacao.to_string(index=False))
+    regressoes = comparacao[comparacao['Regressao']]
+    if not regressoes.empty:
+        print(f"\n{len(regressoes)} regressões encontradas.")
+        raise SystemExit(1)
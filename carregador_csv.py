@@ -0,0 +1,151 @@
+import codecs
+
+import pandas as pd
+
+import instrumentacao
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+# Esquema da planilha do Wappalyzer (PEC1_coleta_de_dados_Planilha_FINAL.csv e
+# planilha_sem_duplicatas.csv). Colunas fora do esquema são lidas como texto.
+ESQUEMA_PLANILHA = {
+    'ID': 'int32',
+    'EMPRESA': 'str',
+    'Setor primário': 'category',
+    'SSL/TLS enabled': 'boolean',
+    'Responsive': 'boolean',
+}
+TIPOS_INTEIROS = {'int32': 'Int32', 'int64': 'Int64'}
+
+# Textos aceitos nas colunas booleanas (comparados já sem espaços e em maiúsculas)
+VALORES_VERDADEIROS = ['1', '1.0', 'TRUE']
+VALORES_FALSOS = ['0', '0.0', 'FALSE']
+
+
+def detectar_encoding(nome_arquivo, tamanho_amostra=1024 * 1024):
+    """
+    Escolhe o encoding do arquivo ('utf-8' ou 'latin1') decodificando só uma
+    amostra do início, em vez de ler o arquivo inteiro e repetir a leitura
+    quando o UTF-8 falha.
+    """
+    with open(nome_arquivo, 'rb') as arquivo:
+        amostra = arquivo.read(tamanho_amostra)
+    try:
+        # final=False: um caractere multibyte cortado no fim da amostra não é erro
+        codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin1'
+
+
+def converter_para_booleano(serie):
+    """
+    Converte uma coluna com 1/0, TRUE/FALSE (texto ou número) para o tipo
+    booleano anulável do pandas ('boolean'); valores fora desses viram <NA>.
+
+    A conversão é feita com comparações vetorizadas (isin / ==), sem um
+    dicionário consultado valor a valor.
+    """
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.astype('boolean')
+    if pd.api.types.is_numeric_dtype(serie):
+        verdadeiro = (serie == 1).to_numpy(dtype=bool, na_value=False)
+        falso = (serie == 0).to_numpy(dtype=bool, na_value=False)
+    else:
+        texto = serie.astype('str').str.strip().str.upper()
+        verdadeiro = texto.isin(VALORES_VERDADEIROS).to_numpy(dtype=bool)
+        falso = texto.isin(VALORES_FALSOS).to_numpy(dtype=bool)
+    valores = pd.arrays.BooleanArray(verdadeiro, ~(verdadeiro | falso))
+    return pd.Series(valores, index=serie.index, name=serie.name)
+
+
+def aplicar_esquema(df, esquema):
+    """
+    Converte as colunas de `df` (lidas como texto) para os tipos do esquema:
+    'int32'/'int64' (anulável se houver valores vazios ou não numéricos),
+    'boolean', 'category' ou 'str'.
+    """
+    df = df.copy()
+    for coluna, tipo in esquema.items():
+        if coluna not in df.columns:
+            continue
+        if tipo in TIPOS_INTEIROS:
+            numeros = pd.to_numeric(df[coluna], errors='coerce')
+            df[coluna] = numeros.astype(TIPOS_INTEIROS[tipo] if numeros.isna().any() else tipo)
+        elif tipo == 'boolean':
+            df[coluna] = converter_para_booleano(df[coluna])
+        elif tipo == 'category':
+            df[coluna] = df[coluna].astype('category')
+        elif tipo != 'str':
+            raise ValueError(f"Tipo '{tipo}' da coluna '{coluna}' não é suportado pelo esquema.")
+    return df
+
+
+def _ler_texto_pyarrow(caminho, encoding, colunas):
+    # Todas as colunas como texto: o leitor do Arrow não tenta inferir tipos
+    # (1/0 e TRUE/FALSE seriam lidos como booleanos pelo motor 'pyarrow' do pandas)
+    nomes = pd.read_csv(caminho, nrows=0, encoding=encoding).columns
+    colunas = list(nomes) if colunas is None else list(colunas)
+    tabela = pa_csv.read_csv(
+        caminho,
+        read_options=pa_csv.ReadOptions(encoding=encoding),
+        convert_options=pa_csv.ConvertOptions(column_types={coluna: pa.string() for coluna in nomes},
+                                              include_columns=colunas, strings_can_be_null=True),
+    )
+    return tabela.to_pandas()
+
+
+def _ler_texto(caminho, encoding, colunas):
+    if pa_csv is not None:
+        try:
+            return _ler_texto_pyarrow(caminho, encoding, colunas)
+        except pa.ArrowInvalid as e:
+            # O Arrow reporta bytes inválidos como ArrowInvalid
+            if 'invalid' in str(e).lower() and 'utf' in str(e).lower():
+                raise UnicodeDecodeError(encoding, b'', 0, 1, str(e)) from e
+            raise
+    return pd.read_csv(caminho, dtype=str, encoding=encoding, usecols=colunas)
+
+
+def carregar_csv(caminho, esquema=None, colunas=None, encoding=None):
+    """
+    Lê um CSV com o leitor multithread do pyarrow (ou o do pandas, se o pyarrow
+    não estiver instalado), todas as colunas como texto, e aplica o esquema
+    declarado em vez da inferência de tipos do pandas.
+
+    Args:
+        caminho (str): Arquivo CSV.
+        esquema (dict): Coluna -> tipo (ver aplicar_esquema). Padrão: ESQUEMA_PLANILHA.
+        colunas (list): Colunas a carregar (None = todas).
+        encoding (str): Encoding do arquivo. Se None, é detectado por uma amostra
+                        (detectar_encoding), sem ler o arquivo duas vezes.
+
+    Returns:
+        tuple: (DataFrame, encoding usado)
+    """
+    esquema = ESQUEMA_PLANILHA if esquema is None else esquema
+    encoding = encoding or detectar_encoding(caminho)
+    with instrumentacao.leitura(caminho) as operacao:
+        try:
+            df = _ler_texto(caminho, encoding, colunas)
+        except UnicodeDecodeError:
+            if encoding == 'latin1':
+                raise
+            # O trecho inválido estava depois da amostra; latin1 aceita qualquer byte
+            encoding = 'latin1'
+            df = _ler_texto(caminho, encoding, colunas)
+        operacao.linhas = len(df)
+    return aplicar_esquema(df, esquema), encoding
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    df, encoding = carregar_csv('PEC1_coleta_de_dados_Planilha_FINAL.csv')
+    print(f"{len(df)} linhas lidas com encoding {encoding}.")
+    print(df.dtypes)
+    print(df['SSL/TLS enabled'].value_counts(dropna=False))
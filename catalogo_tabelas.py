@@ -0,0 +1,167 @@
+import os
+from collections import OrderedDict
+
+import pandas as pd
+
+from formatos_tabela import ler_tabela
+
+# Esquema fixo das tabelas do pipeline: ID inteiro e o restante como texto
+TIPOS_PADRAO = {'ID': 'int64'}
+LIMITE_PADRAO_BYTES = 512 * 1024 * 1024
+
+
+def _copy_on_write_ativo():
+    """True no pandas 3 (Copy-on-Write sempre ligado) ou com pd.options.mode.copy_on_write no pandas 2."""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    try:
+        return pd.get_option('mode.copy_on_write') is True
+    except KeyError:
+        # Versões sem a opção (pandas < 1.5)
+        return False
+
+
+def _assinatura_arquivo(caminho):
+    """(mtime, tamanho) do arquivo; para uma pasta (Parquet particionado), dos arquivos dentro dela."""
+    if not os.path.isdir(caminho):
+        info = os.stat(caminho)
+        return info.st_mtime_ns, info.st_size
+    mtime, tamanho = os.stat(caminho).st_mtime_ns, 0
+    for raiz, _, nomes in os.walk(caminho):
+        for nome in nomes:
+            info = os.stat(os.path.join(raiz, nome))
+            mtime, tamanho = max(mtime, info.st_mtime_ns), tamanho + info.st_size
+    return mtime, tamanho
+
+
+class CatalogoTabelas:
+    """
+    Catálogo em memória das tabelas lidas pelos scripts, para que várias etapas
+    rodando no mesmo processo leiam cada arquivo uma única vez.
+
+    Cada tabela é carregada com um esquema fixo (`tipos`; colunas não listadas
+    viram texto) e entregue como uma cópia rasa: com o Copy-on-Write do pandas,
+    a cópia não duplica os dados e alterações feitas por quem a recebeu não
+    afetam o catálogo. Sem o Copy-on-Write (pandas 2 com a opção desligada), a
+    cópia é completa, para que a tabela em cache não seja alterada. Uma entrada
+    é recarregada quando o mtime ou o tamanho do arquivo mudam, e as menos
+    usadas recentemente são descartadas quando a memória ocupada passa de
+    `limite_bytes`.
+
+    Args:
+        limite_bytes (int): Memória máxima ocupada pelas tabelas em cache.
+        tipos (dict): Tipo de cada coluna conhecida (ex: {'ID': 'int64'}).
+    """
+
+    def __init__(self, limite_bytes=LIMITE_PADRAO_BYTES, tipos=None):
+        self.limite_bytes = limite_bytes
+        self.tipos = dict(TIPOS_PADRAO if tipos is None else tipos)
+        self._entradas = OrderedDict()  # caminho -> (assinatura, DataFrame, bytes)
+        self.uso_memoria = 0
+        self.acertos = 0
+        self.carregamentos = 0
+        self.invalidacoes = 0
+        self.descartes = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, caminho):
+        return os.path.abspath(caminho) in self._entradas
+
+    def _aplicar_esquema(self, df):
+        tipos = {coluna: self.tipos.get(coluna, 'str') for coluna in df.columns
+                 if coluna in self.tipos or df[coluna].dtype == object}
+        return df.astype(tipos) if tipos else df
+
+    def _remover(self, chave):
+        _, _, tamanho = self._entradas.pop(chave)
+        self.uso_memoria -= tamanho
+
+    def obter(self, caminho, colunas=None):
+        """
+        Retorna a tabela do caminho (CSV ou Parquet), lendo do disco só na primeira
+        vez ou quando o arquivo mudou.
+
+        Args:
+            caminho (str): Arquivo da tabela.
+            colunas (list): Se informado, só essas colunas (a tabela inteira fica em cache).
+        """
+        chave = os.path.abspath(caminho)
+        assinatura = _assinatura_arquivo(chave)
+
+        entrada = self._entradas.get(chave)
+        if entrada is not None and entrada[0] != assinatura:
+            self._remover(chave)
+            self.invalidacoes += 1
+            entrada = None
+
+        if entrada is None:
+            df = self._aplicar_esquema(ler_tabela(caminho))
+            tamanho = int(df.memory_usage(deep=True).sum())
+            self._entradas[chave] = (assinatura, df, tamanho)
+            self.uso_memoria += tamanho
+            self.carregamentos += 1
+            # Descarta as menos usadas recentemente, preservando a que acabou de entrar
+            while self.uso_memoria > self.limite_bytes and len(self._entradas) > 1:
+                self._remover(next(iter(self._entradas)))
+                self.descartes += 1
+        else:
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+
+        df = self._entradas[chave][1]
+        if colunas is not None:
+            # Seleção por lista de colunas sempre gera um novo DataFrame
+            return df[list(colunas)]
+        return df.copy(deep=not _copy_on_write_ativo())
+
+    def invalidar(self, caminho=None):
+        """Remove uma tabela do catálogo (ou todas, se `caminho` for None)."""
+        if caminho is None:
+            self._entradas.clear()
+            self.uso_memoria = 0
+        elif caminho in self:
+            self._remover(os.path.abspath(caminho))
+
+    def resumo(self):
+        """Estatísticas de uso do catálogo."""
+        return {
+            'tabelas': len(self._entradas),
+            'uso_memoria_bytes': self.uso_memoria,
+            'acertos': self.acertos,
+            'carregamentos': self.carregamentos,
+            'invalidacoes': self.invalidacoes,
+            'descartes': self.descartes,
+        }
+
+
+def ler(caminho, catalogo=None):
+    """Lê a tabela pelo catálogo, se houver um; senão direto do disco."""
+    if catalogo is not None:
+        return catalogo.obter(caminho)
+    return ler_tabela(caminho)
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # Roda as etapas que leem tabelas_divididas_corrigido/ no mesmo processo,
+    # compartilhando um único catálogo: cada CSV é lido do disco uma vez só.
+    from consolidar_valores_unicos import consolidar_valores_unicos_de_pasta
+    from unificar_tecnologias_csv import unificar_arquivos_tecnologia
+    from pegar_dados_individuais import listar_valores_unicos_segunda_coluna
+    from transferir_libs_para_libraries import transferir_bibliotecas
+
+    pasta_tabelas = 'tabelas_divididas_corrigido'
+    catalogo = CatalogoTabelas(limite_bytes=256 * 1024 * 1024)
+
+    consolidar_valores_unicos_de_pasta(pasta_tabelas, 'consolidado_valores_unicos.csv', catalogo=catalogo)
+    unificar_arquivos_tecnologia(pasta_tabelas, catalogo=catalogo)
+    listar_valores_unicos_segunda_coluna(os.path.join(pasta_tabelas, 'cdn.csv'), catalogo=catalogo)
+    transferir_bibliotecas(os.path.join(pasta_tabelas, 'javascript_frameworks.csv'),
+                           os.path.join(pasta_tabelas, 'javascript_libraries.csv'),
+                           'novos_arquivos_csv_refatorados/javascript_frameworks_new.csv',
+                           'novos_arquivos_csv_refatorados/javascript_libraries_new.csv',
+                           catalogo=catalogo)
+
+    print(f"\nCatálogo: {catalogo.resumo()}")
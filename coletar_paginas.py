@@ -0,0 +1,87 @@
+import asyncio
+import os
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from arquivo_respostas import ArquivoRespostas
+
+CABECALHOS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+
+def ler_sites(arquivo_sites):
+    """Retorna pares (número da linha, URL) das linhas de sites.txt que são URLs."""
+    with open(arquivo_sites, 'r', encoding='utf-8') as arquivo:
+        linhas = arquivo.read().splitlines()
+    return [(numero, linha.strip()) for numero, linha in enumerate(linhas, start=1)
+            if linha.strip().lower().startswith(('http://', 'https://'))]
+
+
+async def coletar_paginas(arquivo_sites, arquivo_saida, concorrencia=20, tempo_limite=30,
+                          max_redirecionamentos=10):
+    """
+    Baixa a página inicial de todos os sites de forma concorrente e guarda as
+    respostas brutas (cabeçalhos + corpo) no arquivo comprimido de arquivo_respostas.
+
+    Usa uma única sessão HTTP (pool de conexões), segue redirecionamentos e
+    decodifica gzip/deflate automaticamente (brotli também, se o pacote 'Brotli'
+    estiver instalado). O ID de cada registro é o número da linha em sites.txt.
+
+    Args:
+        arquivo_sites (str): Arquivo com uma URL por linha (ex: 'URLS/sites.txt').
+        arquivo_saida (str): Arquivo de respostas a ser criado/complementado.
+        concorrencia (int): Máximo de downloads simultâneos.
+        tempo_limite (int): Tempo limite (s) de cada download.
+        max_redirecionamentos (int): Máximo de redirecionamentos seguidos por site.
+    """
+    if aiohttp is None:
+        raise ImportError("A coleta requer o pacote 'aiohttp' (pip install aiohttp).")
+
+    try:
+        sites = ler_sites(arquivo_sites)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo de sites não encontrado em '{arquivo_sites}'")
+        return
+    print(f"{len(sites)} sites para coletar de '{arquivo_sites}'.")
+
+    semaforo = asyncio.Semaphore(concorrencia)
+    conector = aiohttp.TCPConnector(limit=concorrencia)
+    timeout = aiohttp.ClientTimeout(total=tempo_limite)
+    coletados = 0
+    falhas = 0
+
+    with ArquivoRespostas(arquivo_saida) as arquivo:
+        async with aiohttp.ClientSession(connector=conector, timeout=timeout, headers=CABECALHOS) as sessao:
+            async def baixar(numero, url):
+                nonlocal coletados, falhas
+                async with semaforo:
+                    try:
+                        async with sessao.get(url, allow_redirects=True,
+                                              max_redirects=max_redirecionamentos) as resposta:
+                            corpo = await resposta.read()
+                            cabecalhos = [(nome.decode('latin-1'), valor.decode('latin-1'))
+                                          for nome, valor in resposta.raw_headers]
+                            arquivo.adicionar(str(resposta.url), resposta.status, cabecalhos, corpo,
+                                              id_registro=numero, url_solicitada=url)
+                            coletados += 1
+                            print(f"[{resposta.status}] {url} ({len(corpo)} bytes)")
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        falhas += 1
+                        print(f"Erro ao baixar '{url}': {e!r}")
+
+            await asyncio.gather(*(baixar(numero, url) for numero, url in sites))
+
+    print(f"\nColeta concluída: {coletados} páginas salvas em '{arquivo_saida}', {falhas} falhas.")
+
+
+if __name__ == "__main__":
+    arquivo_de_sites = os.path.join('URLS', 'sites.txt')
+    arquivo_de_paginas = 'paginas.warc.zst'
+
+    asyncio.run(coletar_paginas(arquivo_de_sites, arquivo_de_paginas, concorrencia=20))
@@ -1,8 +1,65 @@
 import pandas as pd
 import os
 import sys # Para sair do script em caso de erro grave
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from catalogo_tabelas import ler
+from formatos_tabela import eh_arquivo_de_tabela, salvar_tabela
+from instrumentacao import instrumentar
+from tabela_compacta import ler_tabela_longa
+
+def _valores_unicos_do_arquivo(caminho_completo, catalogo=None):
+    """
+    Extrai os valores únicos (não nulos/vazios) da segunda coluna de um arquivo.
+
+    Função de nível de módulo para poder rodar em outro processo; as mensagens
+    são devolvidas em vez de impressas, para saírem na ordem dos arquivos.
 
-def consolidar_valores_unicos_de_pasta(pasta_entrada, arquivo_saida):
+    Returns:
+        tuple: (nome da segunda coluna, lista de valores únicos, lista de mensagens)
+    """
+    nome_arquivo = os.path.basename(caminho_completo)
+    mensagens = [f"\nProcessando arquivo: '{nome_arquivo}'..."]
+
+    try:
+        # Tenta ler o arquivo CSV
+        df = ler(caminho_completo, catalogo)
+
+        # Verifica se o DataFrame tem pelo menos duas colunas
+        if df.shape[1] < 2:
+            mensagens.append(f"  Aviso: O arquivo '{nome_arquivo}' não possui pelo menos duas colunas. Pulando.")
+            return None, [], mensagens
+
+        # Pega o nome da segunda coluna (índice 1) - esta será a 'Categoria'
+        nome_segunda_coluna = df.columns[1]
+        mensagens.append(f"  Analisando coluna de categoria: '{nome_segunda_coluna}'")
+
+        # Extrai os valores únicos da segunda coluna
+        # .dropna() remove valores ausentes (NaN, None)
+        # .astype(str) converte para string para garantir consistência
+        # .str.strip() remove espaços em branco no início e fim
+        # .unique() pega apenas os valores distintos
+        # Filtra strings vazias explicitamente após o strip
+        valores_unicos = df[nome_segunda_coluna].dropna().astype(str).str.strip().unique()
+        valores_unicos_filtrados = [valor for valor in valores_unicos if valor] # Remove strings vazias
+
+        if valores_unicos_filtrados:
+            mensagens.append(f"  Encontrados {len(valores_unicos_filtrados)} valores únicos.")
+        else:
+            mensagens.append("  Nenhum valor único (não nulo/vazio) encontrado nesta coluna.")
+        return nome_segunda_coluna, valores_unicos_filtrados, mensagens
+
+    except pd.errors.EmptyDataError:
+        mensagens.append(f"  Aviso: O arquivo '{nome_arquivo}' está vazio. Pulando.")
+    except Exception as e:
+        mensagens.append(f"  Erro inesperado ao processar o arquivo '{nome_arquivo}':")
+        mensagens.append(f"  {e}")
+        mensagens.append("  Pulando este arquivo.")
+    return None, [], mensagens
+
+@instrumentar
+def consolidar_valores_unicos_de_pasta(pasta_entrada, arquivo_saida, formato='csv', paralelo=False, max_processos=None,
+                                       catalogo=None):
     """
     Lê todos os arquivos CSV em uma pasta de entrada, extrai os valores únicos
     da segunda coluna de cada arquivo, e consolida tudo em um único CSV de saída
@@ -11,6 +68,12 @@ def consolidar_valores_unicos_de_pasta(pasta_entrada, arquivo_saida):
     Args:
         pasta_entrada (str): O caminho para a pasta contendo os arquivos CSV.
         arquivo_saida (str): O caminho para o arquivo CSV de saída consolidado.
+        formato (str): Formato do arquivo de saída ('csv' ou 'parquet'). Os arquivos
+                       de entrada podem estar em qualquer um dos dois.
+        paralelo (bool): Se True, lê os arquivos em paralelo (um processo por núcleo).
+        max_processos (int): Máximo de processos no modo paralelo (None = número de CPUs).
+        catalogo (CatalogoTabelas): Catálogo compartilhado para não reler tabelas já
+                                    carregadas (só no modo sequencial).
     """
     lista_resultados = [] # Lista para armazenar dicionários {'Categoria': ..., 'Valor_Unico': ...}
 
@@ -21,52 +84,31 @@ def consolidar_valores_unicos_de_pasta(pasta_entrada, arquivo_saida):
 
     print(f"Iniciando varredura na pasta: '{pasta_entrada}'")
 
-    # Itera sobre todos os arquivos na pasta de entrada
+    # Seleciona os arquivos CSV (ou Parquet) da pasta
+    arquivos = []
     for nome_arquivo in os.listdir(pasta_entrada):
-        # Verifica se é um arquivo CSV
-        if nome_arquivo.lower().endswith('.csv'):
-            caminho_completo = os.path.join(pasta_entrada, nome_arquivo)
-            print(f"\nProcessando arquivo: '{nome_arquivo}'...")
-
-            try:
-                # Tenta ler o arquivo CSV
-                df = pd.read_csv(caminho_completo)
-
-                # Verifica se o DataFrame tem pelo menos duas colunas
-                if df.shape[1] < 2:
-                    print(f"  Aviso: O arquivo '{nome_arquivo}' não possui pelo menos duas colunas. Pulando.")
-                    continue # Pula para o próximo arquivo
-
-                # Pega o nome da segunda coluna (índice 1) - esta será a 'Categoria'
-                nome_segunda_coluna = df.columns[1]
-                print(f"  Analisando coluna de categoria: '{nome_segunda_coluna}'")
-
-                # Extrai os valores únicos da segunda coluna
-                # .dropna() remove valores ausentes (NaN, None)
-                # .astype(str) converte para string para garantir consistência
-                # .str.strip() remove espaços em branco no início e fim
-                # .unique() pega apenas os valores distintos
-                # Filtra strings vazias explicitamente após o strip
-                valores_unicos = df[nome_segunda_coluna].dropna().astype(str).str.strip().unique()
-                valores_unicos_filtrados = [valor for valor in valores_unicos if valor] # Remove strings vazias
-
-                if valores_unicos_filtrados:
-                    print(f"  Encontrados {len(valores_unicos_filtrados)} valores únicos.")
-                    # Adiciona cada valor único à lista de resultados
-                    for valor in valores_unicos_filtrados:
-                        lista_resultados.append({
-                            'Categoria': nome_segunda_coluna,
-                            'Valor_Unico': valor
-                        })
-                else:
-                    print("  Nenhum valor único (não nulo/vazio) encontrado nesta coluna.")
-
-            except pd.errors.EmptyDataError:
-                print(f"  Aviso: O arquivo '{nome_arquivo}' está vazio. Pulando.")
-            except Exception as e:
-                print(f"  Erro inesperado ao processar o arquivo '{nome_arquivo}':")
-                print(f"  {e}")
-                print("  Pulando este arquivo.")
+        caminho_completo = os.path.join(pasta_entrada, nome_arquivo)
+        if eh_arquivo_de_tabela(nome_arquivo) and os.path.isfile(caminho_completo):
+            arquivos.append(caminho_completo)
+
+    # executor.map devolve os resultados na ordem dos arquivos (mesmas mensagens do modo sequencial)
+    if paralelo and len(arquivos) > 1:
+        processos = max_processos or os.cpu_count() or 1
+        tamanho_lote = max(1, len(arquivos) // (4 * processos))
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_valores_unicos_do_arquivo, arquivos, chunksize=tamanho_lote))
+    else:
+        resultados = map(partial(_valores_unicos_do_arquivo, catalogo=catalogo), arquivos)
+
+    for nome_segunda_coluna, valores_unicos_filtrados, mensagens in resultados:
+        for mensagem in mensagens:
+            print(mensagem)
+        # Adiciona cada valor único à lista de resultados
+        for valor in valores_unicos_filtrados:
+            lista_resultados.append({
+                'Categoria': nome_segunda_coluna,
+                'Valor_Unico': valor
+            })
 
     # --- Consolidação e Salvamento ---
     if lista_resultados:
@@ -84,7 +126,7 @@ def consolidar_valores_unicos_de_pasta(pasta_entrada, arquivo_saida):
                 os.makedirs(pasta_destino_saida)
 
             # Salva o DataFrame consolidado no arquivo de saída
-            df_consolidado.to_csv(arquivo_saida, index=False, encoding='utf-8')
+            arquivo_saida = salvar_tabela(df_consolidado, arquivo_saida, formato)
             print(f"\nArquivo consolidado salvo com sucesso em: '{arquivo_saida}'")
         except Exception as e:
             print(f"\nErro ao salvar o arquivo consolidado '{arquivo_saida}':")
@@ -93,12 +135,57 @@ def consolidar_valores_unicos_de_pasta(pasta_entrada, arquivo_saida):
         print("\nNenhum valor único foi extraído de nenhum arquivo CSV na pasta especificada.")
         print("Nenhum arquivo de saída foi gerado.")
 
+@instrumentar
+def consolidar_valores_unicos_da_tabela(arquivo_unificado, arquivo_saida, formato='csv'):
+    """
+    Gera o consolidado ('Categoria', 'Valor_Unico') das categorias de tecnologia a
+    partir da tabela longa unificada, em vez de varrer a pasta de tabelas N:N (a
+    tabela principal, que não entra na tabela longa, fica de fora). A tabela é
+    carregada em códigos inteiros (TabelaCompacta) e os pares distintos são obtidos sobre eles.
+
+    Args:
+        arquivo_unificado (str): Tecnologias_Unificadas (CSV, Parquet ou .npz compacto).
+        arquivo_saida (str): O caminho para o arquivo CSV de saída consolidado.
+        formato (str): Formato do arquivo de saída ('csv' ou 'parquet').
+    """
+    try:
+        tabela = ler_tabela_longa(arquivo_unificado)
+        print(f"Tabela '{arquivo_unificado}' carregada: {tabela}.")
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado em '{arquivo_unificado}'")
+        return
+    except Exception as e:
+        print(f"Erro ao ler a tabela unificada '{arquivo_unificado}': {e}")
+        return
+
+    df_consolidado = tabela.valores_unicos_por_categoria()
+    if df_consolidado.empty:
+        print("\nNenhum valor único foi extraído da tabela unificada.")
+        print("Nenhum arquivo de saída foi gerado.")
+        return
+
+    print(f"\nConsolidando {len(df_consolidado)} valores únicos de todas as categorias...")
+    try:
+        pasta_destino_saida = os.path.dirname(arquivo_saida)
+        if pasta_destino_saida and not os.path.exists(pasta_destino_saida):
+            os.makedirs(pasta_destino_saida)
+        arquivo_saida = salvar_tabela(df_consolidado, arquivo_saida, formato)
+        print(f"\nArquivo consolidado salvo com sucesso em: '{arquivo_saida}'")
+    except Exception as e:
+        print(f"\nErro ao salvar o arquivo consolidado '{arquivo_saida}':")
+        print(e)
+
 # --- Como usar ---
-# 1. Defina o nome da pasta que contém os arquivos CSV:
-nome_da_pasta_entrada = 'tabelas_divididas_corrigido' # <--- CONFIRME O NOME DA PASTA
+if __name__ == "__main__":
+    # 1. Defina o nome da pasta que contém os arquivos CSV:
+    nome_da_pasta_entrada = 'tabelas_divididas_corrigido' # <--- CONFIRME O NOME DA PASTA
+
+    # 2. Defina o nome desejado para o arquivo CSV de saída consolidado:
+    nome_do_arquivo_saida_consolidado = 'consolidado_valores_unicos.csv'
 
-# 2. Defina o nome desejado para o arquivo CSV de saída consolidado:
-nome_do_arquivo_saida_consolidado = 'consolidado_valores_unicos.csv'
+    # 3. Chama a função para processar a pasta e gerar o arquivo consolidado
+    consolidar_valores_unicos_de_pasta(nome_da_pasta_entrada, nome_do_arquivo_saida_consolidado)
 
-# 3. Chama a função para processar a pasta e gerar o arquivo consolidado
-consolidar_valores_unicos_de_pasta(nome_da_pasta_entrada, nome_do_arquivo_saida_consolidado)
+    # Alternativa: a partir da tabela unificada (CSV, Parquet ou .npz compacto)
+    # consolidar_valores_unicos_da_tabela('novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv',
+    #                                     nome_do_arquivo_saida_consolidado)
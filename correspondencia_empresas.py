@@ -0,0 +1,271 @@
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from formatos_tabela import salvar_tabela
+
+# Palavras que não ajudam a distinguir uma empresa (forma jurídica, preposições)
+PALAVRAS_IGNORADAS = {
+    'sa', 's', 'a', 'ltda', 'cia', 'companhia', 'grupo', 'holding', 'participacoes', 'par',
+    'de', 'do', 'da', 'dos', 'das', 'e', 'the', 'co', 'inc', 'me', 'eireli',
+}
+REGEX_NAO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+COLUNAS_CORRESPONDENCIAS = ['Indice_Esquerda', 'Nome_Esquerda', 'Indice_Direita', 'Nome_Direita', 'Confianca']
+
+
+@lru_cache(maxsize=None)
+def normalizar_nome_empresa(nome):
+    """
+    Forma canônica do nome de uma empresa para comparação: sem acentos, em
+    minúsculas, sem pontuação e sem as palavras de PALAVRAS_IGNORADAS
+    (ex: 'Cia. Müller S.A.' -> 'muller'). Se só sobrarem palavras ignoradas,
+    elas são mantidas.
+    """
+    decomposto = unicodedata.normalize('NFKD', str(nome).lower())
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    # Pontuação (inclusive a tipográfica, como ’ e –) separa palavras
+    palavras = REGEX_NAO_ALFANUMERICO.sub(' ', sem_acentos).split()
+    return ' '.join([p for p in palavras if p not in PALAVRAS_IGNORADAS] or palavras)
+
+
+def trigramas(nome_normalizado):
+    """Trigramas de caracteres do nome, com um espaço de borda em cada palavra."""
+    trigramas_nome = set()
+    for palavra in nome_normalizado.split():
+        palavra = f' {palavra} '
+        trigramas_nome.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return frozenset(trigramas_nome)
+
+
+def calcular_pesos_palavras(nomes_normalizados):
+    """
+    Peso IDF de cada palavra: palavras comuns a muitas empresas ('energia',
+    'alimentos', 'brasil') pesam pouco (tendendo a zero quanto mais comuns);
+    nomes próprios raros pesam muito.
+    """
+    frequencias = Counter(palavra for nome in nomes_normalizados for palavra in set(nome.split()))
+    total = len(nomes_normalizados)
+    return {palavra: math.log((total + 1) / (frequencia + 1)) for palavra, frequencia in frequencias.items()}
+
+
+def palavras_distintivas(palavras, pesos):
+    """Palavras de maior peso do nome (as mais raras); sem pesos, todas."""
+    if not pesos:
+        return set(palavras)
+    maior_peso = max(pesos.get(palavra, 1.0) for palavra in palavras)
+    return {palavra for palavra in palavras if pesos.get(palavra, 1.0) >= maior_peso}
+
+
+def pontuar(nome_a, nome_b, trigramas_a=None, trigramas_b=None, pesos=None):
+    """
+    Confiança (0 a 1) de que dois nomes já normalizados são a mesma empresa.
+
+    É a média de duas notas, com peso 2 para a de palavras e 1 para a de caracteres:
+      - palavras: sobreposição das palavras em comum ponderada por `pesos`
+        (média entre a cobertura do nome mais curto e o Jaccard ponderado),
+        para que 'Vibra' case com 'Vibra Energia' mas 'WEG Amazônia' não case
+        com 'Agro Amazônia';
+      - caracteres: média entre o Jaccard dos trigramas e a razão de
+        similaridade da sequência, que tolera erros de digitação.
+    Nomes iguais (também ignorando espaços) ou com o mesmo conjunto de palavras valem 1.
+    Com `pesos`, pares que não têm em comum a palavra mais rara de nenhum dos dois
+    nomes valem 0: só palavras de setor em comum ('Melnick Desenvolvimento
+    Imobiliário' x 'ONE Desenvolvimento Imobiliário') não bastam.
+
+    Args:
+        nome_a, nome_b (str): Nomes normalizados (ver normalizar_nome_empresa).
+        trigramas_a, trigramas_b (frozenset): Trigramas já calculados (opcional).
+        pesos (dict): Peso de cada palavra (ver calcular_pesos_palavras). Sem
+                      pesos, todas as palavras valem 1.
+    """
+    palavras_a, palavras_b = set(nome_a.split()), set(nome_b.split())
+    if palavras_a == palavras_b or nome_a.replace(' ', '') == nome_b.replace(' ', ''):
+        return 1.0
+    if not palavras_a or not palavras_b:
+        return 0.0
+
+    palavras_comuns = palavras_a & palavras_b
+    if not palavras_comuns & (palavras_distintivas(palavras_a, pesos) | palavras_distintivas(palavras_b, pesos)):
+        return 0.0
+
+    pesos = pesos or {}
+    peso_a = sum(pesos.get(palavra, 1.0) for palavra in palavras_a)
+    peso_b = sum(pesos.get(palavra, 1.0) for palavra in palavras_b)
+    peso_comum = sum(pesos.get(palavra, 1.0) for palavra in palavras_comuns)
+    cobertura = peso_comum / min(peso_a, peso_b) if peso_comum else 0.0
+    nota_palavras = (cobertura + peso_comum / (peso_a + peso_b - peso_comum)) / 2 if peso_comum else 0.0
+
+    trigramas_a = trigramas(nome_a) if trigramas_a is None else trigramas_a
+    trigramas_b = trigramas(nome_b) if trigramas_b is None else trigramas_b
+    jaccard = len(trigramas_a & trigramas_b) / len(trigramas_a | trigramas_b)
+    nota_caracteres = (jaccard + SequenceMatcher(None, nome_a, nome_b).ratio()) / 2
+
+    return (2 * nota_palavras + nota_caracteres) / 3
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido trigrama -> posições dos nomes, usado para bloquear os
+    candidatos: só são comparados os pares que compartilham trigramas raros,
+    em vez de todos contra todos (O(n²)).
+
+    Trigramas presentes em mais de `max_frequencia` dos nomes (ex: ' ba' de
+    'banco') não definem blocos, porque juntariam quase todos os nomes.
+
+    Args:
+        nomes (iterable): Nomes originais a indexar.
+        max_frequencia (float): Fração máxima de nomes em que um trigrama pode
+                                aparecer para ser usado no bloqueio.
+    """
+
+    def __init__(self, nomes, max_frequencia=0.02):
+        self.nomes = list(nomes)
+        self.normalizados = [normalizar_nome_empresa(nome) for nome in self.nomes]
+        self.trigramas = [trigramas(nome) for nome in self.normalizados]
+        self.exatos = defaultdict(list)
+        postagens = defaultdict(list)
+        for posicao, (normalizado, trigramas_nome) in enumerate(zip(self.normalizados, self.trigramas)):
+            self.exatos[normalizado].append(posicao)
+            for trigrama in trigramas_nome:
+                postagens[trigrama].append(posicao)
+        limite = max(2, int(max_frequencia * len(self.nomes)))
+        self.postagens = {trigrama: posicoes for trigrama, posicoes in postagens.items() if len(posicoes) <= limite}
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def candidatos(self, nome_normalizado, trigramas_nome=None, min_comuns=2):
+        """
+        Posições dos nomes indexados que compartilham ao menos `min_comuns`
+        trigramas raros com o nome (ou todos os raros que ele tiver, se forem menos).
+        """
+        trigramas_nome = trigramas(nome_normalizado) if trigramas_nome is None else trigramas_nome
+        raros = [trigrama for trigrama in trigramas_nome if trigrama in self.postagens]
+        contagem = Counter()
+        for trigrama in raros:
+            contagem.update(self.postagens[trigrama])
+        minimo = min(min_comuns, len(raros))
+        candidatos = {posicao for posicao, comuns in contagem.items() if comuns >= minimo}
+        return candidatos.union(self.exatos.get(nome_normalizado, ()))
+
+
+def corresponder_empresas(nomes_esquerda, nomes_direita, limiar=0.6, um_para_um=True, max_frequencia=0.02):
+    """
+    Encontra os pares de nomes que representam a mesma empresa em duas listas
+    (ex: rankings da Exame e da Valor Econômico).
+
+    A lista da direita é indexada por trigramas; cada nome da esquerda só é
+    pontuado (ver pontuar) contra os candidatos do seu bloco.
+
+    Args:
+        nomes_esquerda, nomes_direita (list ou Series): Nomes das empresas. Valores
+                                                        nulos ou vazios são ignorados.
+        limiar (float): Confiança mínima (0 a 1) para aceitar um par.
+        um_para_um (bool): Se True, cada nome aparece em no máximo um par; os pares
+                           de maior confiança têm prioridade.
+        max_frequencia (float): Ver IndiceTrigramas.
+
+    Returns:
+        DataFrame: Indice_Esquerda, Nome_Esquerda, Indice_Direita, Nome_Direita e
+                   Confianca, em ordem decrescente de confiança. Os índices são os
+                   das Series de entrada (ou as posições, para listas).
+    """
+    esquerda = pd.Series(nomes_esquerda).dropna().astype(str)
+    direita = pd.Series(nomes_direita).dropna().astype(str)
+    esquerda, direita = esquerda[esquerda.str.strip() != ''], direita[direita.str.strip() != '']
+
+    indice = IndiceTrigramas(direita, max_frequencia)
+    normalizados_esquerda = [normalizar_nome_empresa(nome) for nome in esquerda]
+    pesos = calcular_pesos_palavras(normalizados_esquerda + indice.normalizados)
+    pares = []
+    for (indice_esquerda, nome), normalizado in zip(esquerda.items(), normalizados_esquerda):
+        trigramas_nome = trigramas(normalizado)
+        for posicao in indice.candidatos(normalizado, trigramas_nome):
+            confianca = pontuar(normalizado, indice.normalizados[posicao], trigramas_nome,
+                                indice.trigramas[posicao], pesos)
+            if confianca >= limiar:
+                pares.append((indice_esquerda, nome, direita.index[posicao], indice.nomes[posicao], confianca))
+
+    correspondencias = pd.DataFrame(pares, columns=COLUNAS_CORRESPONDENCIAS)
+    correspondencias['Confianca'] = correspondencias['Confianca'].astype('float64').round(4)
+    correspondencias = correspondencias.sort_values(['Confianca', 'Indice_Esquerda', 'Indice_Direita'],
+                                                    ascending=[False, True, True], kind='stable')
+    if um_para_um:
+        usados_esquerda, usados_direita, manter = set(), set(), []
+        for esquerda_i, direita_i in zip(correspondencias['Indice_Esquerda'], correspondencias['Indice_Direita']):
+            livre = esquerda_i not in usados_esquerda and direita_i not in usados_direita
+            manter.append(livre)
+            if livre:
+                usados_esquerda.add(esquerda_i)
+                usados_direita.add(direita_i)
+        # Máscara booleana explícita: uma lista vazia selecionaria colunas, não linhas
+        correspondencias = correspondencias.loc[np.array(manter, dtype=bool)]
+    return correspondencias[COLUNAS_CORRESPONDENCIAS].reset_index(drop=True)
+
+
+def corresponder_rankings(arquivo_esquerda, arquivo_direita, arquivo_saida, aba_esquerda=0, aba_direita=0,
+                          coluna_esquerda='EMPRESA', coluna_direita='Empresa', limiar=0.6, formato='csv'):
+    """
+    Cruza as empresas de duas planilhas de ranking (.xlsx) e salva os pares
+    encontrados, com a confiança de cada um.
+
+    Args:
+        arquivo_esquerda, arquivo_direita (str): Planilhas Excel dos rankings.
+        arquivo_saida (str): Arquivo com os pares encontrados.
+        aba_esquerda, aba_direita (str ou int): Aba de cada planilha.
+        coluna_esquerda, coluna_direita (str): Coluna com o nome da empresa.
+        limiar (float): Confiança mínima para aceitar um par.
+        formato (str): 'csv' ou 'parquet'.
+    """
+    try:
+        df_esquerda = pd.read_excel(arquivo_esquerda, sheet_name=aba_esquerda)
+        df_direita = pd.read_excel(arquivo_direita, sheet_name=aba_direita)
+        print(f"Planilhas lidas: '{arquivo_esquerda}' ({len(df_esquerda)} linhas) e "
+              f"'{arquivo_direita}' ({len(df_direita)} linhas).")
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo não encontrado: {e}")
+        return
+    except Exception as e:
+        print(f"Erro ao ler as planilhas: {e}")
+        return
+
+    for coluna, df, nome in ((coluna_esquerda, df_esquerda, arquivo_esquerda),
+                             (coluna_direita, df_direita, arquivo_direita)):
+        if coluna not in df.columns:
+            print(f"Erro: Coluna '{coluna}' não encontrada em '{nome}'.")
+            print(f"Colunas encontradas: {list(df.columns)}")
+            return
+
+    correspondencias = corresponder_empresas(df_esquerda[coluna_esquerda], df_direita[coluna_direita], limiar)
+    exatas = int((correspondencias['Confianca'] == 1).sum())
+    print(f"{len(correspondencias)} empresas em comum ({exatas} com o mesmo nome normalizado).")
+    print(f"Sem correspondência: {df_esquerda[coluna_esquerda].notna().sum() - len(correspondencias)} "
+          f"na primeira planilha e {df_direita[coluna_direita].notna().sum() - len(correspondencias)} na segunda.")
+
+    try:
+        arquivo_saida = salvar_tabela(correspondencias, arquivo_saida, formato)
+        print(f"Correspondências salvas em '{arquivo_saida}'.")
+    except Exception as e:
+        print(f"Erro ao salvar as correspondências: {e}")
+        return
+    return correspondencias
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    pasta_planilhas = 'Planilhas Google Sheets'
+    arquivo_exame = f'{pasta_planilhas}/ranking_revista_exame_maiores_empresas_do_brasil.xlsx'
+    arquivo_valor = f'{pasta_planilhas}/ranking_valor_economico_1000_maiores_empresas_2024.xlsx'
+    aba_exame = 'as_maiores_empresas_do_brasil_r'
+    aba_valor = 'ranking_1000_maiores_empresas_2'
+    arquivo_saida = 'correspondencias_exame_valor.csv'
+    limiar = 0.6  # Confiança mínima; abaixo de ~0.8 vale conferir os pares manualmente
+
+    corresponder_rankings(arquivo_exame, arquivo_valor, arquivo_saida, aba_exame, aba_valor,
+                          coluna_esquerda='EMPRESA', coluna_direita='Empresa', limiar=limiar)
@@ -1,15 +1,132 @@
 import pandas as pd
 import os
-import numpy as np # Para lidar com NaN de forma mais explícita
+from formatos_tabela import EscritorIncremental, ler_tabela, salvar_tabela
+from instrumentacao import blocos_medidos, instrumentar
+from normalizar_tecnologias import normalizar_serie
 
-def processar_csv_split(nome_arquivo, pasta_destino):
+def nome_arquivo_da_coluna(coluna, indice_coluna):
+    """
+    Gera o nome (sem extensão) do arquivo da tabela N:N de uma coluna,
+    em snake_case seguro para sistemas de arquivos.
+    """
+    nome_base = coluna.lower().replace(' ', '_')
+    # Remover caracteres que podem ser problemáticos em nomes de arquivo
+    nome_arquivo_saida = "".join(c for c in nome_base if c.isalnum() or c == '_')
+    # Evitar nomes vazios se a coluna só tiver caracteres inválidos
+    if not nome_arquivo_saida:
+         nome_arquivo_saida = f"coluna_{indice_coluna}" # Usa índice como fallback
+    return nome_arquivo_saida
+
+def identificar_colunas_multiplas(df):
+    """Retorna as colunas (exceto 'ID') em que alguma célula contém ';'."""
+    return [
+        coluna for coluna in df.columns
+        if coluna != 'ID' and df[coluna].notna().any()
+        and df[coluna].astype(str).str.contains(';', na=False).any()
+    ]
+
+def explodir_colunas(df, colunas):
+    """
+    Núcleo vetorizado melt-split-explode: transforma as colunas multivaloradas
+    de `df` (que já deve ter 'ID' inteiro) em linhas (ID, Nome_Ferramenta_Tecnologia,
+    Categoria_Tecnologia), uma por tecnologia, com os nomes já normalizados
+    (normalizar_tecnologias.py) e sem valores vazios.
+    """
+    longo = df[['ID'] + list(colunas)].melt(
+        id_vars='ID', var_name='Categoria_Tecnologia', value_name='Nome_Ferramenta_Tecnologia'
+    ).dropna(subset=['Nome_Ferramenta_Tecnologia'])
+    longo['Nome_Ferramenta_Tecnologia'] = longo['Nome_Ferramenta_Tecnologia'].astype(str).str.split(';')
+    longo = longo.explode('Nome_Ferramenta_Tecnologia')
+    longo['Nome_Ferramenta_Tecnologia'] = normalizar_serie(longo['Nome_Ferramenta_Tecnologia'])
+    longo = longo[longo['Nome_Ferramenta_Tecnologia'].notna() & (longo['Nome_Ferramenta_Tecnologia'] != '')]
+    return longo[['ID', 'Nome_Ferramenta_Tecnologia', 'Categoria_Tecnologia']]
+
+def converter_para_tabela_longa(df, colunas_multiplas=None):
+    """
+    Converte a planilha larga do Wappalyzer direto na tabela longa
+    (ID, Nome_Ferramenta_Tecnologia, Categoria_Tecnologia), em memória e sem
+    passar pelos arquivos por categoria.
+
+    Args:
+      df: DataFrame da planilha larga (com coluna 'ID').
+      colunas_multiplas: Colunas a dividir. Se None, usa as que contêm ';'.
+
+    Returns:
+      DataFrame longo, ordenado pela ordem das colunas na planilha e depois por ID.
+    """
+    if colunas_multiplas is None:
+        colunas_multiplas = identificar_colunas_multiplas(df)
+
+    # IDs nulos ou não numéricos não entram nas tabelas N:N
+    df = df[['ID'] + list(colunas_multiplas)].copy()
+    df['ID'] = pd.to_numeric(df['ID'], errors='coerce')
+    df = df.dropna(subset=['ID'])
+    df['ID'] = df['ID'].astype(int)
+
+    longo = explodir_colunas(df, colunas_multiplas)
+    ordem_categorias = pd.Categorical(longo['Categoria_Tecnologia'], categories=list(colunas_multiplas), ordered=True)
+    longo = longo.assign(_ordem=ordem_categorias.codes)
+    longo = longo.sort_values(by=['_ordem', 'ID'], kind='stable').drop(columns='_ordem')
+    return longo.reset_index(drop=True)
+
+def salvar_tabelas_por_categoria(df_longo, pasta_destino, colunas_originais, formato='csv'):
+    """
+    Projeta a tabela longa nos arquivos N:N por categoria ('ID', <categoria>),
+    com os mesmos nomes de arquivo gerados por processar_csv_split.
+
+    Args:
+      df_longo: Tabela longa gerada por converter_para_tabela_longa.
+      pasta_destino: Pasta onde os arquivos serão salvos.
+      colunas_originais: Colunas da planilha larga (usadas para nomear arquivos).
+      formato: 'csv' ou 'parquet'.
+    """
+    categorias_com_dados = set(df_longo['Categoria_Tecnologia'].unique())
+    for coluna in colunas_originais:
+        if coluna == 'ID' or coluna not in categorias_com_dados:
+            continue
+        novo_df = df_longo.loc[df_longo['Categoria_Tecnologia'] == coluna, ['ID', 'Nome_Ferramenta_Tecnologia']]
+        novo_df = novo_df.rename(columns={'Nome_Ferramenta_Tecnologia': coluna})
+
+        nome_arquivo_saida = nome_arquivo_da_coluna(coluna, colunas_originais.index(coluna))
+        caminho_saida = os.path.join(pasta_destino, f"{nome_arquivo_saida}.csv")
+        try:
+            caminho_saida = salvar_tabela(novo_df, caminho_saida, formato)
+            print(f"    -> Tabela N:N salva em: '{caminho_saida}' ({len(novo_df)} linhas).")
+        except Exception as e:
+            print(f"    -> Erro ao salvar o arquivo '{caminho_saida}': {e}")
+
+def salvar_tabela_principal(df, colunas_sem_multiplos_dados, pasta_destino, formato='csv'):
+    """Salva 'tabela_principal.csv' com as colunas que não têm múltiplos valores."""
+    if colunas_sem_multiplos_dados:
+        df_sem_multiplos_dados = df[colunas_sem_multiplos_dados].copy()
+        # Remover linhas onde o ID é nulo na tabela principal também
+        df_sem_multiplos_dados = df_sem_multiplos_dados.dropna(subset=['ID'])
+        # Opcional: Converter ID para int na tabela principal
+        try:
+             df_sem_multiplos_dados['ID'] = df_sem_multiplos_dados['ID'].astype(int)
+        except ValueError:
+             print("Aviso: IDs não inteiros encontrados na tabela principal. Mantendo como float/object.")
+
+
+        caminho_principal = os.path.join(pasta_destino, 'tabela_principal.csv')
+        try:
+            caminho_principal = salvar_tabela(df_sem_multiplos_dados, caminho_principal, formato)
+            print(f"\nTabela principal salva em: {caminho_principal} ({len(df_sem_multiplos_dados)} linhas).")
+        except Exception as e:
+            print(f"Erro ao salvar a tabela principal: {e}")
+    else:
+        print("\nNenhuma coluna identificada para a tabela principal (exceto talvez ID se existir).")
+
+@instrumentar
+def processar_csv_split(nome_arquivo, pasta_destino, formato='csv'):
     """
     Processa um arquivo CSV, separando colunas com múltiplos dados (delimitados por ';')
     em arquivos CSV individuais (tabelas de relacionamento n:n com ID).
 
     Args:
-      nome_arquivo: O nome do arquivo CSV de entrada.
+      nome_arquivo: O nome do arquivo CSV (ou Parquet) de entrada.
       pasta_destino: A pasta onde os novos arquivos CSV serão salvos.
+      formato: Formato dos arquivos gerados ('csv' ou 'parquet').
     """
 
     # --- 0. Garantir que a pasta de destino existe ---
@@ -24,7 +141,7 @@ def processar_csv_split(nome_arquivo, pasta_destino):
     # --- 1. Ler o arquivo CSV ---
     try:
         # É mais seguro ler como está e converter ID depois, caso haja valores não numéricos.
-        df = pd.read_csv(nome_arquivo)
+        df = ler_tabela(nome_arquivo)
         print(f"Arquivo '{nome_arquivo}' lido com sucesso ({len(df)} linhas).")
     except FileNotFoundError:
         print(f"Erro: Arquivo não encontrado em '{nome_arquivo}'")
@@ -65,122 +182,152 @@ def processar_csv_split(nome_arquivo, pasta_destino):
             # print(f"  - '{coluna}': Não contém múltiplos valores.") # Opcional: Descomentar para verbosidade
 
     # --- 3. Criar e salvar a tabela principal (se houver colunas para ela) ---
-    if colunas_sem_multiplos_dados:
-        df_sem_multiplos_dados = df[colunas_sem_multiplos_dados].copy()
-        # Remover linhas onde o ID é nulo na tabela principal também
-        df_sem_multiplos_dados = df_sem_multiplos_dados.dropna(subset=['ID'])
-        # Opcional: Converter ID para int na tabela principal
-        try:
-             df_sem_multiplos_dados['ID'] = df_sem_multiplos_dados['ID'].astype(int)
-        except ValueError:
-             print("Aviso: IDs não inteiros encontrados na tabela principal. Mantendo como float/object.")
-
-
-        caminho_principal = os.path.join(pasta_destino, 'tabela_principal.csv')
-        try:
-            df_sem_multiplos_dados.to_csv(caminho_principal, index=False, encoding='utf-8')
-            print(f"\nTabela principal salva em: {caminho_principal} ({len(df_sem_multiplos_dados)} linhas).")
-        except Exception as e:
-            print(f"Erro ao salvar a tabela principal: {e}")
-    else:
-        print("\nNenhuma coluna identificada para a tabela principal (exceto talvez ID se existir).")
+    salvar_tabela_principal(df, colunas_sem_multiplos_dados, pasta_destino, formato)
 
 
-    # --- 4. Iterar e criar tabelas N:N ---
+    # --- 4. Criar as tabelas N:N como projeções da tabela longa ---
     print("\nProcessando colunas com múltiplos valores para criar tabelas N:N:")
     if not colunas_com_multiplos_dados:
         print("Nenhuma coluna com ';' encontrada para dividir.")
+    else:
+        df_longo = converter_para_tabela_longa(df, colunas_com_multiplos_dados)
+        salvar_tabelas_por_categoria(df_longo, pasta_destino, list(df.columns), formato)
 
-    for coluna in colunas_com_multiplos_dados:
-        print(f"  - Processando coluna: '{coluna}'...")
+    print("\nProcessamento concluído.")
 
-        # Criar um novo DataFrame apenas com 'ID' e a coluna atual
-        # Remover linhas onde a coluna de DADOS é nula ANTES de processar
-        # Manter linhas com ID nulo por enquanto, serão tratadas depois
-        novo_df = df[['ID', coluna]].dropna(subset=[coluna]).copy()
 
-        # Verificar se restou algum dado após dropar NaNs da coluna de dados
-        if novo_df.empty:
-            print(f"    * Coluna '{coluna}' vazia ou contém apenas NaNs. Pulando.")
-            continue
+@instrumentar
+def processar_csv_split_streaming(nome_arquivo, pasta_destino, tamanho_chunk=100_000, formato='csv'):
+    """
+    Versão em streaming de processar_csv_split, para arquivos grandes demais para
+    a memória. Gera os mesmos arquivos (tabela principal + tabelas N:N), mas lê o
+    CSV em blocos de `tamanho_chunk` linhas:
 
-        # ** LINHA PROBLEMÁTICA REMOVIDA **
-        # A lógica de drop_duplicates aqui estava incorreta e causava perda de dados.
+      1. Uma primeira leitura identifica as colunas que contêm ';'.
+      2. Uma segunda leitura divide todas essas colunas de uma vez por bloco
+         (explodir_colunas) e anexa as linhas aos arquivos de cada
+         categoria, que ficam abertos durante todo o processamento.
 
-        # Garantir que IDs nulos sejam tratados antes da conversão para int
-        novo_df = novo_df.dropna(subset=['ID'])
-        if novo_df.empty:
-            print(f"    * Coluna '{coluna}' não possui IDs válidos após remover NaNs de ID. Pulando.")
-            continue
+    A memória usada depende só do tamanho do bloco. As linhas de cada tabela N:N
+    são ordenadas por ID dentro de cada bloco; a saída fica ordenada por completo
+    quando a entrada já está em ordem de ID (caso da planilha do Wappalyzer).
 
-        # Tentar converter ID para Int ANTES do explode
+    Args:
+      nome_arquivo: O nome do arquivo CSV de entrada.
+      pasta_destino: A pasta onde os novos arquivos CSV serão salvos.
+      tamanho_chunk: Quantidade de linhas lidas por bloco.
+      formato: Formato dos arquivos gerados ('csv' ou 'parquet'; no Parquet cada
+               bloco vira um row group).
+    """
+    if not os.path.exists(pasta_destino):
         try:
-             novo_df['ID'] = novo_df['ID'].astype(int)
-        except ValueError:
-             print(f"    * Aviso: IDs não inteiros encontrados ao processar '{coluna}'. Tentando converter para numérico e removendo falhas.")
-             novo_df['ID'] = pd.to_numeric(novo_df['ID'], errors='coerce') # Erros viram NaN
-             novo_df = novo_df.dropna(subset=['ID']) # Remove IDs que falharam na conversão
-             if novo_df.empty:
-                  print(f"    * Pulando coluna '{coluna}' pois não restaram IDs numéricos válidos.")
-                  continue
-             novo_df['ID'] = novo_df['ID'].astype(int) # Tenta de novo após coerção e dropna
-        except Exception as e:
-             print(f"    * Erro inesperado ao converter ID para int na coluna '{coluna}': {e}. Pulando coluna.")
-             continue
-
-
-        # Expandir os dados da coluna (split e explode)
-        # .astype(str) antes de .str.split é importante se a coluna tiver números/outros tipos
-        novo_df[coluna] = novo_df[coluna].astype(str).str.split(';')
-        novo_df = novo_df.explode(coluna)
-
-        # Limpar espaços em branco dos dados explodidos
-        # Verificar se a coluna ainda é string/object antes de usar .str
-        if pd.api.types.is_string_dtype(novo_df[coluna]):
-            novo_df[coluna] = novo_df[coluna].str.strip()
-        # else: # Se virou outro tipo após explode (improvável com split de string), não aplicar strip
-        #    pass
-
-        # Descartar dados que se tornaram vazios ('') ou nulos (None/NaN) APÓS split/strip
-        novo_df[coluna] = novo_df[coluna].replace('', np.nan) # Substitui '' por NaN
-        novo_df = novo_df.dropna(subset=[coluna])       # Remove linhas com NaN na coluna de dados
-
-        # Verificar se ainda há dados válidos após a limpeza
-        if novo_df.empty:
-             print(f"    * Coluna '{coluna}' não gerou dados válidos após split e limpeza. Pulando.")
-             continue
-
-        # Garantir que ID ainda é inteiro (pode não ser necessário, mas seguro)
-        novo_df['ID'] = novo_df['ID'].astype(int)
-
-        # Criar nome do arquivo em snake_case seguro para sistemas de arquivos
-        nome_base = coluna.lower().replace(' ', '_')
-        # Remover caracteres que podem ser problemáticos em nomes de arquivo
-        nome_arquivo_saida = "".join(c for c in nome_base if c.isalnum() or c == '_')
-        # Evitar nomes vazios se a coluna só tiver caracteres inválidos
-        if not nome_arquivo_saida:
-             nome_arquivo_saida = f"coluna_{df.columns.get_loc(coluna)}" # Usa índice como fallback
+            os.makedirs(pasta_destino)
+            print(f"Pasta de destino criada: {pasta_destino}")
+        except OSError as e:
+            print(f"Erro ao criar pasta de destino '{pasta_destino}': {e}")
+            return
 
-        caminho_saida = os.path.join(pasta_destino, f"{nome_arquivo_saida}.csv")
+    # --- 1. Primeira leitura: descobrir as colunas com múltiplos valores ---
+    try:
+        colunas = list(pd.read_csv(nome_arquivo, nrows=0).columns)
+        colunas_com_multiplos_dados = set()
+        for chunk in pd.read_csv(nome_arquivo, dtype=str, chunksize=tamanho_chunk):
+            for coluna in colunas:
+                if coluna != 'ID' and coluna not in colunas_com_multiplos_dados:
+                    if chunk[coluna].str.contains(';', na=False, regex=False).any():
+                        colunas_com_multiplos_dados.add(coluna)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado em '{nome_arquivo}'")
+        return
+    except Exception as e:
+        print(f"Erro ao ler o arquivo CSV '{nome_arquivo}': {e}")
+        return
 
-        # Salvar o novo DataFrame
-        try:
-            # Ordenar pelo ID pode ser útil para visualização
-            novo_df = novo_df.sort_values(by='ID')
-            novo_df.to_csv(caminho_saida, index=False, encoding='utf-8')
-            print(f"    -> Tabela N:N salva em: '{caminho_saida}' ({len(novo_df)} linhas).")
-        except Exception as e:
-            print(f"    -> Erro ao salvar o arquivo '{caminho_saida}': {e}")
+    if 'ID' not in colunas:
+        print("Erro Crítico: Coluna 'ID' não encontrada no arquivo CSV.")
+        return
+
+    # Mantém a ordem original das colunas
+    colunas_multiplas = [c for c in colunas if c in colunas_com_multiplos_dados]
+    colunas_principais = [c for c in colunas if c not in colunas_com_multiplos_dados]
+    print("\nColunas com múltiplos valores (serão divididas):")
+    for coluna in colunas_multiplas:
+        print(f"  - '{coluna}'")
+
+    # --- 2. Segunda leitura: dividir e anexar bloco a bloco ---
+    escritores = {}
+    linhas_por_coluna = {}
+    linhas_principal = 0
+
+    def escritor_da_coluna(coluna):
+        # Abre o arquivo da categoria na primeira vez que ela recebe dados
+        if coluna not in escritores:
+            nome_saida = nome_arquivo_da_coluna(coluna, colunas.index(coluna))
+            escritores[coluna] = EscritorIncremental(
+                os.path.join(pasta_destino, f"{nome_saida}.csv"), ['ID', coluna], formato
+            )
+            linhas_por_coluna[coluna] = 0
+        return escritores[coluna]
+
+    escritor_principal = None
+    try:
+        escritor_principal = EscritorIncremental(
+            os.path.join(pasta_destino, 'tabela_principal.csv'), colunas_principais, formato
+        )
+        caminho_principal = escritor_principal.caminho
+
+        blocos = pd.read_csv(nome_arquivo, dtype=str, chunksize=tamanho_chunk)
+        for numero, chunk in enumerate(blocos_medidos(blocos, nome_arquivo), start=1):
+            # IDs não numéricos ou nulos são descartados, como no modo normal
+            chunk['ID'] = pd.to_numeric(chunk['ID'], errors='coerce')
+            chunk = chunk.dropna(subset=['ID'])
+            chunk['ID'] = chunk['ID'].astype(int)
+
+            escritor_principal.escrever(chunk)
+            linhas_principal += len(chunk)
+
+            if colunas_multiplas:
+                longo = explodir_colunas(chunk, colunas_multiplas)
+
+                for coluna, grupo in longo.groupby('Categoria_Tecnologia', sort=False):
+                    grupo = grupo.sort_values(by='ID', kind='stable')
+                    grupo = grupo.rename(columns={'Nome_Ferramenta_Tecnologia': coluna})
+                    escritor_da_coluna(coluna).escrever(grupo)
+                    linhas_por_coluna[coluna] += len(grupo)
+
+            print(f"  Bloco {numero} processado ({len(chunk)} linhas).")
+    except Exception as e:
+        print(f"Erro durante o processamento em streaming: {e}")
+        return
+    finally:
+        if escritor_principal is not None:
+            escritor_principal.fechar()
+        for escritor in escritores.values():
+            escritor.fechar()
+
+    print(f"\nTabela principal salva em: {caminho_principal} ({linhas_principal} linhas).")
+    for coluna in colunas_multiplas:
+        if coluna in linhas_por_coluna:
+            print(f"    -> Tabela N:N de '{coluna}' salva ({linhas_por_coluna[coluna]} linhas).")
+        else:
+            print(f"    * Coluna '{coluna}' não gerou dados válidos após split e limpeza.")
 
     print("\nProcessamento concluído.")
 
 
 # --- Exemplo de Uso ---
-# Certifique-se de que o nome do arquivo de entrada está correto
-# nome_arquivo_entrada = 'planilha_TESTE.csv'
-nome_arquivo_entrada = 'planilha_sem_duplicatas.csv' # Usando o nome do seu exemplo original
+if __name__ == "__main__":
+    # Certifique-se de que o nome do arquivo de entrada está correto
+    # nome_arquivo_entrada = 'planilha_TESTE.csv'
+    nome_arquivo_entrada = 'planilha_sem_duplicatas.csv' # Usando o nome do seu exemplo original
+
+    # Defina onde os arquivos gerados serão salvos
+    pasta_destino_saida = 'tabelas_divididas_corrigido' # Sugestão de novo nome para a pasta
 
-# Defina onde os arquivos gerados serão salvos
-pasta_destino_saida = 'tabelas_divididas_corrigido' # Sugestão de novo nome para a pasta
+    # Para planilhas muito grandes (milhões de sites), use o modo streaming
+    modo_streaming = False
 
-processar_csv_split(nome_arquivo_entrada, pasta_destino_saida)
\ No newline at end of file
+    if modo_streaming:
+        processar_csv_split_streaming(nome_arquivo_entrada, pasta_destino_saida)
+    else:
+        processar_csv_split(nome_arquivo_entrada, pasta_destino_saida)
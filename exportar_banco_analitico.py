@@ -0,0 +1,283 @@
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from carregador_csv import converter_para_booleano
+from formatos_tabela import ler_tabela, salvar_tabela
+from instrumentacao import escrita, instrumentar
+
+ARQUIVO_BANCO = 'banco_analitico.sqlite'
+ARQUIVO_PRINCIPAL = 'tabela_principal_padronizada_exame.csv'
+ARQUIVO_UNIFICADO = 'novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv'
+
+COLUNA_ID = 'ID'
+COLUNA_EMPRESA = 'EMPRESA'
+COLUNA_SETOR = 'Setor primário'
+COLUNA_TECNOLOGIA = 'Nome_Ferramenta_Tecnologia'
+COLUNA_CATEGORIA = 'Categoria_Tecnologia'
+COLUNAS_BOOLEANAS = {'SSL/TLS enabled': 'ssl_tls', 'Responsive': 'responsivo'}
+
+# Esquema estrela: fato_uso (empresa usa tecnologia) ligado às dimensões de empresa e de tecnologia.
+# Os índices são criados depois da carga, que assim não precisa mantê-los linha a linha.
+ESQUEMA = """
+CREATE TABLE dim_empresa (
+    id_empresa INTEGER PRIMARY KEY,
+    empresa TEXT,
+    setor TEXT,
+    ssl_tls INTEGER,
+    responsivo INTEGER
+);
+CREATE TABLE dim_tecnologia (
+    id_tecnologia INTEGER PRIMARY KEY,
+    tecnologia TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    UNIQUE (tecnologia, categoria)
+);
+CREATE TABLE fato_uso (
+    id_empresa INTEGER NOT NULL REFERENCES dim_empresa (id_empresa),
+    id_tecnologia INTEGER NOT NULL REFERENCES dim_tecnologia (id_tecnologia),
+    PRIMARY KEY (id_empresa, id_tecnologia)
+) WITHOUT ROWID;
+CREATE TABLE exportacao (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE VIEW vw_uso AS
+    SELECT f.id_empresa, e.empresa, e.setor, e.ssl_tls, e.responsivo, t.id_tecnologia, t.tecnologia, t.categoria
+    FROM fato_uso f
+    JOIN dim_tecnologia t ON t.id_tecnologia = f.id_tecnologia
+    LEFT JOIN dim_empresa e ON e.id_empresa = f.id_empresa;
+"""
+INDICES = """
+CREATE INDEX idx_fato_tecnologia ON fato_uso (id_tecnologia, id_empresa);
+CREATE INDEX idx_empresa_setor ON dim_empresa (setor, id_empresa);
+CREATE INDEX idx_tecnologia_categoria ON dim_tecnologia (categoria, id_tecnologia);
+"""
+
+# Tecnologias de uma categoria mais usadas, no total ou por setor, com o percentual
+# das empresas do setor (as do setor com ao menos uma tecnologia ou não)
+SQL_TOP_TECNOLOGIAS = """
+WITH empresas_por_setor AS (
+    SELECT setor, COUNT(*) AS total FROM dim_empresa GROUP BY setor
+), contagens AS (
+    SELECT {setor} AS setor, t.tecnologia, COUNT(*) AS empresas
+    FROM dim_tecnologia t
+    JOIN fato_uso f ON f.id_tecnologia = t.id_tecnologia
+    JOIN dim_empresa e ON e.id_empresa = f.id_empresa
+    WHERE t.categoria = :categoria {filtro_setor}
+    GROUP BY 1, 2
+), ordenadas AS (
+    SELECT c.*, ROW_NUMBER() OVER (PARTITION BY c.setor ORDER BY c.empresas DESC, c.tecnologia) AS posicao
+    FROM contagens c
+)
+SELECT o.setor AS Setor, o.posicao AS Posicao, o.tecnologia AS Tecnologia, o.empresas AS Empresas,
+       ROUND(100.0 * o.empresas / {total}, 2) AS Percentual_Empresas
+FROM ordenadas o
+WHERE o.posicao <= :limite
+ORDER BY o.setor, o.posicao
+"""
+
+
+def _conectar_leitura(arquivo_banco):
+    if not os.path.exists(arquivo_banco):
+        raise FileNotFoundError(arquivo_banco)
+    # Somente leitura: consultas ad hoc não alteram o banco exportado
+    return sqlite3.connect(f"file:{arquivo_banco}?mode=ro", uri=True)
+
+
+def _inteiros_anulaveis(serie):
+    return [None if pd.isna(valor) else int(valor) for valor in serie]
+
+
+@instrumentar
+def exportar_banco_analitico(arquivo_principal, arquivo_unificado, arquivo_banco=ARQUIVO_BANCO):
+    """
+    Exporta a tabela principal (setores padronizados) e a tabela longa de
+    tecnologias para um banco SQLite em esquema estrela, pronto para o Power BI
+    (via ODBC) ou para consultas SQL:
+
+      - dim_empresa: ID, empresa, setor, SSL/TLS e responsivo (0/1/NULL);
+      - dim_tecnologia: um código por (tecnologia, categoria);
+      - fato_uso: pares (empresa, tecnologia), chave primária composta;
+      - vw_uso: visão desnormalizada com as três tabelas juntas.
+
+    O banco é montado num arquivo temporário e só substitui o anterior quando
+    está completo, com índices e estatísticas (ANALYZE) do otimizador.
+
+    Args:
+        arquivo_principal (str): tabela_principal_padronizada_exame (CSV ou Parquet).
+        arquivo_unificado (str): Tecnologias_Unificadas (CSV ou Parquet).
+        arquivo_banco (str): Arquivo SQLite a ser gerado.
+    """
+    try:
+        df_principal = ler_tabela(arquivo_principal)
+        df_longo = ler_tabela(arquivo_unificado, colunas=[COLUNA_ID, COLUNA_TECNOLOGIA, COLUNA_CATEGORIA])
+        print(f"Arquivos lidos: '{arquivo_principal}' ({len(df_principal)} linhas) e "
+              f"'{arquivo_unificado}' ({len(df_longo)} linhas).")
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo não encontrado: {e}")
+        return
+    except Exception as e:
+        print(f"Erro ao ler os arquivos de entrada: {e}")
+        return
+
+    for coluna in (COLUNA_ID, COLUNA_EMPRESA, COLUNA_SETOR):
+        if coluna not in df_principal.columns:
+            print(f"Erro: Coluna '{coluna}' não encontrada em '{arquivo_principal}'.")
+            return
+
+    # --- Dimensões e fato ---
+    empresas = df_principal.drop_duplicates(COLUNA_ID)
+    dim_empresa = pd.DataFrame({
+        'id_empresa': empresas[COLUNA_ID].astype('int64'),
+        'empresa': empresas[COLUNA_EMPRESA].astype(object).where(empresas[COLUNA_EMPRESA].notna(), None),
+        'setor': empresas[COLUNA_SETOR].astype(object).where(empresas[COLUNA_SETOR].notna(), None),
+    })
+    for coluna, nome in COLUNAS_BOOLEANAS.items():
+        valores = converter_para_booleano(empresas[coluna]) if coluna in empresas.columns else pd.Series(
+            pd.NA, index=empresas.index, dtype='boolean')
+        dim_empresa[nome] = _inteiros_anulaveis(valores.astype('Int8'))
+
+    pares = df_longo.dropna().drop_duplicates([COLUNA_ID, COLUNA_TECNOLOGIA, COLUNA_CATEGORIA])
+    codigos, tecnologias = pd.factorize(pd.MultiIndex.from_frame(pares[[COLUNA_TECNOLOGIA, COLUNA_CATEGORIA]]),
+                                        sort=True)
+    dim_tecnologia = tecnologias.to_frame(index=False, name=['tecnologia', 'categoria'])
+    fato = pd.DataFrame({'id_empresa': pares[COLUNA_ID].astype('int64').to_numpy(), 'id_tecnologia': codigos})
+
+    sem_empresa = ~fato['id_empresa'].isin(dim_empresa['id_empresa'])
+    if sem_empresa.any():
+        print(f"Aviso: {sem_empresa.sum()} usos de tecnologia com ID ausente da tabela principal "
+              f"(mantidos no fato; aparecem com empresa e setor nulos em vw_uso).")
+
+    # --- Carga ---
+    temporario = arquivo_banco + '.tmp'
+    if os.path.exists(temporario):
+        os.remove(temporario)
+    pasta = os.path.dirname(arquivo_banco)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    try:
+        # Medida como uma escrita do arquivo final (os bytes são os do banco após o os.replace)
+        with escrita(arquivo_banco) as operacao:
+            conexao = sqlite3.connect(temporario)
+            try:
+                # Arquivo novo e descartável até o os.replace: sem journal nem fsync durante a carga
+                conexao.execute("PRAGMA journal_mode=OFF")
+                conexao.execute("PRAGMA synchronous=OFF")
+                conexao.executescript(ESQUEMA)
+                with conexao:
+                    conexao.executemany("INSERT INTO dim_empresa VALUES (?, ?, ?, ?, ?)",
+                                        dim_empresa.itertuples(index=False, name=None))
+                    conexao.executemany("INSERT INTO dim_tecnologia VALUES (?, ?, ?)",
+                                        ((int(codigo), linha.tecnologia, linha.categoria)
+                                         for codigo, linha in enumerate(dim_tecnologia.itertuples(index=False))))
+                    conexao.executemany("INSERT INTO fato_uso VALUES (?, ?)",
+                                        fato.astype(object).itertuples(index=False, name=None))
+                    conexao.executemany("INSERT INTO exportacao VALUES (?, ?)", [
+                        ('gerado_em', datetime.now().isoformat(timespec='seconds')),
+                        ('arquivo_principal', arquivo_principal),
+                        ('arquivo_unificado', arquivo_unificado),
+                    ])
+                conexao.executescript(INDICES)
+                conexao.execute("ANALYZE")
+                conexao.commit()
+            finally:
+                conexao.close()
+            os.replace(temporario, arquivo_banco)
+            operacao.linhas = len(fato)
+    except sqlite3.Error as e:
+        print(f"Erro ao gravar o banco '{arquivo_banco}': {e}")
+        return
+
+    print(f"Banco analítico salvo em '{arquivo_banco}': {len(dim_empresa)} empresas, "
+          f"{len(dim_tecnologia)} tecnologias e {len(fato)} usos.")
+    return arquivo_banco
+
+
+def consultar(arquivo_banco, sql, parametros=()):
+    """Executa uma consulta SQL (somente leitura) e devolve o resultado como DataFrame."""
+    conexao = _conectar_leitura(arquivo_banco)
+    try:
+        return pd.read_sql_query(sql, conexao, params=parametros)
+    finally:
+        conexao.close()
+
+
+def top_tecnologias(arquivo_banco, categoria, por_setor=True, limite=20, setor=None):
+    """
+    Tecnologias mais usadas de uma categoria (ex: 'CMS'), por setor ou no total.
+
+    Args:
+        arquivo_banco (str): Banco gerado por exportar_banco_analitico.
+        categoria (str): Categoria_Tecnologia a consultar.
+        por_setor (bool): Se True, um ranking por setor; senão, um ranking geral.
+        limite (int): Posições de cada ranking.
+        setor (str): Se informado, só esse setor.
+
+    Returns:
+        DataFrame: Setor, Posicao, Tecnologia, Empresas e Percentual_Empresas
+                   (sobre as empresas do setor, ou todas no ranking geral).
+    """
+    sql = SQL_TOP_TECNOLOGIAS.format(
+        setor='e.setor' if por_setor else "'(todos)'",
+        filtro_setor='AND e.setor = :setor' if setor is not None else '',
+        total=('(SELECT total FROM empresas_por_setor s WHERE s.setor IS o.setor)' if por_setor
+               else '(SELECT COUNT(*) FROM dim_empresa)'),
+    )
+    return consultar(arquivo_banco, sql, {'categoria': categoria, 'limite': limite, 'setor': setor})
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # python exportar_banco_analitico.py exportar
+    # python exportar_banco_analitico.py top CMS --limite 20
+    # python exportar_banco_analitico.py top "JavaScript frameworks" --geral
+    # python exportar_banco_analitico.py consultar "SELECT setor, COUNT(*) FROM dim_empresa GROUP BY setor"
+    parser = argparse.ArgumentParser(description="Banco SQLite analítico (esquema estrela) das tecnologias por empresa.")
+    parser.add_argument('--banco', default=ARQUIVO_BANCO, help="Arquivo SQLite.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    exportar = comandos.add_parser('exportar', help="Gera o banco a partir das tabelas do pipeline.")
+    exportar.add_argument('--principal', default=ARQUIVO_PRINCIPAL)
+    exportar.add_argument('--unificado', default=ARQUIVO_UNIFICADO)
+    consulta = comandos.add_parser('consultar', help="Executa uma consulta SQL.")
+    consulta.add_argument('sql')
+    consulta.add_argument('--saida', default=None, help="CSV onde salvar o resultado.")
+    top = comandos.add_parser('top', help="Tecnologias mais usadas de uma categoria, por setor.")
+    top.add_argument('categoria')
+    top.add_argument('--limite', type=int, default=20)
+    top.add_argument('--setor', default=None, help="Só esse setor.")
+    top.add_argument('--geral', action='store_true', help="Um ranking só, sem separar por setor.")
+    top.add_argument('--saida', default=None, help="CSV onde salvar o resultado.")
+    argumentos = parser.parse_args()
+
+    if argumentos.comando == 'exportar':
+        if exportar_banco_analitico(argumentos.principal, argumentos.unificado, argumentos.banco) is None:
+            raise SystemExit(1)
+        raise SystemExit(0)
+
+    inicio = time.perf_counter()
+    try:
+        if argumentos.comando == 'consultar':
+            resultado = consultar(argumentos.banco, argumentos.sql)
+        else:
+            resultado = top_tecnologias(argumentos.banco, argumentos.categoria, not argumentos.geral,
+                                        argumentos.limite, argumentos.setor)
+    except FileNotFoundError:
+        print(f"Erro: Banco '{argumentos.banco}' não encontrado. Gere-o com: "
+              f"python exportar_banco_analitico.py exportar")
+        raise SystemExit(1)
+    except (sqlite3.Error, pd.errors.DatabaseError) as e:
+        print(f"Erro na consulta: {e}")
+        raise SystemExit(1)
+    milissegundos = (time.perf_counter() - inicio) * 1000
+
+    if argumentos.saida:
+        salvar_tabela(resultado, argumentos.saida)
+        print(f"Resultado salvo em '{argumentos.saida}'.")
+    else:
+        print(resultado.to_string(index=False))
+    print(f"\n{len(resultado)} linhas em {milissegundos:.1f} ms.")
@@ -0,0 +1,187 @@
+import os
+import pandas as pd
+
+import instrumentacao
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+FORMATOS = ('csv', 'parquet')
+EXTENSOES = {'csv': '.csv', 'parquet': '.parquet'}
+
+# Colunas com poucos valores distintos e muita repetição: no Parquet viram
+# colunas de dicionário (cada texto é guardado uma vez por bloco)
+COLUNAS_DICIONARIO = {'Categoria_Tecnologia', 'Nome_Ferramenta_Tecnologia', 'Categoria', 'Setor primário'}
+
+
+def _exigir_pyarrow():
+    if pa is None:
+        raise ImportError("O formato Parquet requer o pacote 'pyarrow' (pip install pyarrow).")
+
+
+def formato_do_caminho(caminho):
+    """Deduz o formato pelo caminho: '.parquet' ou pasta de dataset Parquet; senão CSV."""
+    if caminho.lower().endswith('.parquet'):
+        return 'parquet'
+    if os.path.isdir(caminho):
+        return 'parquet'
+    return 'csv'
+
+
+def caminho_com_extensao(caminho, formato):
+    """Troca a extensão do caminho pela do formato (ex: 'cdn.csv' -> 'cdn.parquet')."""
+    base, extensao = os.path.splitext(caminho)
+    if extensao.lower() in EXTENSOES.values():
+        return base + EXTENSOES[formato]
+    return caminho + EXTENSOES[formato]
+
+
+def eh_arquivo_de_tabela(nome_arquivo):
+    """Indica se o nome é de um arquivo de tabela em algum dos formatos suportados."""
+    return nome_arquivo.lower().endswith(tuple(EXTENSOES.values()))
+
+
+def otimizar_tipos(df):
+    """
+    Prepara o DataFrame para o formato colunar: 'ID' como int32 e as colunas de
+    COLUNAS_DICIONARIO como categóricas (dicionário no Arrow/Parquet).
+    """
+    df = df.copy()
+    if 'ID' in df.columns and pd.api.types.is_integer_dtype(df['ID']):
+        df['ID'] = df['ID'].astype('int32')
+    for coluna in df.columns:
+        if coluna in COLUNAS_DICIONARIO and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+    return df
+
+
+def salvar_tabela(df, caminho, formato='csv', particionar_por=None):
+    """
+    Salva o DataFrame em CSV (UTF-8, sem índice) ou Parquet.
+
+    Args:
+        df (DataFrame): Tabela a salvar.
+        caminho (str): Caminho de saída; a extensão é ajustada ao formato.
+        formato (str): 'csv' ou 'parquet'.
+        particionar_por (str): Só para Parquet. Coluna usada para particionar a
+                               saída em subpastas (ex: 'Categoria_Tecnologia'),
+                               e nesse caso `caminho` vira uma pasta.
+
+    Returns:
+        str: O caminho efetivamente gravado.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconhecido '{formato}'. Use um de {FORMATOS}.")
+    caminho = caminho_com_extensao(caminho, formato)
+    with instrumentacao.escrita(caminho) as operacao:
+        operacao.linhas = len(df)
+        _gravar_tabela(df, caminho, formato, particionar_por)
+    return caminho
+
+
+def _gravar_tabela(df, caminho, formato, particionar_por):
+    if formato == 'csv':
+        df.to_csv(caminho, index=False, encoding='utf-8')
+        return
+
+    _exigir_pyarrow()
+    tabela = pa.Table.from_pandas(otimizar_tipos(df), preserve_index=False)
+    if particionar_por:
+        pq.write_to_dataset(tabela, root_path=caminho, partition_cols=[particionar_por],
+                            existing_data_behavior='delete_matching')
+    else:
+        pq.write_table(tabela, caminho)
+
+
+def ler_tabela(caminho, colunas=None, categorias=None, coluna_categoria='Categoria_Tecnologia', formato=None):
+    """
+    Lê uma tabela em CSV ou Parquet (arquivo único ou pasta particionada).
+
+    Args:
+        caminho (str): Arquivo ou pasta.
+        colunas (list): Colunas a carregar (None = todas). No Parquet as demais
+                        colunas nem chegam a ser lidas do disco.
+        categorias (list): Se informado, mantém só as linhas cuja `coluna_categoria`
+                           está na lista. No Parquet particionado, as partições das
+                           outras categorias não são abertas.
+        coluna_categoria (str): Coluna usada pelo filtro de `categorias`.
+        formato (str): 'csv' ou 'parquet'. Se None, é deduzido pelo caminho.
+    """
+    with instrumentacao.leitura(caminho) as operacao:
+        df = _ler_tabela(caminho, colunas, categorias, coluna_categoria, formato)
+        operacao.linhas = len(df)
+    return df
+
+
+def _ler_tabela(caminho, colunas, categorias, coluna_categoria, formato):
+    formato = formato or formato_do_caminho(caminho)
+    if formato == 'csv':
+        df = pd.read_csv(caminho)
+        if categorias is not None:
+            df = df[df[coluna_categoria].isin(categorias)]
+        return df[colunas] if colunas is not None else df
+
+    _exigir_pyarrow()
+    filtros = [(coluna_categoria, 'in', list(categorias))] if categorias is not None else None
+    df = pq.read_table(caminho, columns=colunas, filters=filtros).to_pandas()
+    # Colunas de dicionário voltam como categóricas; o restante do pipeline espera
+    # texto (ordenação alfabética, concat entre arquivos), então são convertidas
+    for coluna in df.columns:
+        if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype(df[coluna].cat.categories.dtype)
+    return df
+
+
+class EscritorIncremental:
+    """
+    Escreve uma tabela em partes (ex: blocos de um processamento em streaming),
+    anexando ao mesmo arquivo CSV ou ao mesmo arquivo Parquet (um row group por parte).
+    """
+
+    def __init__(self, caminho, colunas, formato='csv'):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato desconhecido '{formato}'. Use um de {FORMATOS}.")
+        self.caminho = caminho_com_extensao(caminho, formato)
+        self.colunas = list(colunas)
+        self.formato = formato
+        self._arquivo = None
+        self._escritor_parquet = None
+        if formato == 'csv':
+            self._arquivo = open(self.caminho, 'w', encoding='utf-8', newline='')
+            pd.DataFrame(columns=self.colunas).to_csv(self._arquivo, index=False)
+        else:
+            _exigir_pyarrow()
+
+    def escrever(self, df):
+        # Os bytes são contados uma vez, em fechar()
+        with instrumentacao.escrita() as operacao:
+            operacao.linhas = len(df)
+            self._escrever(df)
+
+    def _escrever(self, df):
+        df = df[self.colunas]
+        if self.formato == 'csv':
+            df.to_csv(self._arquivo, header=False, index=False)
+            return
+        tabela = pa.Table.from_pandas(otimizar_tipos(df), preserve_index=False)
+        if self._escritor_parquet is None:
+            # Colunas de dicionário usam índices int32 em todas as partes (os da
+            # primeira parte podem caber em int8 e os das seguintes não); colunas
+            # totalmente vazias na primeira parte não têm tipo, então assume texto
+            dicionario = pa.dictionary(pa.int32(), pa.string())
+            esquema = pa.schema([pa.field(campo.name, dicionario) if campo.name in COLUNAS_DICIONARIO
+                                 else pa.field(campo.name, pa.string()) if pa.types.is_null(campo.type) else campo
+                                 for campo in tabela.schema])
+            self._escritor_parquet = pq.ParquetWriter(self.caminho, esquema)
+        self._escritor_parquet.write_table(tabela.cast(self._escritor_parquet.schema))
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+        if self._escritor_parquet is not None:
+            self._escritor_parquet.close()
+        instrumentacao.registrar_bytes('escrita', self.caminho)
@@ -0,0 +1,151 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+ARQUIVO_MODELO = 'planilha_sem_duplicatas.csv'
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000, 10_000_000)
+LINHAS_POR_BLOCO = 100_000
+# Colunas que não são de tecnologia (as booleanas só recebem os valores vistos no modelo)
+COLUNAS_FIXAS = ('ID', 'EMPRESA', 'Setor primário')
+
+
+class ModeloPlanilha:
+    """
+    Distribuições empíricas da planilha do Wappalyzer, usadas para gerar
+    planilhas sintéticas com o mesmo esquema e perfil de dados:
+
+      - setores, na proporção em que aparecem (inclusive os nomes no padrão
+        Valor Econômico, que padronizar_setores_para_exame precisa converter);
+      - para cada coluna, a fração de células preenchidas e o conjunto de células
+        que podem aparecer: as células reais (com o seu peso) mais
+        `combinacoes_extras` combinações novas, sorteadas com a frequência real
+        de cada tecnologia e de quantidade de tecnologias por célula. Assim o
+        número de valores distintos cresce com o tamanho, como num crawl maior.
+
+    Os nomes mantêm os espaços e separadores dos dados reais ('jQuery  ; Slick').
+
+    Args:
+        df_modelo (DataFrame): Planilha real, lida como texto.
+        combinacoes_extras (int): Células sintéticas a mais por coluna multivalorada.
+        semente (int): Semente do gerador.
+    """
+
+    def __init__(self, df_modelo, combinacoes_extras=2000, semente=0):
+        gerador = np.random.default_rng(semente)
+        self.colunas = list(df_modelo.columns)
+        self.setores = df_modelo['Setor primário'].dropna().value_counts(normalize=True)
+        self.celulas = {}
+        for coluna in self.colunas:
+            if coluna in COLUNAS_FIXAS:
+                continue
+            valores = df_modelo[coluna]
+            contagens = valores.dropna().value_counts()
+            preenchimento = valores.notna().mean()
+            if contagens.empty:
+                self.celulas[coluna] = (np.array([np.nan], dtype=object), np.array([1.0]))
+                continue
+
+            celulas = list(contagens.index)
+            pesos = list(contagens.to_numpy(dtype=float))
+            tokens = valores.dropna().str.split(';')
+            if (tokens.str.len() > 1).any():
+                # Sorteia nomes distintos (sem espaços) e usa a grafia bruta mais comum de cada um
+                brutos = tokens.explode()
+                limpos = brutos.str.strip()
+                grafias = brutos.groupby(limpos).agg(lambda grafia: grafia.value_counts().index[0])
+                frequencia_tokens = limpos.value_counts(normalize=True)
+                quantidades = tokens.str.len().value_counts(normalize=True)
+                tamanhos = gerador.choice(quantidades.index.to_numpy(), size=combinacoes_extras,
+                                          p=quantidades.to_numpy())
+                for tamanho in tamanhos:
+                    tamanho = min(int(tamanho), len(frequencia_tokens))
+                    escolhidos = gerador.choice(frequencia_tokens.index.to_numpy(), size=tamanho, replace=False,
+                                                p=frequencia_tokens.to_numpy())
+                    celulas.append(';'.join(grafias[escolhidos]))
+                # As combinações novas ficam com 30% das células preenchidas
+                pesos += [0.3 * sum(pesos) / (0.7 * combinacoes_extras)] * combinacoes_extras
+
+            pesos = np.array(pesos) / np.sum(pesos) * preenchimento
+            self.celulas[coluna] = (np.array(celulas + [np.nan], dtype=object),
+                                    np.append(pesos, 1 - preenchimento))
+
+    @classmethod
+    def de_arquivo(cls, caminho=ARQUIVO_MODELO, **parametros):
+        return cls(pd.read_csv(caminho, dtype=str), **parametros)
+
+    def gerar_bloco(self, primeiro_id, linhas, gerador, taxa_duplicatas=0.05):
+        """
+        Gera `linhas` linhas com IDs a partir de `primeiro_id`. Uma fração
+        `taxa_duplicatas` repete as colunas de tecnologia de outra linha do
+        bloco, para que a remoção de duplicatas tenha trabalho.
+        """
+        ids = np.arange(primeiro_id, primeiro_id + linhas)
+        dados = {
+            'ID': ids,
+            'EMPRESA': pd.Series(ids).map('Empresa Sintética {}'.format).to_numpy(dtype=object),
+            'Setor primário': gerador.choice(self.setores.index.to_numpy(), size=linhas, p=self.setores.to_numpy()),
+        }
+        for coluna, (celulas, pesos) in self.celulas.items():
+            dados[coluna] = celulas[gerador.choice(len(celulas), size=linhas, p=pesos)]
+        bloco = pd.DataFrame(dados, columns=self.colunas)
+
+        duplicadas = np.flatnonzero(gerador.random(linhas) < taxa_duplicatas)
+        if len(duplicadas):
+            origens = gerador.integers(0, linhas, len(duplicadas))
+            colunas_copiadas = [coluna for coluna in self.colunas if coluna not in ('ID', 'EMPRESA')]
+            bloco.loc[duplicadas, colunas_copiadas] = bloco.loc[origens, colunas_copiadas].to_numpy()
+        return bloco
+
+
+def gerar_planilha_sintetica(linhas, arquivo_saida, modelo=None, semente=0, taxa_duplicatas=0.05):
+    """
+    Gera uma planilha larga sintética no esquema de planilha_sem_duplicatas.csv,
+    escrita em blocos (a memória não depende do número de linhas).
+
+    Args:
+        linhas (int): Quantidade de linhas (empresas) a gerar.
+        arquivo_saida (str): Arquivo CSV a ser criado.
+        modelo (ModeloPlanilha): Distribuições a usar. Se None, aprende de ARQUIVO_MODELO.
+        semente (int): Semente do gerador (a mesma semente gera o mesmo arquivo).
+        taxa_duplicatas (float): Fração de linhas com tecnologias repetidas de outra linha.
+    """
+    modelo = modelo or ModeloPlanilha.de_arquivo()
+    gerador = np.random.default_rng(semente)
+    pasta = os.path.dirname(arquivo_saida)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+
+    with open(arquivo_saida, 'w', encoding='utf-8', newline='') as arquivo:
+        for inicio in range(0, linhas, LINHAS_POR_BLOCO):
+            bloco = modelo.gerar_bloco(inicio + 1, min(LINHAS_POR_BLOCO, linhas - inicio), gerador, taxa_duplicatas)
+            bloco.to_csv(arquivo, index=False, header=(inicio == 0))
+    print(f"Planilha sintética com {linhas} linhas salva em '{arquivo_saida}'.")
+    return arquivo_saida
+
+
+def caminho_planilha_sintetica(pasta, linhas):
+    return os.path.join(pasta, f'planilha_sintetica_{linhas}.csv')
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # python gerar_dados_sinteticos.py --linhas 10000 100000
+    parser = argparse.ArgumentParser(description="Gera planilhas sintéticas no formato do Wappalyzer.")
+    parser.add_argument('--linhas', nargs='+', type=int, default=list(TAMANHOS_PADRAO),
+                        help="Tamanhos das planilhas a gerar.")
+    parser.add_argument('--pasta', default='dados_sinteticos', help="Pasta de destino.")
+    parser.add_argument('--modelo', default=ARQUIVO_MODELO, help="Planilha real usada como modelo.")
+    parser.add_argument('--semente', type=int, default=0)
+    argumentos = parser.parse_args()
+
+    try:
+        modelo = ModeloPlanilha.de_arquivo(argumentos.modelo, semente=argumentos.semente)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo modelo '{argumentos.modelo}' não encontrado.")
+        raise SystemExit(1)
+
+    for linhas in argumentos.linhas:
+        gerar_planilha_sintetica(linhas, caminho_planilha_sintetica(argumentos.pasta, linhas), modelo,
+                                 argumentos.semente)
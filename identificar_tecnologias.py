@@ -0,0 +1,345 @@
+import json
+import os
+import re
+import time
+import pandas as pd
+
+# Mesmo layout (e ordem) de colunas da planilha exportada do Wappalyzer
+COLUNAS_PLANILHA = [
+    'ID', 'EMPRESA', 'Setor primário', 'JavaScript frameworks', 'Programming languages',
+    'Web frameworks', 'Databases', 'Web servers', 'CMS', 'Analytics', 'Tag managers',
+    'Advertising', 'SEO', 'CRM', 'SSL/TLS enabled', 'Security', 'CDN', 'UI frameworks',
+    'Ecommerce', 'JavaScript libraries', 'IaaS', 'Live chat', 'Miscellaneous', 'PaaS',
+    'Reverse proxies', 'Responsive'
+]
+COLUNAS_TECNOLOGIAS = [c for c in COLUNAS_PLANILHA
+                       if c not in ('ID', 'EMPRESA', 'Setor primário', 'SSL/TLS enabled', 'Responsive')]
+
+RE_SCRIPT_SRC = re.compile(r'<script[^>]+src\s*=\s*["\']([^"\']+)', re.I)
+RE_META = re.compile(r'<meta\s[^>]*>', re.I)
+RE_ATRIBUTO = re.compile(r'([\w:-]+)\s*=\s*["\']([^"\']*)["\']')
+RE_VIEWPORT = re.compile(r'<meta[^>]+name\s*=\s*["\']viewport["\']', re.I)
+
+
+def _extrair_ancora(padrao):
+    """
+    Retorna o maior trecho literal (em minúsculas) que toda ocorrência do padrão
+    precisa conter, ou None se não houver um trecho seguro com 3+ caracteres
+    (ex.: alternativas no nível superior).
+    """
+    melhor, atual = '', ''
+    profundidade = 0
+    i = 0
+    while i < len(padrao):
+        c = padrao[i]
+        literal = None
+        if c == '\\' and i + 1 < len(padrao):
+            if not padrao[i + 1].isalnum():
+                literal = padrao[i + 1]
+            i += 2
+        elif c == '[':
+            fim = padrao.find(']', i + 2)
+            i = len(padrao) if fim == -1 else fim + 1
+        elif c == '{':
+            fim = padrao.find('}', i)
+            i = len(padrao) if fim == -1 else fim + 1
+            atual = atual[:-1]  # o caractere anterior pode ter repetição zero
+        elif c in '?*':
+            atual = atual[:-1]
+            i += 1
+        elif c == '|' and profundidade == 0:
+            return None
+        else:
+            if c == '(':
+                profundidade += 1
+            elif c == ')':
+                profundidade -= 1
+            elif c not in '.^$+|':
+                literal = c
+            i += 1
+
+        if literal is not None and profundidade == 0:
+            atual += literal
+        else:
+            melhor = max(melhor, atual, key=len)
+            atual = ''
+    melhor = max(melhor, atual, key=len).lower()
+    return melhor if len(melhor) >= 3 else None
+
+
+def _regex_trie(palavras):
+    """Monta uma regex com as palavras organizadas em árvore de prefixos (trie)."""
+    trie = {}
+    for palavra in palavras:
+        no = trie
+        for caractere in palavra:
+            no = no.setdefault(caractere, {})
+        no[''] = {}
+
+    def montar(no):
+        termina_aqui = '' in no
+        ramos = [re.escape(c) + montar(filho) for c, filho in sorted(no.items()) if c]
+        if not ramos:
+            return ''
+        if len(ramos) == 1 and not termina_aqui:
+            return ramos[0]
+        grupo = '(?:' + '|'.join(ramos) + ')'
+        return grupo + '?' if termina_aqui else grupo
+
+    return re.compile(montar(trie))
+
+
+class IdentificadorTecnologias:
+    """
+    Identifica tecnologias em páginas HTML a partir de um conjunto de regras no
+    estilo do Wappalyzer (padrões de HTML, src de scripts, cabeçalhos e metatags).
+
+    Na criação, cada padrão tem extraída uma âncora (trecho literal obrigatório)
+    e as âncoras de cada fonte são compiladas juntas em uma única regex em forma
+    de trie. Assim cada página é percorrida uma vez por fonte, e só os padrões
+    cuja âncora apareceu (ou que não têm âncora) são confirmados com a regex
+    completa, em vez de testar todas as regras contra a página inteira.
+    """
+
+    def __init__(self, regras):
+        self.categorias = {nome: regra.get('categorias', []) for nome, regra in regras.items()}
+        self.implicacoes = {nome: regra.get('implica', []) for nome, regra in regras.items()}
+
+        padroes = {'html': [], 'scripts': [], 'headers': [], 'meta': []}
+        for nome, regra in regras.items():
+            for padrao in regra.get('html', []):
+                padroes['html'].append((nome, padrao))
+            for padrao in regra.get('scripts', []):
+                padroes['scripts'].append((nome, padrao))
+            # Cabeçalhos e metatags viram linhas "nome: valor", então cada regra
+            # é ancorada no início da linha com o nome esperado
+            for fonte in ('headers', 'meta'):
+                for chave, valor in regra.get(fonte, {}).items():
+                    prefixo = f"^{re.escape(chave.lower())}: "
+                    padroes[fonte].append((nome, prefixo + (f"[^\\n]*?{valor}" if valor else "")))
+
+        self._buscadores = {fonte: self._compilar(lista) for fonte, lista in padroes.items()}
+
+    @classmethod
+    def de_arquivo(cls, arquivo_regras):
+        with open(arquivo_regras, 'r', encoding='utf-8') as arquivo:
+            return cls(json.load(arquivo))
+
+    @staticmethod
+    def _compilar(padroes):
+        compilados = [(nome, re.compile(padrao, re.I | re.M)) for nome, padrao in padroes]
+        sem_ancora = []
+        por_ancora = {}
+        for indice, (_, padrao) in enumerate(padroes):
+            ancora = _extrair_ancora(padrao)
+            if ancora is None:
+                sem_ancora.append(indice)
+            else:
+                por_ancora.setdefault(ancora, []).append(indice)
+
+        # Numa mesma posição a trie só devolve a âncora mais longa; as âncoras que
+        # são prefixo dela também estão presentes e entram junto
+        prefixos = {
+            ancora: [outra for outra in por_ancora if ancora.startswith(outra)]
+            for ancora in por_ancora
+        }
+        trie = _regex_trie(por_ancora) if por_ancora else None
+        return compilados, sem_ancora, por_ancora, prefixos, trie
+
+    def _buscar(self, fonte, texto, encontradas):
+        compilados, sem_ancora, por_ancora, prefixos, trie = self._buscadores[fonte]
+        if not texto or not compilados:
+            return
+
+        candidatos = set(sem_ancora)
+        if trie is not None:
+            texto_minusculo = texto.lower()
+            vistas = set()
+            posicao = 0
+            while True:
+                achado = trie.search(texto_minusculo, posicao)
+                if achado is None:
+                    break
+                if achado.group() not in vistas:
+                    for ancora in prefixos[achado.group()]:
+                        vistas.add(ancora)
+                        candidatos.update(por_ancora[ancora])
+                posicao = achado.start() + 1
+
+        for indice in candidatos:
+            nome, regex = compilados[indice]
+            if nome not in encontradas and regex.search(texto):
+                encontradas.add(nome)
+
+    def identificar(self, html, cabecalhos=None):
+        """
+        Retorna o conjunto de nomes de tecnologias encontradas na página,
+        incluindo as tecnologias implicadas (ex.: WordPress -> PHP).
+        """
+        encontradas = set()
+        self._buscar('html', html, encontradas)
+        self._buscar('scripts', "\n".join(RE_SCRIPT_SRC.findall(html)), encontradas)
+
+        linhas_meta = []
+        for tag in RE_META.findall(html):
+            atributos = {k.lower(): v for k, v in RE_ATRIBUTO.findall(tag)}
+            chave = atributos.get('name') or atributos.get('property')
+            if chave and 'content' in atributos:
+                linhas_meta.append(f"{chave.lower()}: {atributos['content']}")
+        self._buscar('meta', "\n".join(linhas_meta), encontradas)
+
+        if cabecalhos:
+            # Aceita um dicionário ou uma lista de pares (que preserva cabeçalhos repetidos)
+            pares = cabecalhos.items() if hasattr(cabecalhos, 'items') else cabecalhos
+            linhas_cabecalhos = "\n".join(f"{k.lower()}: {v}" for k, v in pares)
+            self._buscar('headers', linhas_cabecalhos, encontradas)
+
+        # Aplica as implicações até não surgirem tecnologias novas
+        pendentes = list(encontradas)
+        while pendentes:
+            for implicada in self.implicacoes.get(pendentes.pop(), []):
+                if implicada not in encontradas:
+                    encontradas.add(implicada)
+                    pendentes.append(implicada)
+        return encontradas
+
+    def montar_linha(self, tecnologias, html=None, url=None, **campos):
+        """
+        Monta uma linha no layout largo da planilha: uma coluna por categoria com
+        as tecnologias separadas por ';'. `campos` preenche ID, EMPRESA etc.
+        """
+        linha = dict.fromkeys(COLUNAS_PLANILHA)
+        linha.update(campos)
+        por_categoria = {}
+        for nome in tecnologias:
+            for categoria in self.categorias.get(nome, []):
+                por_categoria.setdefault(categoria, []).append(nome)
+        for categoria, nomes in por_categoria.items():
+            if categoria in linha:
+                linha[categoria] = " ; ".join(sorted(nomes, key=str.lower))
+        if url:
+            linha['SSL/TLS enabled'] = 1 if url.lower().startswith('https://') else 0
+        if html is not None:
+            linha['Responsive'] = 1 if RE_VIEWPORT.search(html) else 0
+        return linha
+
+
+def _carregar_empresas(arquivo_empresas):
+    if not arquivo_empresas:
+        return {}
+    try:
+        df_empresas = pd.read_csv(arquivo_empresas, usecols=['ID', 'EMPRESA', 'Setor primário'])
+        return df_empresas.set_index('ID').to_dict('index')
+    except Exception as e:
+        print(f"Aviso: não foi possível ler '{arquivo_empresas}': {e}. EMPRESA e Setor ficarão vazios.")
+        return {}
+
+
+def _gerar_planilha(paginas, identificador, empresas, arquivo_saida):
+    """
+    Analisa as páginas (tuplas id, html, cabeçalhos, url), mede a vazão e salva a
+    planilha no layout largo.
+    """
+    linhas = []
+    inicio = time.perf_counter()
+    for id_empresa, html, cabecalhos, url in paginas:
+        dados_empresa = empresas.get(id_empresa, {})
+        tecnologias = identificador.identificar(html, cabecalhos)
+        linhas.append(identificador.montar_linha(
+            tecnologias, html=html, url=url, ID=id_empresa,
+            EMPRESA=dados_empresa.get('EMPRESA'), **{'Setor primário': dados_empresa.get('Setor primário')}
+        ))
+    duracao = time.perf_counter() - inicio
+
+    vazao = len(linhas) / duracao if duracao > 0 else float('inf')
+    print(f"{len(linhas)} páginas analisadas em {duracao:.2f} s ({vazao:.1f} páginas/s).")
+
+    df = pd.DataFrame(linhas, columns=COLUNAS_PLANILHA)
+    try:
+        df.to_csv(arquivo_saida, index=False, encoding='utf-8')
+        print(f"Planilha de tecnologias salva em: '{arquivo_saida}'")
+    except Exception as e:
+        print(f"Erro ao salvar o arquivo CSV '{arquivo_saida}': {e}")
+    return df
+
+
+def processar_pasta_html(pasta_entrada, arquivo_saida, arquivo_regras='regras_tecnologias.json',
+                         arquivo_empresas=None):
+    """
+    Identifica as tecnologias de todas as páginas HTML salvas em uma pasta e gera
+    um CSV no mesmo layout largo da planilha do Wappalyzer, medindo a vazão em
+    páginas por segundo.
+
+    Cada página '<nome>.html' pode ter um arquivo '<nome>.json' ao lado com as
+    chaves opcionais 'url' e 'headers' (dicionário de cabeçalhos HTTP). Se <nome>
+    for numérico, ele é usado como ID da empresa.
+
+    Args:
+        pasta_entrada (str): Pasta com os arquivos .html/.htm.
+        arquivo_saida (str): Caminho do CSV de saída.
+        arquivo_regras (str): Arquivo JSON com as regras de identificação.
+        arquivo_empresas (str): CSV opcional com 'ID', 'EMPRESA' e 'Setor primário'
+                                (ex: 'tabelas_divididas_corrigido/tabela_principal.csv').
+    """
+    if not os.path.isdir(pasta_entrada):
+        print(f"Erro: Pasta de entrada não encontrada em '{pasta_entrada}'")
+        return None
+
+    try:
+        identificador = IdentificadorTecnologias.de_arquivo(arquivo_regras)
+    except Exception as e:
+        print(f"Erro ao carregar as regras de '{arquivo_regras}': {e}")
+        return None
+
+    arquivos = sorted(n for n in os.listdir(pasta_entrada) if n.lower().endswith(('.html', '.htm')))
+    print(f"Analisando {len(arquivos)} páginas em '{pasta_entrada}'...")
+
+    def ler_paginas():
+        for indice, nome_arquivo in enumerate(arquivos, start=1):
+            nome_base = os.path.splitext(nome_arquivo)[0]
+            with open(os.path.join(pasta_entrada, nome_arquivo), 'r', encoding='utf-8', errors='replace') as f:
+                html = f.read()
+
+            extras = {}
+            caminho_extras = os.path.join(pasta_entrada, f"{nome_base}.json")
+            if os.path.exists(caminho_extras):
+                with open(caminho_extras, 'r', encoding='utf-8') as f:
+                    extras = json.load(f)
+
+            id_empresa = int(nome_base) if nome_base.isdigit() else indice
+            yield id_empresa, html, extras.get('headers'), extras.get('url')
+
+    return _gerar_planilha(ler_paginas(), identificador, _carregar_empresas(arquivo_empresas), arquivo_saida)
+
+
+def processar_arquivo_respostas(arquivo_paginas, arquivo_saida, arquivo_regras='regras_tecnologias.json',
+                                arquivo_empresas=None):
+    """
+    Mesmo que processar_pasta_html, mas lendo as respostas guardadas por
+    coletar_paginas.py (ver arquivo_respostas.py). Permite reaplicar regras novas
+    a todo o corpus sem baixar as páginas de novo. O ID é o do registro.
+    """
+    from arquivo_respostas import carregar_indice, decodificar_corpo, iterar_registros
+
+    try:
+        identificador = IdentificadorTecnologias.de_arquivo(arquivo_regras)
+        total = len(carregar_indice(arquivo_paginas))
+    except Exception as e:
+        print(f"Erro ao preparar a análise de '{arquivo_paginas}': {e}")
+        return None
+    print(f"Analisando {total} páginas de '{arquivo_paginas}'...")
+
+    def ler_paginas():
+        for registro in iterar_registros(arquivo_paginas):
+            yield registro['id'], decodificar_corpo(registro), registro['cabecalhos'], registro['url']
+
+    return _gerar_planilha(ler_paginas(), identificador, _carregar_empresas(arquivo_empresas), arquivo_saida)
+
+
+if __name__ == "__main__":
+    # Pasta com as páginas iniciais salvas (uma por empresa, ex: '1.html', '2.html', ...)
+    pasta_paginas = 'paginas_salvas'
+    arquivo_saida_csv = 'PEC1_coleta_de_dados_identificacao_local.csv'
+
+    processar_pasta_html(pasta_paginas, arquivo_saida_csv,
+                         arquivo_empresas='tabelas_divididas_corrigido/tabela_principal.csv')
@@ -0,0 +1,249 @@
+import argparse
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from formatos_tabela import ler_tabela
+
+COLUNA_ID = 'ID'
+COLUNA_TECNOLOGIA = 'Nome_Ferramenta_Tecnologia'
+COLUNA_SETOR = 'Setor primário'
+
+# Quantidade de bits 1 em cada byte possível, para contar resultados sem desempacotar
+_BITS_POR_BYTE = np.array([bin(valor).count('1') for valor in range(256)], dtype=np.uint8)
+
+_TOKENS = re.compile(r"""
+    \s*(?:
+        (?P<abre>\() | (?P<fecha>\)) | (?P<igual>=)
+      | "(?P<aspas_duplas>[^"]*)" | '(?P<aspas_simples>[^']*)'
+      | (?P<palavra>[^\s()='"]+)
+    )""", re.VERBOSE)
+_OPERADORES = {'AND', 'OR', 'NOT'}
+_CAMPOS_SETOR = {'setor', 'sector'}
+
+
+def _separar_tokens(expressao):
+    """Divide a expressão em tokens (tipo, valor). Palavras soltas seguidas viram um só nome."""
+    tokens = []
+    palavra_solta_anterior = False
+    posicao = 0
+    expressao = expressao.strip()
+    while posicao < len(expressao):
+        encontrado = _TOKENS.match(expressao, posicao)
+        if not encontrado or encontrado.end() == posicao:
+            raise ValueError(f"Caractere inesperado na posição {posicao}: '{expressao[posicao:]}'")
+        posicao = encontrado.end()
+        tipo = encontrado.lastgroup
+        valor = encontrado.group(tipo)
+
+        if tipo == 'palavra' and valor.upper() in _OPERADORES:
+            tokens.append((valor.upper(), valor))
+        elif tipo == 'palavra' and palavra_solta_anterior:
+            # 'Google Analytics' sem aspas: junta com a palavra anterior
+            tokens[-1] = ('nome', tokens[-1][1] + ' ' + valor)
+        elif tipo in ('palavra', 'aspas_duplas', 'aspas_simples'):
+            tokens.append(('nome', valor))
+        else:
+            tokens.append((tipo, valor))
+        palavra_solta_anterior = tipo == 'palavra' and valor.upper() not in _OPERADORES
+    return tokens
+
+
+class _Analisador:
+    """
+    Analisador descendente recursivo da linguagem de consulta:
+
+        expressao := termo ('OR' termo)*
+        termo     := fator ('AND' fator)*
+        fator     := 'NOT' fator | '(' expressao ')' | setor '=' nome | nome
+
+    Gera uma árvore de tuplas: ('tec', nome), ('setor', nome), ('not', a),
+    ('and', a, b), ('or', a, b).
+    """
+
+    def __init__(self, expressao):
+        self.tokens = _separar_tokens(expressao)
+        self.posicao = 0
+
+    def _atual(self):
+        return self.tokens[self.posicao] if self.posicao < len(self.tokens) else (None, None)
+
+    def _consumir(self, tipo):
+        atual = self._atual()
+        if atual[0] != tipo:
+            esperado = ')' if tipo == 'fecha' else tipo
+            encontrado = f"'{atual[1]}'" if atual[0] else 'o fim da expressão'
+            raise ValueError(f"Esperado '{esperado}' mas encontrado {encontrado}.")
+        self.posicao += 1
+        return atual[1]
+
+    def analisar(self):
+        arvore = self._expressao()
+        if self.posicao != len(self.tokens):
+            raise ValueError(f"Token inesperado: '{self._atual()[1]}'.")
+        return arvore
+
+    def _expressao(self):
+        arvore = self._termo()
+        while self._atual()[0] == 'OR':
+            self.posicao += 1
+            arvore = ('or', arvore, self._termo())
+        return arvore
+
+    def _termo(self):
+        arvore = self._fator()
+        while self._atual()[0] == 'AND':
+            self.posicao += 1
+            arvore = ('and', arvore, self._fator())
+        return arvore
+
+    def _fator(self):
+        tipo, valor = self._atual()
+        if tipo == 'NOT':
+            self.posicao += 1
+            return ('not', self._fator())
+        if tipo == 'abre':
+            self.posicao += 1
+            arvore = self._expressao()
+            self._consumir('fecha')
+            return arvore
+        if tipo == 'nome':
+            self.posicao += 1
+            if valor.lower() in _CAMPOS_SETOR and self._atual()[0] == 'igual':
+                self.posicao += 1
+                return ('setor', self._consumir('nome'))
+            return ('tec', valor)
+        encontrado = f"'{valor}'" if tipo else 'o fim da expressão'
+        raise ValueError(f"Esperado um nome de tecnologia, 'NOT' ou '(' mas encontrado {encontrado}.")
+
+
+@lru_cache(maxsize=1024)
+def analisar_consulta(expressao):
+    """Converte a expressão de consulta em árvore (com cache, para consultas repetidas)."""
+    return _Analisador(expressao).analisar()
+
+
+class IndiceBitmap:
+    """
+    Índice invertido de bitmaps: para cada tecnologia e para cada setor guarda o
+    conjunto de empresas como um bitset NumPy empacotado (1 bit por empresa).
+
+    Uma consulta como "React AND Cloudflare AND NOT jQuery AND setor='Energia'"
+    vira poucas operações &, |, ~ sobre vetores de bytes, sem reler CSVs.
+
+    Args:
+        df_longo (DataFrame): Tabela longa com ID e Nome_Ferramenta_Tecnologia.
+        df_principal (DataFrame): Tabela principal com ID e 'Setor primário' (opcional).
+                                  Também define o universo de empresas usado pelo NOT.
+    """
+
+    def __init__(self, df_longo, df_principal=None):
+        ids = df_longo[COLUNA_ID].dropna().astype('int64').to_numpy()
+        if df_principal is not None:
+            ids = np.concatenate([ids, df_principal[COLUNA_ID].dropna().astype('int64').to_numpy()])
+        self.empresas = np.unique(ids)
+        self.total_empresas = len(self.empresas)
+        bytes_por_bitmap = (self.total_empresas + 7) // 8
+
+        # Máscara dos bits válidos: o último byte pode ter bits de sobra
+        self._universo = np.packbits(np.ones(self.total_empresas, dtype=bool))
+
+        self.tecnologias, self._bitmaps_tecnologias = self._montar_bitmaps(
+            df_longo, COLUNA_TECNOLOGIA, bytes_por_bitmap)
+        if df_principal is not None and COLUNA_SETOR in df_principal.columns:
+            self.setores, self._bitmaps_setores = self._montar_bitmaps(
+                df_principal, COLUNA_SETOR, bytes_por_bitmap)
+        else:
+            self.setores, self._bitmaps_setores = {}, np.zeros((0, bytes_por_bitmap), dtype=np.uint8)
+
+    def _montar_bitmaps(self, df, coluna, bytes_por_bitmap):
+        pares = df[[COLUNA_ID, coluna]].dropna().drop_duplicates()
+        codigos, valores = pd.factorize(pares[coluna].astype(str), sort=True)
+        posicoes = np.searchsorted(self.empresas, pares[COLUNA_ID].astype('int64').to_numpy())
+
+        # Liga o bit de cada (valor, empresa) de uma vez; mesma ordem de bits do np.packbits
+        bitmaps = np.zeros((len(valores), bytes_por_bitmap), dtype=np.uint8)
+        np.bitwise_or.at(bitmaps, (codigos, posicoes >> 3),
+                         (np.uint8(0x80) >> (posicoes & 7).astype(np.uint8)))
+        return {valor: linha for linha, valor in enumerate(valores)}, bitmaps
+
+    @classmethod
+    def de_arquivos(cls, arquivo_unificado, arquivo_principal=None):
+        """Constrói o índice a partir de Tecnologias_Unificadas e tabela_principal (CSV ou Parquet)."""
+        df_longo = ler_tabela(arquivo_unificado, colunas=[COLUNA_ID, COLUNA_TECNOLOGIA])
+        df_principal = ler_tabela(arquivo_principal) if arquivo_principal else None
+        return cls(df_longo, df_principal)
+
+    @staticmethod
+    def _buscar(mapa, nome, tipo):
+        if nome in mapa:
+            return mapa[nome]
+        # Aceita diferenças de maiúsculas/minúsculas quando não há ambiguidade
+        candidatos = [chave for chave in mapa if chave.lower() == nome.lower()]
+        if len(candidatos) == 1:
+            return mapa[candidatos[0]]
+        raise KeyError(f"{tipo} '{nome}' não encontrado(a) no índice.")
+
+    def bitmap_tecnologia(self, nome):
+        return self._bitmaps_tecnologias[self._buscar(self.tecnologias, nome, 'Tecnologia')]
+
+    def bitmap_setor(self, nome):
+        return self._bitmaps_setores[self._buscar(self.setores, nome, 'Setor')]
+
+    def _avaliar(self, arvore):
+        operacao = arvore[0]
+        if operacao == 'tec':
+            return self.bitmap_tecnologia(arvore[1])
+        if operacao == 'setor':
+            return self.bitmap_setor(arvore[1])
+        if operacao == 'not':
+            return np.bitwise_and(np.invert(self._avaliar(arvore[1])), self._universo)
+        if operacao == 'and':
+            return np.bitwise_and(self._avaliar(arvore[1]), self._avaliar(arvore[2]))
+        return np.bitwise_or(self._avaliar(arvore[1]), self._avaliar(arvore[2]))
+
+    def avaliar(self, expressao):
+        """Retorna o bitmap (vetor uint8 empacotado) das empresas que satisfazem a expressão."""
+        return self._avaliar(analisar_consulta(expressao))
+
+    def contar(self, expressao):
+        """Número de empresas que satisfazem a expressão."""
+        return int(_BITS_POR_BYTE[self.avaliar(expressao)].sum(dtype=np.int64))
+
+    def consultar(self, expressao):
+        """IDs das empresas que satisfazem a expressão (ordem crescente)."""
+        bits = np.unpackbits(self.avaliar(expressao), count=self.total_empresas).astype(bool)
+        return self.empresas[bits]
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # python indice_bitmap.py "React AND Cloudflare AND NOT jQuery AND setor='Energia'"
+    # python indice_bitmap.py "(WordPress OR Drupal) AND 'Google Analytics'" --listar
+    parser = argparse.ArgumentParser(description="Consultas booleanas sobre as tecnologias das empresas.")
+    parser.add_argument('expressao', nargs='+',
+                        help="Expressão com AND, OR, NOT, parênteses e setor='...'.")
+    parser.add_argument('--unificado', default='novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv',
+                        help="Tabela longa de tecnologias (CSV ou Parquet).")
+    parser.add_argument('--principal', default='tabelas_divididas_corrigido/tabela_principal.csv',
+                        help="Tabela principal com o setor de cada empresa.")
+    parser.add_argument('--listar', action='store_true', help="Lista os IDs das empresas encontradas.")
+    argumentos = parser.parse_args()
+
+    try:
+        indice = IndiceBitmap.de_arquivos(argumentos.unificado, argumentos.principal)
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo não encontrado: {e}")
+        raise SystemExit(1)
+
+    for expressao in argumentos.expressao:
+        try:
+            ids = indice.consultar(expressao)
+        except (KeyError, ValueError) as e:
+            print(f"Erro na consulta \"{expressao}\": {e}")
+            continue
+        print(f"{expressao}: {len(ids)} empresas")
+        if argumentos.listar:
+            print(", ".join(str(id_empresa) for id_empresa in ids))
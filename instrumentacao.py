@@ -0,0 +1,462 @@
+import argparse
+import functools
+import json
+import os
+import resource
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# A instrumentação fica desligada (custo desprezível) enquanto TCC_METRICAS não
+# estiver definida. Por serem variáveis de ambiente, valem também para os
+# processos filhos (pipeline.py, modo paralelo, benchmark).
+VARIAVEL_ARQUIVO = 'TCC_METRICAS'             # arquivo de saída das métricas
+VARIAVEL_FORMATO = 'TCC_METRICAS_FORMATO'     # 'jsonl' (padrão) ou 'openmetrics'
+VARIAVEL_PERFILADOR = 'TCC_PERFILADOR'        # intervalo de amostragem em ms (vazio/0 = desligado)
+FORMATOS = ('jsonl', 'openmetrics')
+FASES = ('leitura', 'transformacao', 'escrita')
+FUNCOES_NO_PERFIL = 15
+
+_local = threading.local()
+
+
+def configurar(arquivo, formato='jsonl', intervalo_perfilador_ms=None):
+    """
+    Liga a instrumentação neste processo e nos processos que ele criar.
+
+    Args:
+        arquivo (str): Arquivo de saída. No formato 'jsonl', recebe uma linha por
+                       etapa executada. No 'openmetrics', é reescrito a cada etapa
+                       com os valores da última execução de cada uma, e o histórico
+                       fica em '<arquivo>.jsonl'.
+        formato (str): 'jsonl' ou 'openmetrics'.
+        intervalo_perfilador_ms (float): Se informado, amostra a pilha de chamadas
+                                         nesse intervalo durante cada etapa.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de métricas desconhecido '{formato}'. Use um de {FORMATOS}.")
+    os.environ[VARIAVEL_ARQUIVO] = arquivo
+    os.environ[VARIAVEL_FORMATO] = formato
+    if intervalo_perfilador_ms:
+        os.environ[VARIAVEL_PERFILADOR] = str(intervalo_perfilador_ms)
+    else:
+        os.environ.pop(VARIAVEL_PERFILADOR, None)
+
+
+def ativa():
+    return bool(os.environ.get(VARIAVEL_ARQUIVO))
+
+
+def _memoria_pico_mb():
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _tamanho_em_bytes(caminho):
+    """Tamanho de um arquivo, ou a soma dos arquivos de uma pasta (dataset Parquet)."""
+    try:
+        if os.path.isdir(caminho):
+            return sum(os.path.getsize(os.path.join(raiz, nome))
+                       for raiz, _, nomes in os.walk(caminho) for nome in nomes)
+        return os.path.getsize(caminho)
+    except OSError:
+        return 0
+
+
+def _etapas_ativas():
+    if not hasattr(_local, 'etapas'):
+        _local.etapas = []
+    return _local.etapas
+
+
+def etapa_atual():
+    """A Medicao mais interna em andamento nesta thread (ou None)."""
+    etapas = _etapas_ativas()
+    return etapas[-1] if etapas else None
+
+
+class PerfiladorAmostragem:
+    """
+    Perfilador por amostragem: uma thread lê a pilha de chamadas da thread medida
+    (sys._current_frames) a cada `intervalo` segundos. Não usa tracing, então o
+    código medido roda na velocidade normal; o custo é só o das amostras.
+
+    Args:
+        id_thread (int): Thread a amostrar (threading.get_ident()).
+        intervalo (float): Segundos entre amostras.
+        quadros_ignorados (int): Quadros do início da pilha que não entram nas
+                                 amostras (os que chamaram o trecho medido).
+    """
+
+    def __init__(self, id_thread, intervalo=0.005, quadros_ignorados=0):
+        self.id_thread = id_thread
+        self.intervalo = intervalo
+        self.quadros_ignorados = quadros_ignorados
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, name='perfilador-amostragem', daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            quadro = sys._current_frames().get(self.id_thread)
+            pilha = []
+            while quadro is not None:
+                codigo = quadro.f_code
+                pilha.append(f"{os.path.basename(codigo.co_filename)}:{codigo.co_name}")
+                quadro = quadro.f_back
+            pilha = pilha[::-1][self.quadros_ignorados:]
+            if pilha:
+                self.pilhas[tuple(pilha)] += 1
+
+    def resumo(self, limite=FUNCOES_NO_PERFIL):
+        """
+        Funções mais amostradas: 'proprias' conta as amostras em que a função
+        estava executando (topo da pilha); 'inclusivas', as em que estava em
+        qualquer ponto da pilha.
+        """
+        proprias = Counter()
+        inclusivas = Counter()
+        for pilha, amostras in self.pilhas.items():
+            proprias[pilha[-1]] += amostras
+            for funcao in set(pilha):
+                inclusivas[funcao] += amostras
+        return {
+            'amostras': sum(self.pilhas.values()),
+            'intervalo_ms': self.intervalo * 1000,
+            'proprias': proprias.most_common(limite),
+            'inclusivas': inclusivas.most_common(limite),
+        }
+
+    def pilhas_colapsadas(self, raiz):
+        """Linhas 'raiz;f1;f2 N', o formato lido por flamegraph.pl e speedscope."""
+        return [f"{raiz};{';'.join(pilha)} {amostras}" for pilha, amostras in self.pilhas.most_common()]
+
+
+class Medicao:
+    """
+    Mede uma etapa: tempo de relógio, tempo de CPU, pico de memória residente,
+    linhas e bytes lidos/escritos, e o tempo gasto em cada fase (leitura,
+    transformação e escrita). As leituras e escritas feitas por formatos_tabela e
+    carregador_csv durante a etapa são atribuídas a ela automaticamente; o tempo
+    restante é o da transformação. Numa etapa dentro de outra, a interna fica com
+    as próprias leituras e escritas e a externa conta o tempo dela como transformação.
+
+    Ao terminar, grava um registro no arquivo de métricas (ver configurar). Use
+    pelo decorador `instrumentar` ou pela função `etapa`.
+    """
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.linhas_entrada = 0
+        self.linhas_saida = 0
+        self.bytes_lidos = 0
+        self.bytes_escritos = 0
+        self.operacoes = Counter()
+        self.operacoes_com_erro = Counter()
+        self.segundos_fase = Counter()
+        self._perfilador = None
+
+    def __enter__(self):
+        intervalo_ms = float(os.environ.get(VARIAVEL_PERFILADOR) or 0)
+        if intervalo_ms > 0:
+            # As amostras começam no quadro que abriu a etapa
+            profundidade = 0
+            quadro = sys._getframe(1)
+            while quadro.f_back is not None:
+                profundidade += 1
+                quadro = quadro.f_back
+            self._perfilador = PerfiladorAmostragem(threading.get_ident(), intervalo_ms / 1000, profundidade)
+            self._perfilador.iniciar()
+        self.data_inicio = datetime.now().isoformat(timespec='milliseconds')
+        self._pico_inicial = _memoria_pico_mb()
+        self._inicio_cpu = time.process_time()
+        self._inicio = time.perf_counter()
+        _etapas_ativas().append(self)
+        return self
+
+    def __exit__(self, tipo, erro, rastreamento):
+        segundos = time.perf_counter() - self._inicio
+        cpu_segundos = time.process_time() - self._inicio_cpu
+        _etapas_ativas().remove(self)
+        if self._perfilador is not None:
+            self._perfilador.parar()
+
+        pico = _memoria_pico_mb()
+        fases = {fase: round(self.segundos_fase[fase], 4) for fase in ('leitura', 'escrita')}
+        fases['transformacao'] = round(max(segundos - sum(self.segundos_fase.values()), 0.0), 4)
+        registro = {
+            'etapa': self.nome,
+            'inicio': self.data_inicio,
+            'pid': os.getpid(),
+            'segundos': round(segundos, 4),
+            'cpu_segundos': round(cpu_segundos, 4),
+            'pico_memoria_mb': round(pico, 1),
+            'aumento_pico_memoria_mb': round(pico - self._pico_inicial, 1),
+            'linhas_entrada': self.linhas_entrada,
+            'linhas_saida': self.linhas_saida,
+            'bytes_lidos': self.bytes_lidos,
+            'bytes_escritos': self.bytes_escritos,
+            'leituras': self.operacoes['leitura'],
+            'escritas': self.operacoes['escrita'],
+            'leituras_com_erro': self.operacoes_com_erro['leitura'],
+            'escritas_com_erro': self.operacoes_com_erro['escrita'],
+            'fases': {fase: fases[fase] for fase in FASES},
+            'erro': repr(erro) if erro is not None else None,
+        }
+        if self._perfilador is not None:
+            registro['perfil'] = self._perfilador.resumo()
+        try:
+            _emitir(registro, self._perfilador)
+        except OSError as e:
+            # Falha ao gravar métricas não deve derrubar a etapa
+            print(f"Aviso: não foi possível gravar as métricas da etapa '{self.nome}': {e}")
+        return False
+
+    def registrar(self, fase, linhas=0, caminho=None, segundos=0.0, nova_operacao=True):
+        """Soma uma leitura ou escrita (linhas, bytes do arquivo em `caminho` e tempo) à etapa."""
+        self.operacoes[fase] += nova_operacao
+        self.segundos_fase[fase] += segundos
+        tamanho = _tamanho_em_bytes(caminho) if caminho else 0
+        if fase == 'leitura':
+            self.linhas_entrada += linhas
+            self.bytes_lidos += tamanho
+        else:
+            self.linhas_saida += linhas
+            self.bytes_escritos += tamanho
+
+    def registrar_erro(self, fase, segundos=0.0):
+        """Conta uma leitura ou escrita que falhou: só o tempo gasto, sem linhas nem bytes."""
+        self.operacoes_com_erro[fase] += 1
+        self.segundos_fase[fase] += segundos
+
+
+def etapa(nome):
+    """Mede o bloco `with etapa('nome'):` como uma etapa (sem efeito com a instrumentação desligada)."""
+    return Medicao(nome) if ativa() else _NULO
+
+
+def instrumentar(funcao):
+    """Decorador que mede cada chamada da função como uma etapa com o nome dela."""
+    @functools.wraps(funcao)
+    def _instrumentada(*args, **kwargs):
+        if not ativa():
+            return funcao(*args, **kwargs)
+        with Medicao(funcao.__name__):
+            return funcao(*args, **kwargs)
+    return _instrumentada
+
+
+class _Operacao:
+    linhas = 0
+    caminho = None
+
+
+class _Nulo:
+    def __enter__(self):
+        return _Operacao()
+
+    def __exit__(self, *excecao):
+        return False
+
+
+_NULO = _Nulo()
+
+
+@contextmanager
+def _medir_operacao(medicao, fase, caminho):
+    operacao = _Operacao()
+    operacao.caminho = caminho
+    inicio = time.perf_counter()
+    try:
+        yield operacao
+    except BaseException:
+        # Uma escrita que falhou não gerou linhas (e o arquivo pode ser de antes)
+        medicao.registrar_erro(fase, time.perf_counter() - inicio)
+        raise
+    medicao.registrar(fase, operacao.linhas, operacao.caminho, time.perf_counter() - inicio)
+
+
+def leitura(caminho=None):
+    """
+    Mede uma leitura da etapa em andamento: `with leitura(caminho) as op: df = ...;
+    op.linhas = len(df)`. Os bytes são o tamanho de `op.caminho` ao fim do bloco.
+    Fora de uma etapa, ou com a instrumentação desligada, não faz nada.
+    """
+    medicao = etapa_atual()
+    return _medir_operacao(medicao, 'leitura', caminho) if medicao is not None else _NULO
+
+
+def escrita(caminho=None):
+    """Como `leitura`, para uma escrita (o arquivo precisa estar fechado ao fim do bloco)."""
+    medicao = etapa_atual()
+    return _medir_operacao(medicao, 'escrita', caminho) if medicao is not None else _NULO
+
+
+def registrar_bytes(fase, caminho):
+    """Soma o tamanho de `caminho` aos bytes lidos ou escritos da etapa (ex: arquivo escrito em partes)."""
+    medicao = etapa_atual()
+    if medicao is not None:
+        medicao.registrar(fase, caminho=caminho, nova_operacao=False)
+
+
+def blocos_medidos(blocos, caminho=None):
+    """
+    Repassa os blocos de uma leitura em partes (ex: pd.read_csv com chunksize)
+    contando o tempo de cada `next` como leitura e as linhas de cada bloco.
+    """
+    medicao = etapa_atual()
+    if medicao is None:
+        yield from blocos
+        return
+    iterador = iter(blocos)
+    while True:
+        with _medir_operacao(medicao, 'leitura', None) as operacao:
+            bloco = next(iterador, None)
+            operacao.linhas = len(bloco) if bloco is not None else 0
+        if bloco is None:
+            break
+        yield bloco
+    if caminho:
+        registrar_bytes('leitura', caminho)
+
+
+def _emitir(registro, perfilador=None):
+    arquivo = os.environ[VARIAVEL_ARQUIVO]
+    formato = os.environ.get(VARIAVEL_FORMATO) or 'jsonl'
+    historico = arquivo if formato == 'jsonl' else arquivo + '.jsonl'
+    pasta = os.path.dirname(historico)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+
+    # Uma única escrita em modo append por registro: processos paralelos não intercalam linhas
+    with open(historico, 'a', encoding='utf-8') as saida:
+        saida.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    if perfilador is not None and perfilador.pilhas:
+        with open(arquivo + '.pilhas.txt', 'a', encoding='utf-8') as saida:
+            saida.write('\n'.join(perfilador.pilhas_colapsadas(registro['etapa'])) + '\n')
+    if formato == 'openmetrics':
+        temporario = f"{arquivo}.{os.getpid()}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as saida:
+            saida.write(para_openmetrics(carregar_registros(historico)))
+        os.replace(temporario, arquivo)
+
+
+def carregar_registros(arquivo):
+    """Registros de um arquivo de métricas JSONL (linhas inválidas são ignoradas)."""
+    registros = []
+    with open(arquivo, encoding='utf-8') as entrada:
+        for linha in entrada:
+            try:
+                registros.append(json.loads(linha))
+            except json.JSONDecodeError:
+                continue
+    return registros
+
+
+def _rotulos(**rotulos):
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{chave}="{escapar(valor)}"' for chave, valor in rotulos.items()) + '}'
+
+
+def para_openmetrics(registros):
+    """
+    Texto no formato OpenMetrics: os valores da última execução de cada etapa
+    (gauges) e as contagens de execuções e falhas (counters).
+    """
+    ultimos = {}
+    execucoes = Counter()
+    falhas = Counter()
+    for registro in registros:
+        ultimos[registro['etapa']] = registro
+        execucoes[registro['etapa']] += 1
+        falhas[registro['etapa']] += registro.get('erro') is not None
+
+    familias = [
+        ('tcc_etapa_segundos', 'gauge', "Tempo de relógio da última execução, total e por fase.",
+         lambda r: [({'fase': 'total'}, r['segundos'])]
+                   + [({'fase': fase}, segundos) for fase, segundos in r['fases'].items()]),
+        ('tcc_etapa_cpu_segundos', 'gauge', "Tempo de CPU do processo durante a última execução.",
+         lambda r: [({}, r['cpu_segundos'])]),
+        ('tcc_etapa_pico_memoria_bytes', 'gauge', "Pico de memória residente do processo ao fim da última execução.",
+         lambda r: [({}, int(r['pico_memoria_mb'] * 1024 * 1024))]),
+        ('tcc_etapa_linhas', 'gauge', "Linhas lidas e escritas na última execução.",
+         lambda r: [({'sentido': 'entrada'}, r['linhas_entrada']), ({'sentido': 'saida'}, r['linhas_saida'])]),
+        ('tcc_etapa_bytes', 'gauge', "Bytes lidos e escritos na última execução.",
+         lambda r: [({'sentido': 'lidos'}, r['bytes_lidos']), ({'sentido': 'escritos'}, r['bytes_escritos'])]),
+    ]
+    linhas = []
+    for nome, tipo, ajuda, amostras in familias:
+        linhas += [f"# TYPE {nome} {tipo}", f"# HELP {nome} {ajuda}"]
+        for nome_etapa, registro in ultimos.items():
+            for rotulos, valor in amostras(registro):
+                linhas.append(f"{nome}{_rotulos(etapa=nome_etapa, **rotulos)} {valor}")
+    for nome, contagens, ajuda in (('tcc_etapa_execucoes', execucoes, "Execuções registradas da etapa."),
+                                   ('tcc_etapa_falhas', falhas, "Execuções da etapa que terminaram com exceção.")):
+        linhas += [f"# TYPE {nome} counter", f"# HELP {nome} {ajuda}"]
+        linhas += [f"{nome}_total{_rotulos(etapa=nome_etapa)} {contagem}" for nome_etapa, contagem in contagens.items()]
+    linhas.append('# EOF')
+    return '\n'.join(linhas) + '\n'
+
+
+def resumir(arquivo):
+    """
+    Tabela com a mediana de cada métrica por etapa, ordenada pelo tempo total,
+    para achar as etapas (e, com o perfilador, as funções) mais caras.
+    """
+    import pandas as pd
+
+    registros = carregar_registros(arquivo)
+    if not registros:
+        return pd.DataFrame()
+    df = pd.json_normalize(registros)
+    colunas = ['segundos', 'cpu_segundos', 'fases.leitura', 'fases.transformacao', 'fases.escrita',
+               'pico_memoria_mb', 'linhas_entrada', 'linhas_saida', 'bytes_lidos', 'bytes_escritos']
+    resumo = df.groupby('etapa')[colunas].median()
+    resumo.insert(0, 'execucoes', df.groupby('etapa').size())
+    return resumo.sort_values('segundos', ascending=False)
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # Sem alterar os scripts, via variáveis de ambiente:
+    #   TCC_METRICAS=metricas.jsonl TCC_PERFILADOR=5 python pipeline.py
+    # Ou por este script, que configura e executa outro:
+    #   python instrumentacao.py --metricas metricas.prom --formato openmetrics pipeline.py --forcar dividir_colunas
+    #   python instrumentacao.py --resumo metricas.jsonl
+    parser = argparse.ArgumentParser(description="Executa um script com as etapas instrumentadas.")
+    parser.add_argument('--metricas', default='metricas.jsonl', help="Arquivo de saída das métricas.")
+    parser.add_argument('--formato', choices=FORMATOS, default='jsonl')
+    parser.add_argument('--perfilador', type=float, default=None,
+                        help="Liga o perfilador por amostragem, com esse intervalo em ms.")
+    parser.add_argument('--resumo', metavar='ARQUIVO_JSONL', help="Só mostra o resumo de um arquivo de métricas.")
+    parser.add_argument('script', nargs='?', help="Script a executar.")
+    parser.add_argument('argumentos', nargs=argparse.REMAINDER, help="Argumentos do script.")
+    argumentos = parser.parse_args()
+
+    if argumentos.resumo:
+        try:
+            print(resumir(argumentos.resumo).to_string())
+        except FileNotFoundError:
+            print(f"Erro: Arquivo de métricas '{argumentos.resumo}' não encontrado.")
+            raise SystemExit(1)
+        raise SystemExit(0)
+    if not argumentos.script:
+        parser.error("informe o script a executar ou --resumo.")
+
+    configurar(argumentos.metricas, argumentos.formato, argumentos.perfilador)
+    sys.argv = [argumentos.script] + argumentos.argumentos
+    sys.path.insert(0, os.path.dirname(os.path.abspath(argumentos.script)))
+    runpy.run_path(argumentos.script, run_name='__main__')
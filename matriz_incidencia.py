@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+from formatos_tabela import ler_tabela
+
+COLUNA_ID = 'ID'
+COLUNA_TECNOLOGIA = 'Nome_Ferramenta_Tecnologia'
+COLUNA_CATEGORIA = 'Categoria_Tecnologia'
+
+METRICAS = ('quantidade', 'lift', 'jaccard')
+
+
+def _exigir_scipy():
+    if sparse is None:
+        raise ImportError("A matriz de incidência requer o pacote 'scipy' (pip install scipy).")
+
+
+class MatrizIncidencia:
+    """
+    Matriz esparsa (CSR) empresa × tecnologia construída a partir da tabela longa
+    (Tecnologias_Unificadas): a célula (i, j) vale 1 se a empresa i usa a tecnologia j.
+
+    A matriz de coocorrência tecnologia × tecnologia é calculada de uma vez como o
+    produto esparso X.T @ X: a célula (a, b) é o número de empresas que usam a e b
+    juntas, e a diagonal é o número de empresas que usam cada tecnologia.
+
+    Uma tecnologia é identificada pelo nome; as categorias de cada nome ficam
+    guardadas à parte para permitir filtros (ex: "CDNs mais usadas junto com WordPress").
+
+    Args:
+        df_longo (DataFrame): Tabela com as colunas ID, Nome_Ferramenta_Tecnologia
+                              e Categoria_Tecnologia.
+    """
+
+    def __init__(self, df_longo):
+        _exigir_scipy()
+        pares = df_longo[[COLUNA_ID, COLUNA_TECNOLOGIA]].dropna().drop_duplicates()
+
+        codigos_empresa, self.empresas = pd.factorize(pares[COLUNA_ID], sort=True)
+        codigos_tecnologia, self.tecnologias = pd.factorize(pares[COLUNA_TECNOLOGIA], sort=True)
+        self._codigo_da_tecnologia = pd.Series(np.arange(len(self.tecnologias)), index=self.tecnologias)
+
+        uns = np.ones(len(pares), dtype=np.int32)
+        self.matriz = sparse.csr_matrix((uns, (codigos_empresa, codigos_tecnologia)),
+                                        shape=(len(self.empresas), len(self.tecnologias)))
+        self.total_empresas = len(self.empresas)
+        # Número de empresas que usam cada tecnologia (soma das colunas)
+        self.suporte = np.asarray(self.matriz.sum(axis=0)).ravel()
+
+        self._categorias = df_longo[[COLUNA_TECNOLOGIA, COLUNA_CATEGORIA]].dropna().drop_duplicates()
+        self._coocorrencia = None
+
+    @classmethod
+    def de_arquivo(cls, caminho, categorias=None):
+        """Constrói a matriz a partir de Tecnologias_Unificadas (CSV ou Parquet)."""
+        return cls(ler_tabela(caminho, colunas=[COLUNA_ID, COLUNA_TECNOLOGIA, COLUNA_CATEGORIA],
+                              categorias=categorias))
+
+    @property
+    def coocorrencia(self):
+        """Matriz CSR tecnologia × tecnologia (X.T @ X), calculada na primeira consulta."""
+        if self._coocorrencia is None:
+            transposta = self.matriz.T.tocsr()
+            self._coocorrencia = (transposta @ self.matriz).tocsr()
+        return self._coocorrencia
+
+    def codigo(self, tecnologia):
+        """Retorna a coluna da tecnologia na matriz (KeyError se não existir)."""
+        try:
+            return int(self._codigo_da_tecnologia[tecnologia])
+        except KeyError:
+            raise KeyError(f"Tecnologia '{tecnologia}' não encontrada na tabela.") from None
+
+    def codigos_da_categoria(self, categoria):
+        """Colunas das tecnologias que aparecem na categoria informada."""
+        nomes = self._categorias.loc[self._categorias[COLUNA_CATEGORIA] == categoria, COLUNA_TECNOLOGIA]
+        return self._codigo_da_tecnologia.reindex(nomes.unique()).dropna().to_numpy(dtype=np.int64)
+
+    def empresas_com(self, *tecnologias):
+        """IDs das empresas que usam TODAS as tecnologias informadas."""
+        colunas = [self.codigo(tecnologia) for tecnologia in tecnologias]
+        contagem = np.asarray(self.matriz[:, colunas].sum(axis=1)).ravel()
+        return self.empresas[contagem == len(colunas)]
+
+    def _metricas(self, a, b, quantidade):
+        # lift = P(a,b) / (P(a) P(b)); jaccard = |a ∩ b| / |a ∪ b|
+        suporte_a = self.suporte[a].astype(np.float64)
+        suporte_b = self.suporte[b].astype(np.float64)
+        lift = quantidade * self.total_empresas / (suporte_a * suporte_b)
+        jaccard = quantidade / (suporte_a + suporte_b - quantidade)
+        return lift, jaccard
+
+    def par(self, tecnologia_a, tecnologia_b):
+        """
+        Métricas de um par de tecnologias.
+
+        Returns:
+            dict: 'quantidade' (empresas que usam as duas), 'lift' e 'jaccard'.
+        """
+        a, b = self.codigo(tecnologia_a), self.codigo(tecnologia_b)
+        quantidade = int(self.coocorrencia[a, b])
+        lift, jaccard = self._metricas(a, b, quantidade)
+        return {'quantidade': quantidade, 'lift': float(lift), 'jaccard': float(jaccard)}
+
+    def top_coocorrentes(self, tecnologia, k=10, categoria=None, ordenar_por='quantidade'):
+        """
+        As k tecnologias mais usadas junto com `tecnologia`.
+
+        Args:
+            tecnologia (str): Nome da tecnologia de referência (ex: 'WordPress').
+            k (int): Quantidade de resultados.
+            categoria (str): Se informada, considera só tecnologias dessa categoria (ex: 'CDN').
+            ordenar_por (str): 'quantidade', 'lift' ou 'jaccard'.
+
+        Returns:
+            DataFrame: Colunas tecnologia, quantidade, lift e jaccard, em ordem decrescente.
+        """
+        if ordenar_por not in METRICAS:
+            raise ValueError(f"Métrica desconhecida '{ordenar_por}'. Use uma de {METRICAS}.")
+        a = self.codigo(tecnologia)
+
+        # Linha 'a' da coocorrência, lida direto dos vetores do CSR (só as células não nulas)
+        inicio, fim = self.coocorrencia.indptr[a], self.coocorrencia.indptr[a + 1]
+        vizinhos = self.coocorrencia.indices[inicio:fim]
+        quantidades = self.coocorrencia.data[inicio:fim]
+
+        manter = vizinhos != a
+        if categoria is not None:
+            manter &= np.isin(vizinhos, self.codigos_da_categoria(categoria))
+        vizinhos, quantidades = vizinhos[manter], quantidades[manter]
+
+        lift, jaccard = self._metricas(a, vizinhos, quantidades)
+        valores = {'quantidade': quantidades, 'lift': lift, 'jaccard': jaccard}[ordenar_por]
+
+        # argpartition seleciona os k maiores sem ordenar a linha inteira
+        if len(valores) > k:
+            selecionados = np.argpartition(-valores, k - 1)[:k]
+        else:
+            selecionados = np.arange(len(valores))
+        resultado = pd.DataFrame({
+            'tecnologia': self.tecnologias[vizinhos[selecionados]],
+            'quantidade': quantidades[selecionados],
+            'lift': lift[selecionados],
+            'jaccard': jaccard[selecionados],
+        })
+        return resultado.sort_values([ordenar_por, 'tecnologia'], ascending=[False, True]).reset_index(drop=True)
+
+    def pares(self, min_quantidade=1):
+        """
+        Todos os pares distintos (a < b) com pelo menos `min_quantidade` empresas em comum.
+
+        Returns:
+            DataFrame: Colunas tecnologia_a, tecnologia_b, quantidade, lift e jaccard.
+        """
+        triangular = sparse.triu(self.coocorrencia, k=1).tocoo()
+        manter = triangular.data >= min_quantidade
+        a, b, quantidade = triangular.row[manter], triangular.col[manter], triangular.data[manter]
+        lift, jaccard = self._metricas(a, b, quantidade)
+        return pd.DataFrame({
+            'tecnologia_a': self.tecnologias[a],
+            'tecnologia_b': self.tecnologias[b],
+            'quantidade': quantidade,
+            'lift': lift,
+            'jaccard': jaccard,
+        })
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # 1. Tabela longa gerada por unificar_tecnologias_csv.py (CSV ou Parquet)
+    arquivo_unificado = 'novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv'
+
+    matriz = MatrizIncidencia.de_arquivo(arquivo_unificado)
+    print(f"Matriz de incidência: {matriz.total_empresas} empresas × {len(matriz.tecnologias)} tecnologias "
+          f"({matriz.matriz.nnz} marcações).")
+
+    # 2. Quantas empresas usam duas tecnologias juntas
+    print("\nReact + Cloudflare:", matriz.par('React', 'Cloudflare'))
+
+    # 3. CDNs mais usadas junto com WordPress
+    print("\nCDNs mais usadas em sites WordPress:")
+    print(matriz.top_coocorrentes('WordPress', k=5, categoria='CDN').to_string(index=False))
@@ -0,0 +1,148 @@
+import os
+import re
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from formatos_tabela import ler_tabela
+
+# Versões entre parênteses (o mesmo regex de substituir_versoes.txt), ex: "jQuery (3.5.1)"
+REGEX_VERSAO_PARENTESES = re.compile(r'\([^)]*\)')
+# Versão no fim do nome, separada por espaço e com pelo menos um ponto, ex: "jQuery 3.5.1" ou
+# "PHP v8.1". Nomes como "TYPO3 CMS", "HTTP/2" ou "Select2" não são alterados.
+REGEX_VERSAO_FINAL = re.compile(r'\s+v?\d+(?:\.\d+)+[\w.+-]*$')
+REGEX_ESPACOS = re.compile(r'\s+')
+
+# Tabela de aliases (Nome_Original -> Nome_Canonico) usada pelo normalizador padrão,
+# ex: 'Jquery' -> 'jQuery'. A variável de ambiente troca a tabela neste processo e
+# nos processos criados por ele (as etapas paralelas).
+ARQUIVO_ALIASES_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'aliases_tecnologias.csv')
+VARIAVEL_ALIASES = 'TCC_ALIASES_TECNOLOGIAS'
+TAMANHO_CACHE_PADRAO = 65536
+
+
+class NormalizadorTecnologias:
+    """
+    Canoniza nomes de tecnologias: remove espaços nas pontas e repetidos, remove
+    versões, aplica o dicionário de aliases e internaliza a string resultante
+    (sys.intern), para que nomes iguais sejam o mesmo objeto na memória.
+
+    O resultado de cada nome bruto fica em um cache LRU; como há poucas centenas
+    de nomes distintos para dezenas de milhares de células, quase todas as
+    chamadas são acertos no cache.
+
+    Args:
+        aliases (dict): Nome limpo -> nome canônico (padrão: nenhum; ver carregar_aliases).
+        remover_versoes (bool): Se True, remove as versões dos nomes.
+        tamanho_cache (int): Máximo de nomes brutos guardados no cache.
+    """
+
+    def __init__(self, aliases=None, remover_versoes=True, tamanho_cache=TAMANHO_CACHE_PADRAO):
+        aliases = aliases or {}
+        self.aliases = {self._limpar(origem, remover_versoes): destino.strip()
+                        for origem, destino in aliases.items()}
+        self.remover_versoes = remover_versoes
+        self._normalizar = lru_cache(maxsize=tamanho_cache)(self._normalizar_sem_cache)
+
+    @staticmethod
+    def _limpar(nome, remover_versoes):
+        if remover_versoes:
+            nome = REGEX_VERSAO_PARENTESES.sub(' ', nome)
+            nome = REGEX_VERSAO_FINAL.sub('', nome.strip())
+        return REGEX_ESPACOS.sub(' ', nome).strip()
+
+    def _normalizar_sem_cache(self, nome):
+        nome = self._limpar(nome, self.remover_versoes)
+        return sys.intern(self.aliases.get(nome, nome))
+
+    def __call__(self, nome):
+        """Nome canônico de `nome`. Valores que não são texto (ex: NaN) são devolvidos como estão."""
+        if not isinstance(nome, str):
+            return nome
+        return self._normalizar(nome)
+
+    def normalizar_serie(self, serie):
+        """
+        Normaliza uma coluna inteira chamando o normalizador uma vez por valor distinto.
+
+        Args:
+            serie (Series): Coluna com os nomes brutos (valores nulos continuam nulos).
+
+        Returns:
+            Series: Nomes canônicos, com o mesmo índice e nome da coluna original. Uma
+                    coluna categórica volta como texto, já que os nomes normalizados
+                    não estão entre as categorias originais.
+        """
+        codigos, unicos = pd.factorize(serie)
+        # O código -1 (valor nulo) cai no último elemento, NaN
+        normalizados = np.array([self(valor) for valor in unicos] + [np.nan], dtype=object)
+        tipo = serie.cat.categories.dtype if isinstance(serie.dtype, pd.CategoricalDtype) else serie.dtype
+        return pd.Series(normalizados[codigos], index=serie.index, name=serie.name, dtype=tipo)
+
+    def info_cache(self):
+        """Acertos, falhas e tamanho atual do cache LRU."""
+        return self._normalizar.cache_info()
+
+
+def carregar_aliases(caminho_aliases):
+    """
+    Lê um dicionário de aliases de uma tabela com as colunas Nome_Original e Nome_Canonico.
+    """
+    tabela = ler_tabela(caminho_aliases)
+    faltando = [coluna for coluna in ('Nome_Original', 'Nome_Canonico') if coluna not in tabela.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no arquivo de aliases '{caminho_aliases}': {faltando}")
+    tabela = tabela[['Nome_Original', 'Nome_Canonico']].dropna().astype(str)
+    return dict(zip(tabela['Nome_Original'], tabela['Nome_Canonico']))
+
+
+def _criar_normalizador_padrao():
+    caminho_aliases = os.environ.get(VARIAVEL_ALIASES, ARQUIVO_ALIASES_PADRAO)
+    if not caminho_aliases:
+        return NormalizadorTecnologias()
+    return NormalizadorTecnologias(carregar_aliases(caminho_aliases))
+
+
+def configurar_aliases(caminho_aliases=None):
+    """
+    Troca a tabela de aliases do normalizador padrão, neste processo e nos
+    processos que ele criar.
+
+    Args:
+        caminho_aliases (str): Tabela com Nome_Original e Nome_Canonico. None volta
+                               para aliases_tecnologias.csv; '' desliga os aliases.
+    """
+    global normalizador_padrao
+    if caminho_aliases is None:
+        os.environ.pop(VARIAVEL_ALIASES, None)
+    else:
+        os.environ[VARIAVEL_ALIASES] = caminho_aliases
+    normalizador_padrao = _criar_normalizador_padrao()
+    return normalizador_padrao
+
+
+# Normalizador usado pelas etapas do pipeline (um por processo)
+normalizador_padrao = _criar_normalizador_padrao()
+
+
+def normalizar_tecnologia(nome):
+    """Nome canônico de uma tecnologia, pelo normalizador padrão."""
+    return normalizador_padrao(nome)
+
+
+def normalizar_serie(serie):
+    """Normaliza uma coluna de nomes de tecnologias pelo normalizador padrão."""
+    return normalizador_padrao.normalizar_serie(serie)
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    exemplos = ['jQuery  ', 'IIS ', 'Slick  ', 'jQuery (3.5.1)', 'PHP 8.1.2', 'TYPO3 CMS', 'HTTP/2', 'Jquery 3.6.0', 'Microsoft IIS']
+    for exemplo in exemplos:
+        print(f"{exemplo!r:>20} -> {normalizar_tecnologia(exemplo)!r}")
+    print(normalizador_padrao.info_cache())
+
+    # Outra tabela de aliases para as etapas do pipeline:
+    # configurar_aliases('meus_aliases.csv')
@@ -1,17 +1,19 @@
 import pandas as pd
 import sys # Para sair do script em caso de erro grave
+from catalogo_tabelas import ler
 
-def listar_valores_unicos_segunda_coluna(nome_arquivo):
+def listar_valores_unicos_segunda_coluna(nome_arquivo, catalogo=None):
     """
     Lê um arquivo CSV, extrai todos os valores únicos da segunda coluna
     (ignorando valores nulos/vazios) e os imprime.
 
     Args:
-        nome_arquivo (str): O caminho para o arquivo CSV a ser processado.
+        nome_arquivo (str): O caminho para o arquivo CSV (ou Parquet) a ser processado.
+        catalogo (CatalogoTabelas): Catálogo compartilhado, para não reler o arquivo (opcional).
     """
     try:
         # Tenta ler o arquivo CSV
-        df = pd.read_csv(nome_arquivo)
+        df = ler(nome_arquivo, catalogo)
         print(f"Arquivo '{nome_arquivo}' lido com sucesso.")
 
         # Verifica se o DataFrame tem pelo menos duas colunas
@@ -61,12 +63,13 @@ def listar_valores_unicos_segunda_coluna(nome_arquivo):
 #    Substitua 'seu_arquivo.csv' pelo nome real do seu arquivo.
 #    Certifique-se de que ele esteja na mesma pasta do script Python,
 #    ou forneça o caminho completo (ex: 'C:/pasta/seu_arquivo.csv').
-nome_do_arquivo_csv = 'tabelas_divididas_corrigido/cdn.csv'
+if __name__ == "__main__":
+    nome_do_arquivo_csv = 'tabelas_divididas_corrigido/cdn.csv'
 
 
-# 2. Chama a função para processar o arquivo definido acima
-listar_valores_unicos_segunda_coluna(nome_do_arquivo_csv)
+    # 2. Chama a função para processar o arquivo definido acima
+    listar_valores_unicos_segunda_coluna(nome_do_arquivo_csv)
 
-# Exemplo para outro arquivo (descomente para usar):
-# print("\n--- Analisando outro arquivo ---")
-# listar_valores_unicos_segunda_coluna('javascript_frameworks_new.csv')
+    # Exemplo para outro arquivo (descomente para usar):
+    # print("\n--- Analisando outro arquivo ---")
+    # listar_valores_unicos_segunda_coluna('javascript_frameworks_new.csv')
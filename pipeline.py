@@ -0,0 +1,378 @@
+import argparse
+import ast
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+ARQUIVO_ESTADO = '.estado_pipeline.json'
+
+
+class Etapa:
+    """
+    Uma etapa do pipeline: uma função de algum script, chamada com `parametros`,
+    que lê os caminhos em `entradas` e gera os caminhos em `saidas`.
+
+    Args:
+        nome (str): Nome único da etapa.
+        funcao (callable): Função de nível de módulo (precisa ser serializável
+                           para rodar em outro processo).
+        parametros (dict): Argumentos nomeados passados para a função.
+        entradas (list): Arquivos ou pastas lidos pela etapa.
+        saidas (list): Arquivos ou pastas gerados pela etapa.
+    """
+
+    def __init__(self, nome, funcao, parametros, entradas, saidas):
+        self.nome = nome
+        self.funcao = funcao
+        self.parametros = dict(parametros)
+        self.entradas = [os.path.normpath(caminho) for caminho in entradas]
+        self.saidas = [os.path.normpath(caminho) for caminho in saidas]
+
+    def __repr__(self):
+        return f"Etapa({self.nome!r})"
+
+
+def _contido_em(caminho, pasta):
+    return caminho == pasta or caminho.startswith(pasta + os.sep)
+
+
+def _atualizar_hash_caminho(hash_sha, caminho):
+    """Alimenta o hash com o conteúdo de um arquivo ou de todos os arquivos de uma pasta."""
+    if os.path.isdir(caminho):
+        arquivos = []
+        for raiz, pastas, nomes in os.walk(caminho):
+            pastas.sort()
+            arquivos.extend(os.path.join(raiz, nome) for nome in sorted(nomes))
+    elif os.path.exists(caminho):
+        arquivos = [caminho]
+    else:
+        hash_sha.update(f"ausente:{caminho}\n".encode('utf-8'))
+        return
+
+    for arquivo in arquivos:
+        hash_sha.update(f"arquivo:{os.path.relpath(arquivo, caminho)}\n".encode('utf-8'))
+        with open(arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                hash_sha.update(bloco)
+
+
+def modulos_locais(arquivo_fonte):
+    """
+    Arquivos-fonte dos módulos da mesma pasta que `arquivo_fonte` importa, direta ou
+    indiretamente (ex: formatos_tabela.py, normalizar_tecnologias.py), incluindo o
+    próprio arquivo, em ordem alfabética. Os imports são lidos do código (ast), sem
+    executar nada; bibliotecas externas ficam de fora.
+    """
+    pasta = os.path.dirname(os.path.abspath(arquivo_fonte))
+    encontrados = set()
+    pendentes = [os.path.abspath(arquivo_fonte)]
+    while pendentes:
+        arquivo = pendentes.pop()
+        if arquivo in encontrados:
+            continue
+        encontrados.add(arquivo)
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            arvore = ast.parse(f.read(), filename=arquivo)
+        for no in ast.walk(arvore):
+            if isinstance(no, ast.Import):
+                nomes = [alias.name for alias in no.names]
+            elif isinstance(no, ast.ImportFrom) and not no.level and no.module:
+                nomes = [no.module]
+            else:
+                continue
+            for nome in nomes:
+                candidato = os.path.join(pasta, nome.split('.')[0] + '.py')
+                if os.path.isfile(candidato):
+                    pendentes.append(candidato)
+    return sorted(encontrados)
+
+
+def assinatura_etapa(etapa):
+    """
+    SHA-256 do que determina o resultado da etapa: conteúdo das entradas, parâmetros
+    e o código-fonte do script que define a função e dos módulos do repositório que
+    ele importa (ver modulos_locais).
+    """
+    hash_sha = hashlib.sha256()
+    hash_sha.update(f"{etapa.funcao.__module__}.{etapa.funcao.__qualname__}\n".encode('utf-8'))
+    hash_sha.update(json.dumps(etapa.parametros, sort_keys=True, default=str).encode('utf-8'))
+    # unwrap: funções com @instrumentar apontariam para o código do decorador
+    arquivo_fonte = inspect.getsourcefile(inspect.unwrap(etapa.funcao))
+    if arquivo_fonte:
+        for modulo in modulos_locais(arquivo_fonte):
+            hash_sha.update(f"modulo:{os.path.basename(modulo)}\n".encode('utf-8'))
+            _atualizar_hash_caminho(hash_sha, modulo)
+    for entrada in sorted(etapa.entradas):
+        _atualizar_hash_caminho(hash_sha, entrada)
+    return hash_sha.hexdigest()
+
+
+def estado_saida(caminho):
+    """
+    (mtime em ns, tamanho, arquivos) de uma saída; para uma pasta, dos arquivos
+    dentro dela (o maior mtime e a soma dos tamanhos). None se ela não existe.
+    """
+    if not os.path.exists(caminho):
+        return None
+    if not os.path.isdir(caminho):
+        info = os.stat(caminho)
+        return info.st_mtime_ns, info.st_size, 1
+    mtime, tamanho, quantidade = os.stat(caminho).st_mtime_ns, 0, 0
+    for raiz, _, nomes in os.walk(caminho):
+        for nome in nomes:
+            info = os.stat(os.path.join(raiz, nome))
+            mtime, tamanho, quantidade = max(mtime, info.st_mtime_ns), tamanho + info.st_size, quantidade + 1
+    return mtime, tamanho, quantidade
+
+
+def saidas_nao_geradas(saidas, estados_anteriores):
+    """
+    Saídas que não existem ou que não mudaram desde `estados_anteriores` (ver
+    estado_saida). Os scripts imprimem o erro e retornam sem exceção, então uma
+    saída antiga intacta indica que a etapa falhou.
+    """
+    return [saida for saida in saidas
+            if estado_saida(saida) is None or estado_saida(saida) == estados_anteriores.get(saida)]
+
+
+def _executar_etapa(funcao, parametros):
+    # Executado no processo filho
+    funcao(**parametros)
+
+
+class Pipeline:
+    """
+    Executa as etapas como um grafo de dependências (DAG): uma etapa depende de
+    outra quando lê algo que a outra gera. Etapas cujas entradas, parâmetros e
+    código não mudaram desde a última execução bem-sucedida são puladas; etapas
+    independentes rodam em paralelo, em processos separados.
+
+    Args:
+        etapas (list): Lista de Etapa.
+        arquivo_estado (str): JSON com a assinatura da última execução de cada etapa.
+    """
+
+    def __init__(self, etapas, arquivo_estado=ARQUIVO_ESTADO):
+        nomes = [etapa.nome for etapa in etapas]
+        if len(set(nomes)) != len(nomes):
+            raise ValueError("Há etapas com nomes repetidos.")
+        self.etapas = {etapa.nome: etapa for etapa in etapas}
+        self.arquivo_estado = arquivo_estado
+        self.dependencias = self._montar_dependencias()
+        self.ordem = self._ordenar()
+
+    def _montar_dependencias(self):
+        dependencias = {nome: set() for nome in self.etapas}
+        for etapa in self.etapas.values():
+            for outra in self.etapas.values():
+                if outra is etapa:
+                    continue
+                if any(_contido_em(entrada, saida) or _contido_em(saida, entrada)
+                       for entrada in etapa.entradas for saida in outra.saidas):
+                    dependencias[etapa.nome].add(outra.nome)
+        return dependencias
+
+    def _ordenar(self):
+        """Ordem topológica (Kahn), mantendo a ordem de declaração entre etapas independentes."""
+        pendentes = {nome: set(deps) for nome, deps in self.dependencias.items()}
+        ordem = []
+        while pendentes:
+            prontas = [nome for nome in self.etapas if nome in pendentes and not pendentes[nome]]
+            if not prontas:
+                raise ValueError(f"Dependência circular entre as etapas: {sorted(pendentes)}")
+            for nome in prontas:
+                ordem.append(nome)
+                del pendentes[nome]
+            for deps in pendentes.values():
+                deps.difference_update(prontas)
+        return ordem
+
+    def _carregar_estado(self):
+        try:
+            with open(self.arquivo_estado, 'r', encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _salvar_estado(self, estado):
+        temporario = self.arquivo_estado + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado, arquivo, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(temporario, self.arquivo_estado)
+
+    def _esta_atualizada(self, etapa, estado, assinatura):
+        return (estado.get(etapa.nome, {}).get('assinatura') == assinatura
+                and all(os.path.exists(saida) for saida in etapa.saidas))
+
+    def registrar_como_atualizado(self, etapas=None):
+        """
+        Grava as assinaturas atuais sem executar nada, marcando as saídas existentes
+        como válidas (útil para adotar resultados já gerados ou corrigidos à mão).
+        """
+        estado = self._carregar_estado()
+        for nome in self.ordem:
+            if etapas is None or nome in etapas:
+                estado[nome] = {'assinatura': assinatura_etapa(self.etapas[nome])}
+                print(f"[registrada] {nome}")
+        self._salvar_estado(estado)
+
+    def executar(self, max_processos=None, simular=False, forcar=()):
+        """
+        Executa as etapas desatualizadas.
+
+        Args:
+            max_processos (int): Máximo de etapas em paralelo (None = número de CPUs).
+            simular (bool): Só mostra o que seria executado.
+            forcar (iterable): Nomes de etapas a executar mesmo se atualizadas.
+
+        Returns:
+            dict: Situação final de cada etapa ('pulada', 'executada', 'falhou',
+                  'cancelada' ou 'seria executada').
+        """
+        estado = self._carregar_estado()
+        situacao = {}
+
+        if simular:
+            # Sem executar, uma etapa é considerada alterada se alguma dependência for
+            for nome in self.ordem:
+                etapa = self.etapas[nome]
+                alterada = (nome in forcar
+                            or any(situacao[dep] != 'pulada' for dep in self.dependencias[nome])
+                            or not self._esta_atualizada(etapa, estado, assinatura_etapa(etapa)))
+                situacao[nome] = 'seria executada' if alterada else 'pulada'
+                print(f"[{situacao[nome]}] {nome}")
+            return situacao
+
+        restantes = list(self.ordem)
+        em_execucao = {}
+        with ProcessPoolExecutor(max_workers=max_processos) as executor:
+            while restantes or em_execucao:
+                for nome in list(restantes):
+                    dependencias = self.dependencias[nome]
+                    if any(situacao.get(dep) in ('falhou', 'cancelada') for dep in dependencias):
+                        situacao[nome] = 'cancelada'
+                        restantes.remove(nome)
+                        print(f"[cancelada] {nome} (dependência falhou)")
+                        continue
+                    if not all(dep in situacao for dep in dependencias):
+                        continue
+                    restantes.remove(nome)
+                    etapa = self.etapas[nome]
+                    assinatura = assinatura_etapa(etapa)
+                    if nome not in forcar and self._esta_atualizada(etapa, estado, assinatura):
+                        situacao[nome] = 'pulada'
+                        print(f"[pulada] {nome} (entradas inalteradas)")
+                        continue
+                    print(f"[executando] {nome}", flush=True)
+                    estados_anteriores = {saida: estado_saida(saida) for saida in etapa.saidas}
+                    futuro = executor.submit(_executar_etapa, etapa.funcao, etapa.parametros)
+                    em_execucao[futuro] = (nome, assinatura, estados_anteriores)
+
+                if not em_execucao:
+                    continue
+                concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    nome, assinatura, estados_anteriores = em_execucao.pop(futuro)
+                    etapa = self.etapas[nome]
+                    erro = futuro.exception()
+                    # Os scripts imprimem o erro e retornam; saídas ausentes ou intactas
+                    # (de uma execução anterior) indicam que a etapa falhou
+                    faltando = saidas_nao_geradas(etapa.saidas, estados_anteriores)
+                    if erro is not None or faltando:
+                        situacao[nome] = 'falhou'
+                        estado.pop(nome, None)
+                        motivo = f"{erro!r}" if erro is not None else f"saídas não geradas ou não atualizadas: {faltando}"
+                        print(f"[falhou] {nome}: {motivo}")
+                    else:
+                        situacao[nome] = 'executada'
+                        estado[nome] = {'assinatura': assinatura}
+                        print(f"[concluída] {nome}")
+                    self._salvar_estado(estado)
+
+        return situacao
+
+
+def etapas_padrao():
+    """Etapas dos scripts do repositório, com os mesmos caminhos dos blocos 'Como usar'."""
+    from remove_duplicates_and_replace_0_and_1_in_columns import processar_csv
+    from create_individuals_files_from_columns import processar_csv_split
+    from transferir_libs_para_libraries import transferir_bibliotecas
+    from unificar_tecnologias_csv import unificar_arquivos_tecnologia
+    from ajustar_setores_valor_para_exame import padronizar_setores_para_exame
+    from consolidar_valores_unicos import consolidar_valores_unicos_de_pasta
+    from agregados_setor_tecnologia import gerar_agregados
+    from exportar_banco_analitico import exportar_banco_analitico
+    from normalizar_tecnologias import ARQUIVO_ALIASES_PADRAO, VARIAVEL_ALIASES
+
+    planilha_bruta = 'PEC1_coleta_de_dados_Planilha_FINAL.csv'
+    planilha_sem_duplicatas = 'planilha_sem_duplicatas.csv'
+    pasta_tabelas = 'tabelas_divididas_corrigido'
+    pasta_refatorados = 'novos_arquivos_csv_refatorados'
+    tabela_principal = os.path.join(pasta_tabelas, 'tabela_principal.csv')
+    tabela_principal_exame = 'tabela_principal_padronizada_exame.csv'
+    arquivo_unificado = os.path.join(pasta_refatorados, 'Tecnologias_Unificadas.csv')
+    arquivo_agregados = os.path.join(pasta_refatorados, 'Agregados_Setor_Tecnologia.csv')
+    arquivo_banco = 'banco_analitico.sqlite'
+    # A tabela de aliases é lida pelo normalizador das etapas que geram nomes de tecnologia
+    arquivo_aliases = os.environ.get(VARIAVEL_ALIASES, ARQUIVO_ALIASES_PADRAO)
+    aliases = [os.path.relpath(arquivo_aliases)] if arquivo_aliases else []
+
+    return [
+        Etapa('remover_duplicatas', processar_csv,
+              {'nome_arquivo': planilha_bruta, 'pasta_destino': planilha_sem_duplicatas},
+              entradas=[planilha_bruta], saidas=[planilha_sem_duplicatas]),
+        Etapa('dividir_colunas', processar_csv_split,
+              {'nome_arquivo': planilha_sem_duplicatas, 'pasta_destino': pasta_tabelas},
+              entradas=[planilha_sem_duplicatas] + aliases, saidas=[pasta_tabelas]),
+        Etapa('transferir_bibliotecas', transferir_bibliotecas,
+              {'arquivo_frameworks_origem': os.path.join(pasta_tabelas, 'javascript_frameworks.csv'),
+               'arquivo_libraries_origem': os.path.join(pasta_tabelas, 'javascript_libraries.csv'),
+               'arquivo_frameworks_destino': os.path.join(pasta_refatorados, 'javascript_frameworks_new.csv'),
+               'arquivo_libraries_destino': os.path.join(pasta_refatorados, 'javascript_libraries_new.csv')},
+              entradas=[os.path.join(pasta_tabelas, 'javascript_frameworks.csv'),
+                        os.path.join(pasta_tabelas, 'javascript_libraries.csv'),
+                        'regras_reclassificacao.csv'],
+              saidas=[os.path.join(pasta_refatorados, 'javascript_frameworks_new.csv'),
+                      os.path.join(pasta_refatorados, 'javascript_libraries_new.csv')]),
+        Etapa('unificar_tecnologias', unificar_arquivos_tecnologia,
+              {'pasta_entrada': pasta_tabelas, 'arquivo_saida': arquivo_unificado},
+              entradas=[pasta_tabelas] + aliases, saidas=[arquivo_unificado]),
+        Etapa('padronizar_setores', padronizar_setores_para_exame,
+              {'arquivo_entrada': tabela_principal, 'arquivo_saida': tabela_principal_exame},
+              entradas=[tabela_principal], saidas=[tabela_principal_exame]),
+        Etapa('consolidar_valores_unicos', consolidar_valores_unicos_de_pasta,
+              {'pasta_entrada': pasta_tabelas, 'arquivo_saida': 'consolidado_valores_unicos.csv'},
+              entradas=[pasta_tabelas], saidas=['consolidado_valores_unicos.csv']),
+        Etapa('agregados_setor_tecnologia', gerar_agregados,
+              {'arquivo_unificado': arquivo_unificado, 'arquivo_principal': tabela_principal_exame,
+               'arquivo_saida': arquivo_agregados, 'pasta_estado': '.estado_agregados'},
+              entradas=[arquivo_unificado, tabela_principal_exame], saidas=[arquivo_agregados]),
+        Etapa('banco_analitico', exportar_banco_analitico,
+              {'arquivo_principal': tabela_principal_exame, 'arquivo_unificado': arquivo_unificado,
+               'arquivo_banco': arquivo_banco},
+              entradas=[tabela_principal_exame, arquivo_unificado], saidas=[arquivo_banco]),
+    ]
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # python pipeline.py                    -> executa só as etapas com entradas alteradas
+    # python pipeline.py --simular          -> mostra o que seria executado
+    # python pipeline.py --forcar unificar_tecnologias
+    # python pipeline.py --registrar        -> marca as saídas atuais como válidas, sem executar
+    parser = argparse.ArgumentParser(description="Executa o pipeline de tratamento dos dados de forma incremental.")
+    parser.add_argument('--simular', action='store_true', help="Só mostra quais etapas seriam executadas.")
+    parser.add_argument('--forcar', nargs='*', default=[], help="Etapas a executar mesmo sem alterações.")
+    parser.add_argument('--registrar', action='store_true',
+                        help="Grava as assinaturas atuais sem executar (adota as saídas existentes).")
+    parser.add_argument('--processos', type=int, default=None, help="Máximo de etapas em paralelo.")
+    argumentos = parser.parse_args()
+
+    pipeline = Pipeline(etapas_padrao())
+    if argumentos.registrar:
+        pipeline.registrar_como_atualizado()
+    else:
+        pipeline.executar(max_processos=argumentos.processos, simular=argumentos.simular,
+                          forcar=set(argumentos.forcar))
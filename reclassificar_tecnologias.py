@@ -0,0 +1,219 @@
+import os
+import numpy as np
+import pandas as pd
+from create_individuals_files_from_columns import salvar_tabelas_por_categoria
+from formatos_tabela import ler_tabela, salvar_tabela
+from tabela_compacta import FORMATO_COMPACTO, TabelaCompacta, ler_tabela_longa, salvar_tabela_longa
+
+COLUNA_ID = 'ID'
+COLUNA_TECNOLOGIA = 'Nome_Ferramenta_Tecnologia'
+COLUNA_CATEGORIA = 'Categoria_Tecnologia'
+COLUNAS_REGRAS = [COLUNA_TECNOLOGIA, 'Categoria_Origem', 'Categoria_Destino']
+
+
+def carregar_regras(caminho_regras):
+    """
+    Lê a tabela de regras de reclassificação, com uma regra por linha:
+    (Nome_Ferramenta_Tecnologia, Categoria_Origem) -> Categoria_Destino.
+
+    Regras repetidas são ignoradas; a mesma origem com destinos diferentes é um erro.
+    """
+    regras = ler_tabela(caminho_regras)
+    faltando = [coluna for coluna in COLUNAS_REGRAS if coluna not in regras.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no arquivo de regras '{caminho_regras}': {faltando}")
+    return validar_regras(regras)
+
+
+def validar_regras(regras):
+    """Remove espaços e regras repetidas e verifica se cada origem tem um único destino."""
+    regras = regras[COLUNAS_REGRAS].dropna().astype(str)
+    regras = regras.apply(lambda coluna: coluna.str.strip()).drop_duplicates()
+    regras = regras[regras['Categoria_Origem'] != regras['Categoria_Destino']]
+
+    conflitos = regras[regras.duplicated([COLUNA_TECNOLOGIA, 'Categoria_Origem'], keep=False)]
+    if not conflitos.empty:
+        raise ValueError("Regras conflitantes (mesma tecnologia e origem com destinos diferentes):\n"
+                         + conflitos.sort_values(COLUNAS_REGRAS).to_string(index=False))
+    return regras.reset_index(drop=True)
+
+
+def reclassificar(df_longo, regras, remover_duplicadas=True):
+    """
+    Aplica as regras à tabela longa inteira em uma única junção por hash
+    (merge em (tecnologia, categoria)), em vez de um isin por regra.
+
+    As regras são aplicadas uma vez só (não encadeiam A -> B -> C).
+
+    Args:
+        df_longo (DataFrame): Tabela longa (ID, Nome_Ferramenta_Tecnologia, Categoria_Tecnologia).
+        regras (DataFrame): Regras já validadas (ver carregar_regras / validar_regras).
+        remover_duplicadas (bool): Se True, descarta as linhas movidas para uma categoria
+                                   onde a empresa já tinha a mesma tecnologia.
+
+    Returns:
+        tuple: (tabela reclassificada, auditoria das linhas movidas). A auditoria tem
+               ID, Nome_Ferramenta_Tecnologia, Categoria_Origem, Categoria_Destino e
+               Duplicada (True se a linha foi descartada por já existir no destino).
+    """
+    regras = regras.rename(columns={'Categoria_Origem': COLUNA_CATEGORIA})
+    juntado = df_longo.merge(regras, on=[COLUNA_TECNOLOGIA, COLUNA_CATEGORIA], how='left',
+                             sort=False, validate='many_to_one')
+    movidas = juntado['Categoria_Destino'].notna().to_numpy()
+
+    resultado = df_longo.copy()
+    resultado.loc[movidas, COLUNA_CATEGORIA] = juntado.loc[movidas, 'Categoria_Destino'].to_numpy()
+
+    auditoria = juntado.loc[movidas, [COLUNA_ID, COLUNA_TECNOLOGIA, COLUNA_CATEGORIA, 'Categoria_Destino']]
+    auditoria = auditoria.rename(columns={COLUNA_CATEGORIA: 'Categoria_Origem'})
+    auditoria['Duplicada'] = False
+
+    if remover_duplicadas:
+        # As linhas que não foram movidas vêm primeiro (ordenação estável), para que
+        # a cópia descartada seja sempre a movida
+        ordem = pd.Series(movidas, index=resultado.index).sort_values(kind='stable').index
+        duplicadas = resultado.loc[ordem].duplicated([COLUNA_ID, COLUNA_TECNOLOGIA, COLUNA_CATEGORIA])
+        duplicadas = duplicadas.reindex(resultado.index).to_numpy()
+        auditoria['Duplicada'] = duplicadas[movidas]
+        resultado = resultado[~duplicadas]
+
+    return resultado.reset_index(drop=True), auditoria.reset_index(drop=True)
+
+
+def reclassificar_compacta(tabela, regras, remover_duplicadas=True):
+    """
+    Mesmo resultado de `reclassificar`, sobre uma TabelaCompacta: as regras viram
+    códigos (tecnologia, categoria de origem) -> categoria de destino, e a busca
+    e a remoção de duplicatas são feitas sobre inteiros.
+
+    Args:
+        tabela (TabelaCompacta): Tabela longa codificada.
+        regras (DataFrame): Regras já validadas (ver carregar_regras / validar_regras).
+        remover_duplicadas (bool): Se True, descarta as linhas movidas para uma categoria
+                                   onde a empresa já tinha a mesma tecnologia.
+
+    Returns:
+        tuple: (TabelaCompacta reclassificada, auditoria das linhas movidas), com a
+               auditoria no mesmo formato de `reclassificar`.
+    """
+    # Categorias de destino novas entram no dicionário (que continua em ordem alfabética)
+    nomes_categorias = np.unique(np.concatenate([tabela.nomes_categorias,
+                                                 regras['Categoria_Destino'].to_numpy(dtype=object)]))
+    categorias = np.searchsorted(nomes_categorias, tabela.nomes_categorias)[tabela.categorias]
+    tabela = TabelaCompacta(tabela.ids, tabela.tecnologias, categorias, tabela.nomes_tecnologias, nomes_categorias)
+
+    tecnologia_regra = pd.Index(tabela.nomes_tecnologias).get_indexer(regras[COLUNA_TECNOLOGIA])
+    origem_regra = pd.Index(nomes_categorias).get_indexer(regras['Categoria_Origem'])
+    aplicaveis = (tecnologia_regra >= 0) & (origem_regra >= 0)
+    quantidade_categorias = len(nomes_categorias)
+    chaves_regras = pd.Index(tecnologia_regra[aplicaveis].astype(np.int64) * quantidade_categorias
+                             + origem_regra[aplicaveis])
+    destinos = np.searchsorted(nomes_categorias, regras['Categoria_Destino'].to_numpy(dtype=object)[aplicaveis])
+
+    chaves = tabela.tecnologias.astype(np.int64) * quantidade_categorias + tabela.categorias
+    regra_da_linha = chaves_regras.get_indexer(chaves)
+    movidas = (regra_da_linha >= 0) & (tabela.tecnologias >= 0)
+
+    categorias = tabela.categorias.copy()
+    categorias[movidas] = destinos[regra_da_linha[movidas]]
+    resultado = TabelaCompacta(tabela.ids, tabela.tecnologias, categorias, tabela.nomes_tecnologias, nomes_categorias)
+
+    auditoria = pd.DataFrame({
+        COLUNA_ID: tabela.ids[movidas],
+        COLUNA_TECNOLOGIA: tabela.nomes_tecnologias[tabela.tecnologias[movidas]],
+        'Categoria_Origem': nomes_categorias[tabela.categorias[movidas]],
+        'Categoria_Destino': nomes_categorias[categorias[movidas]],
+        'Duplicada': False,
+    })
+
+    if remover_duplicadas and movidas.any():
+        # As linhas que não foram movidas vêm primeiro (ordenação estável), para que
+        # a cópia descartada seja sempre a movida
+        ordem = np.argsort(movidas, kind='stable')
+        codigos = pd.DataFrame({'id': resultado.ids[ordem], 'tecnologia': resultado.tecnologias[ordem],
+                                'categoria': resultado.categorias[ordem]})
+        duplicadas = np.empty(len(resultado), dtype=bool)
+        duplicadas[ordem] = codigos.duplicated().to_numpy()
+        auditoria['Duplicada'] = duplicadas[movidas]
+        mantidas = ~duplicadas
+        resultado = TabelaCompacta(resultado.ids[mantidas], resultado.tecnologias[mantidas],
+                                   resultado.categorias[mantidas], resultado.nomes_tecnologias, nomes_categorias)
+
+    return resultado, auditoria
+
+
+def resumo_auditoria(auditoria):
+    """Quantidade de linhas movidas por (Categoria_Origem, Categoria_Destino)."""
+    return (auditoria.groupby(['Categoria_Origem', 'Categoria_Destino'], sort=True)
+            .size().rename('Linhas_Movidas').reset_index())
+
+
+def projetar_categoria(df_longo, categoria):
+    """Tabela N:N ('ID', <categoria>) de uma categoria da tabela longa."""
+    tabela = df_longo.loc[df_longo[COLUNA_CATEGORIA] == categoria, [COLUNA_ID, COLUNA_TECNOLOGIA]]
+    return tabela.rename(columns={COLUNA_TECNOLOGIA: categoria}).reset_index(drop=True)
+
+
+def reclassificar_tabela_unificada(arquivo_unificado, arquivo_regras, arquivo_saida, arquivo_auditoria,
+                                   pasta_categorias=None, formato='csv'):
+    """
+    Aplica as regras de reclassificação a Tecnologias_Unificadas e salva a tabela
+    corrigida, a auditoria das linhas movidas e (opcionalmente) os arquivos N:N
+    por categoria.
+
+    Args:
+        arquivo_unificado (str): Tabela longa de entrada (CSV, Parquet ou .npz compacto).
+        arquivo_regras (str): Tabela de regras (ex: 'regras_reclassificacao.csv').
+        arquivo_saida (str): Tabela longa reclassificada.
+        arquivo_auditoria (str): Linhas movidas, com origem e destino.
+        pasta_categorias (str): Se informada, salva um arquivo N:N por categoria nela.
+        formato (str): 'csv', 'parquet' ou 'compacto' (tabela reclassificada em
+                       .npz; a auditoria e as tabelas N:N ficam em CSV).
+    """
+    try:
+        tabela = ler_tabela_longa(arquivo_unificado)
+        print(f"Arquivo '{arquivo_unificado}' lido com sucesso ({len(tabela)} linhas).")
+        regras = carregar_regras(arquivo_regras)
+        print(f"{len(regras)} regras de reclassificação carregadas de '{arquivo_regras}'.")
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo não encontrado: {e}")
+        return
+    except ValueError as e:
+        print(f"Erro nas regras de reclassificação: {e}")
+        return
+    except Exception as e:
+        print(f"Erro ao ler os arquivos de entrada: {e}")
+        return
+
+    tabela_reclassificada, auditoria = reclassificar_compacta(tabela, regras)
+    print(f"{len(auditoria)} linhas reclassificadas "
+          f"({int(auditoria['Duplicada'].sum())} descartadas por já existirem no destino).")
+    for linha in resumo_auditoria(auditoria).itertuples(index=False):
+        print(f"  - {linha.Categoria_Origem} -> {linha.Categoria_Destino}: {linha.Linhas_Movidas}")
+
+    formato_tabelas = 'csv' if formato == FORMATO_COMPACTO else formato
+    try:
+        arquivo_saida = salvar_tabela_longa(tabela_reclassificada, arquivo_saida, formato)
+        print(f"Tabela reclassificada salva em '{arquivo_saida}'.")
+        arquivo_auditoria = salvar_tabela(auditoria, arquivo_auditoria, formato_tabelas)
+        print(f"Auditoria salva em '{arquivo_auditoria}'.")
+    except Exception as e:
+        print(f"Erro ao salvar os resultados: {e}")
+        return
+
+    if pasta_categorias:
+        os.makedirs(pasta_categorias, exist_ok=True)
+        df_reclassificado = tabela_reclassificada.para_dataframe(categorico=False)
+        categorias = ['ID'] + sorted(df_reclassificado[COLUNA_CATEGORIA].dropna().unique())
+        salvar_tabelas_por_categoria(df_reclassificado, pasta_categorias, categorias, formato_tabelas)
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    arquivo_unificado = 'novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv'
+    # Uma regra por linha: Nome_Ferramenta_Tecnologia,Categoria_Origem,Categoria_Destino
+    arquivo_regras = 'regras_reclassificacao.csv'
+    arquivo_saida = 'novos_arquivos_csv_refatorados/Tecnologias_Reclassificadas.csv'
+    arquivo_auditoria = 'novos_arquivos_csv_refatorados/auditoria_reclassificacao.csv'
+
+    reclassificar_tabela_unificada(arquivo_unificado, arquivo_regras, arquivo_saida, arquivo_auditoria)
@@ -1,7 +1,67 @@
+import re
 import pandas as pd
 import numpy as np # Import numpy para lidar com NaN se necessário
+from carregador_csv import ESQUEMA_PLANILHA, carregar_csv, converter_para_booleano, detectar_encoding
+from formatos_tabela import EscritorIncremental, salvar_tabela
+from instrumentacao import blocos_medidos, instrumentar
 
-def processar_csv(nome_arquivo, pasta_destino):
+COLUNAS_BOOLEANAS = ['SSL/TLS enabled', 'Responsive']
+
+# Espaços em volta do separador ';' não diferenciam duas linhas
+REGEX_SEPARADOR = re.compile(r'\s*;\s*')
+
+def hashes_das_linhas(df, colunas):
+    """
+    Impressão digital de 64 bits de cada linha, calculada sobre as colunas
+    informadas depois de normalizadas (texto sem espaços nas pontas nem em
+    volta dos ';'; células vazias e nulas são iguais).
+
+    Cada valor distinto de uma coluna é normalizado e hasheado uma vez só;
+    as linhas combinam os hashes dos seus valores.
+    """
+    hashes_colunas = {}
+    for coluna in colunas:
+        codigos, unicos = pd.factorize(df[coluna])
+        normalizados = pd.Series(unicos, dtype=object).astype(str).str.strip().str.replace(REGEX_SEPARADOR, ';', regex=True)
+        # O código -1 (célula nula) cai no último elemento, o hash do texto vazio
+        hashes_unicos = pd.util.hash_array(np.append(normalizados.to_numpy(dtype=object), ''))
+        hashes_colunas[coluna] = hashes_unicos[codigos]
+    return pd.util.hash_pandas_object(pd.DataFrame(hashes_colunas, index=df.index), index=False).to_numpy()
+
+class ConjuntoHashes:
+    """
+    Conjunto compacto de hashes uint64 (8 bytes por linha distinta), guardado
+    como poucas sequências ordenadas: cada bloco novo vira uma sequência, e
+    sequências de tamanho parecido são fundidas (como numa LSM-tree), então o
+    número de sequências cresce só com o logaritmo do total.
+    """
+
+    def __init__(self):
+        self._sequencias = []
+
+    def __len__(self):
+        return sum(len(sequencia) for sequencia in self._sequencias)
+
+    def contem(self, hashes):
+        """Máscara booleana: quais dos hashes já estão no conjunto."""
+        presentes = np.zeros(len(hashes), dtype=bool)
+        for sequencia in self._sequencias:
+            posicoes = np.searchsorted(sequencia, hashes)
+            posicoes[posicoes == len(sequencia)] = 0
+            presentes |= sequencia[posicoes] == hashes
+        return presentes
+
+    def adicionar(self, hashes):
+        """Adiciona hashes que ainda não estão no conjunto."""
+        if len(hashes) == 0:
+            return
+        self._sequencias.append(np.unique(hashes))
+        while len(self._sequencias) > 1 and len(self._sequencias[-2]) <= 2 * len(self._sequencias[-1]):
+            ultima = self._sequencias.pop()
+            self._sequencias[-1] = np.union1d(self._sequencias[-1], ultima)
+
+@instrumentar
+def processar_csv(nome_arquivo, pasta_destino, formato='csv'):
     """
     Processa um arquivo CSV, removendo duplicatas e convertendo colunas
     específicas para tipo booleano, lidando com diversos formatos de entrada.
@@ -9,22 +69,21 @@ def processar_csv(nome_arquivo, pasta_destino):
     Args:
       nome_arquivo: O nome do arquivo CSV a ser processado.
       pasta_destino: A pasta onde o novo arquivo CSV será salvo.
+      formato: Formato do arquivo de saída ('csv' ou 'parquet').
     """
-    # --- Leitura com tentativa de encoding ---
+    # --- Leitura com esquema declarado (encoding detectado por uma amostra) ---
     try:
-        # Tente UTF-8 primeiro, que é mais comum
-        df = pd.read_csv(nome_arquivo, encoding='utf-8')
-        print("Arquivo lido com encoding UTF-8.")
-    except UnicodeDecodeError:
-        try:
-            # Se UTF-8 falhar, tente latin1 (comum em sistemas Windows antigos/Europa Ocidental)
-            df = pd.read_csv(nome_arquivo, encoding='latin1')
-            print("Arquivo lido com encoding latin1.")
-        except Exception as e:
-            print(f"Erro ao ler CSV com UTF-8 e latin1: {e}")
-            return # Não continuar se não conseguir ler o arquivo
-
-    print("\nTipos de dados ANTES do processamento:")
+        # As colunas booleanas já são convertidas aqui (carregador_csv.py)
+        df, encoding = carregar_csv(nome_arquivo, ESQUEMA_PLANILHA)
+        print(f"Arquivo lido com encoding {encoding}.")
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado em '{nome_arquivo}'")
+        return
+    except Exception as e:
+        print(f"Erro ao ler o arquivo CSV '{nome_arquivo}': {e}")
+        return # Não continuar se não conseguir ler o arquivo
+
+    print("\nTipos de dados lidos:")
     print(df.dtypes)
 
     # Remover linhas duplicadas 
@@ -36,60 +95,115 @@ def processar_csv(nome_arquivo, pasta_destino):
          return
 
 
-    # --- Conversão para Booleano Aprimorada ---
-    print("\nIniciando conversão para booleano...")
-    for coluna in ['SSL/TLS enabled', 'Responsive']:
-        if coluna in df.columns:
-            print(f"Processando coluna: {coluna}")
-            # Armazenar tipo original para comparação
-            dtype_original = df[coluna].dtype
-
-            # 1. (Opcional, mas recomendado) Padronizar strings para maiúsculas e sem espaços extras
-            #    Isso simplifica o mapa. Só aplica se for string.
-            if pd.api.types.is_string_dtype(df[coluna]):
-                 df[coluna] = df[coluna].str.strip().str.upper()
-
-            # 2. Criar o mapa abrangente para todos os casos vistos (e alguns extras por segurança)
-            mapa_booleano = {
-                '1': True, 'TRUE': True,  # Strings
-                1: True, 1.0: True,      # Números (int, float)
-                '0': False, 'FALSE': False, # Strings
-                0: False, 0.0: False      # Números (int, float)
-                # Valores como '', None, np.nan serão mapeados para NaN por padrão pelo .map
-            }
-
-            # 3. Aplicar o mapa. Valores não encontrados no mapa viram NaN.
-            df[coluna] = df[coluna].map(mapa_booleano)
-
-            # 4. Converter explicitamente para o tipo booleano anulável do Pandas ('boolean')
-            #    Este tipo pode conter True, False, e <NA> (o indicador de ausente do Pandas)
-            try:
-                df[coluna] = df[coluna].astype('boolean')
-                print(f" -> Coluna '{coluna}' convertida para tipo 'boolean'. Tipo anterior: {dtype_original}")
-            except Exception as e:
-                print(f" -> ERRO ao converter coluna '{coluna}' para 'boolean': {e}")
-                print(f" -> Valores únicos após map em '{coluna}': {df[coluna].unique()}")
-
-
-    print("\nTipos de dados DEPOIS da conversão booleana:")
-    print(df.dtypes)
+    # --- Conferência das colunas booleanas ---
+    # O tipo 'boolean' (anulável) pode conter True, False, e <NA> (o indicador de ausente do Pandas)
+    for coluna in COLUNAS_BOOLEANAS:
+        if coluna in df.columns and df[coluna].dtype != 'boolean':
+            print(f"Aviso: coluna '{coluna}' não foi lida como booleana ({df[coluna].dtype}); convertendo.")
+            df[coluna] = converter_para_booleano(df[coluna])
+
     # Opcional: Ver valores únicos depois
     if 'SSL/TLS enabled' in df.columns:
-        print("\nValores únicos em 'SSL/TLS enabled' (DEPOIS):", df['SSL/TLS enabled'].unique())
+        print("\nValores únicos em 'SSL/TLS enabled':", df['SSL/TLS enabled'].unique())
     if 'Responsive' in df.columns:
-        print("Valores únicos em 'Responsive' (DEPOIS):", df['Responsive'].unique())
+        print("Valores únicos em 'Responsive':", df['Responsive'].unique())
 
     # --- Salvar o CSV ---
     try:
         # É uma boa prática especificar o encoding na escrita também, preferencialmente utf-8
-        df.to_csv(pasta_destino, index=False, encoding='utf-8')
-        print(f"\nArquivo processado salvo em: {pasta_destino}")
+        caminho_salvo = salvar_tabela(df, pasta_destino, formato)
+        print(f"\nArquivo processado salvo em: {caminho_salvo}")
     except Exception as e:
         print(f"Erro ao salvar o arquivo CSV: {e}")
 
 
+@instrumentar
+def processar_csv_streaming(nome_arquivo, pasta_destino, tamanho_chunk=100_000, formato='csv', encoding=None):
+    """
+    Versão em streaming de processar_csv, para arquivos maiores que a memória.
+    Lê o CSV em blocos de `tamanho_chunk` linhas e guarda só um hash de 64 bits
+    de cada linha distinta (ver hashes_das_linhas e ConjuntoHashes); uma linha
+    só é escrita na primeira vez em que suas colunas de tecnologia aparecem.
+
+    A memória usada é o bloco atual mais 8 bytes por linha distinta. Com 64
+    bits, a chance de duas linhas diferentes terem o mesmo hash é desprezível
+    (cerca de 1 em 40 milhões para 1 milhão de linhas distintas).
+
+    Args:
+      nome_arquivo: O nome do arquivo CSV a ser processado.
+      pasta_destino: O arquivo de saída (como em processar_csv).
+      tamanho_chunk: Quantidade de linhas lidas por bloco.
+      formato: Formato do arquivo de saída ('csv' ou 'parquet'; no Parquet cada
+               bloco vira um row group).
+      encoding: Encoding do arquivo. Se None, é detectado por uma amostra (detectar_encoding).
+    """
+    try:
+        encoding = encoding or detectar_encoding(nome_arquivo)
+        colunas = list(pd.read_csv(nome_arquivo, nrows=0, encoding=encoding).columns)
+        print(f"Arquivo lido em blocos com encoding {encoding}.")
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado em '{nome_arquivo}'")
+        return
+    except Exception as e:
+        print(f"Erro ao ler o arquivo CSV '{nome_arquivo}': {e}")
+        return
+
+    if len(colunas) < 3:
+        print("Erro: CSV não parece ter colunas suficientes para usar as colunas a partir da terceira. Verifique o índice inicial.")
+        return
+    colunas_tecnologia = colunas[2:]
+
+    vistos = ConjuntoHashes()
+    linhas_lidas = linhas_escritas = 0
+    escritor = None
+    try:
+        escritor = EscritorIncremental(pasta_destino, colunas, formato)
+        blocos = pd.read_csv(nome_arquivo, dtype=str, encoding=encoding, chunksize=tamanho_chunk)
+        for numero, chunk in enumerate(blocos_medidos(blocos, nome_arquivo), start=1):
+            hashes = hashes_das_linhas(chunk, colunas_tecnologia)
+
+            # Primeira ocorrência dentro do bloco que ainda não apareceu nos blocos anteriores
+            primeiras = np.zeros(len(hashes), dtype=bool)
+            primeiras[np.unique(hashes, return_index=True)[1]] = True
+            primeiras &= ~vistos.contem(hashes)
+            vistos.adicionar(hashes[primeiras])
+
+            chunk = chunk[primeiras]
+            for coluna in COLUNAS_BOOLEANAS:
+                if coluna in chunk.columns:
+                    chunk[coluna] = converter_para_booleano(chunk[coluna])
+            escritor.escrever(chunk)
+
+            linhas_lidas += len(primeiras)
+            linhas_escritas += len(chunk)
+            print(f"  Bloco {numero} processado ({len(primeiras)} linhas, {len(chunk)} novas).")
+    except UnicodeDecodeError:
+        if escritor is not None:
+            escritor.fechar()
+            escritor = None
+        if encoding == 'latin1':
+            print("Erro ao ler CSV com UTF-8 e latin1.")
+            return
+        # O trecho inválido estava depois da amostra; latin1 aceita qualquer byte
+        print("Aviso: o arquivo não é UTF-8 válido depois da amostra; reprocessando com latin1.")
+        return processar_csv_streaming(nome_arquivo, pasta_destino, tamanho_chunk, formato, encoding='latin1')
+    except Exception as e:
+        print(f"Erro durante o processamento em streaming: {e}")
+        return
+    finally:
+        if escritor is not None:
+            escritor.fechar()
+
+    print(f"\n{linhas_lidas - linhas_escritas} duplicatas removidas de {linhas_lidas} linhas.")
+    print(f"Arquivo processado salvo em: {escritor.caminho}")
+
+
 # Exemplo de uso
-nome_arquivo = 'PEC1_coleta_de_dados_Planilha_FINAL.csv'
-pasta_destino = 'planilha_sem_duplicatas.csv'
+if __name__ == "__main__":
+    nome_arquivo = 'PEC1_coleta_de_dados_Planilha_FINAL.csv'
+    pasta_destino = 'planilha_sem_duplicatas.csv'
+
+    processar_csv(nome_arquivo, pasta_destino)
 
-processar_csv(nome_arquivo, pasta_destino)
\ No newline at end of file
+    # Alternativa para arquivos maiores que a memória: lê em blocos e guarda só um hash por linha
+    # processar_csv_streaming(nome_arquivo, pasta_destino, tamanho_chunk=100_000)
\ No newline at end of file
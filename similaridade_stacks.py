@@ -0,0 +1,280 @@
+import argparse
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from formatos_tabela import ler_tabela
+
+COLUNA_ID = 'ID'
+COLUNA_TECNOLOGIA = 'Nome_Ferramenta_Tecnologia'
+
+# Primo de Mersenne 2^31 - 1: com a, b e x menores que ele, a*x + b cabe em 64 bits
+PRIMO = (1 << 31) - 1
+# Limite de pares (empresa, tecnologia) processados de uma vez ao calcular assinaturas
+PARES_POR_BLOCO = 50_000
+
+
+class IndiceSimilaridade:
+    """
+    Índice MinHash + LSH sobre o conjunto de tecnologias de cada empresa, para
+    encontrar empresas com stacks parecidas (similaridade de Jaccard) sem comparar
+    todos os pares.
+
+    Cada empresa recebe uma assinatura de `num_permutacoes` mínimos de funções
+    hash h(x) = (a*x + b) mod PRIMO; a fração de posições iguais entre duas
+    assinaturas estima o Jaccard dos conjuntos. A assinatura é dividida em
+    `bandas` faixas, e empresas com uma faixa idêntica caem no mesmo balde: só
+    elas são comparadas numa consulta. Com b bandas de r linhas, pares com
+    Jaccard acima de (1/b)^(1/r) quase sempre viram candidatos (~0,42 no padrão).
+
+    Empresas novas (ou recoletadas) podem ser adicionadas a qualquer momento
+    com `adicionar`, sem reconstruir o índice.
+
+    Args:
+        num_permutacoes (int): Tamanho da assinatura (múltiplo de `bandas`).
+        bandas (int): Número de faixas do LSH.
+        semente (int): Semente das funções hash (índices comparáveis precisam da mesma).
+    """
+
+    def __init__(self, num_permutacoes=128, bandas=32, semente=1):
+        if num_permutacoes % bandas:
+            raise ValueError(f"num_permutacoes ({num_permutacoes}) precisa ser múltiplo de bandas ({bandas}).")
+        self.num_permutacoes = num_permutacoes
+        self.bandas = bandas
+        self.linhas_por_banda = num_permutacoes // bandas
+        self.semente = semente
+        gerador = np.random.default_rng(semente)
+        self._a = gerador.integers(1, PRIMO, num_permutacoes, dtype=np.uint64)
+        self._b = gerador.integers(0, PRIMO, num_permutacoes, dtype=np.uint64)
+        # Multiplicadores ímpares que combinam as linhas de uma faixa numa chave de 64 bits
+        self._multiplicadores = gerador.integers(0, 1 << 63, self.linhas_por_banda, dtype=np.uint64) * 2 + 1
+
+        # Assinaturas em linhas com folga (a capacidade dobra quando enche)
+        self._assinaturas = np.empty((0, num_permutacoes), dtype=np.uint64)
+        self._linhas_usadas = 0
+        self._linha_do_id = {}
+        self._conjuntos = {}
+        self._baldes = [{} for _ in range(bandas)]
+
+    def __len__(self):
+        return len(self._linha_do_id)
+
+    def __contains__(self, id_empresa):
+        return id_empresa in self._linha_do_id
+
+    @classmethod
+    def de_tabela(cls, df_longo, **parametros):
+        """Constrói o índice a partir da tabela longa (ID, Nome_Ferramenta_Tecnologia, ...)."""
+        indice = cls(**parametros)
+        indice.adicionar_tabela(df_longo)
+        return indice
+
+    @classmethod
+    def de_arquivo(cls, caminho, **parametros):
+        """Constrói o índice a partir de Tecnologias_Unificadas (CSV ou Parquet)."""
+        return cls.de_tabela(ler_tabela(caminho, colunas=[COLUNA_ID, COLUNA_TECNOLOGIA]), **parametros)
+
+    # --- Assinaturas e baldes ---
+
+    @staticmethod
+    def _tokens(tecnologias):
+        """Código estável (entre execuções) de cada nome de tecnologia, menor que PRIMO."""
+        nomes = np.asarray(tecnologias, dtype=object)
+        return pd.util.hash_array(nomes) % np.uint64(PRIMO)
+
+    def _minhash(self, tokens, inicios):
+        """Assinaturas dos grupos de tokens que começam em `inicios` (tokens agrupados por empresa)."""
+        hashes = (np.multiply.outer(tokens, self._a) + self._b) % np.uint64(PRIMO)
+        return np.minimum.reduceat(hashes, inicios, axis=0)
+
+    def _chaves_bandas(self, assinaturas):
+        """
+        Chave (uint64) de cada faixa de cada assinatura, com forma (empresas, bandas).
+        Faixas diferentes com a mesma chave só geram candidatos a mais, descartados
+        na verificação.
+        """
+        faixas = assinaturas.reshape(len(assinaturas), self.bandas, self.linhas_por_banda)
+        # Soma com overflow em uint64
+        return (faixas * self._multiplicadores).sum(axis=2, dtype=np.uint64)
+
+    def _guardar(self, ids, assinaturas, conjuntos):
+        for id_empresa in ids:
+            if id_empresa in self._linha_do_id:
+                self.remover(id_empresa)
+        primeira_linha = self._linhas_usadas
+        self._linhas_usadas += len(ids)
+        if self._linhas_usadas > len(self._assinaturas):
+            capacidade = max(self._linhas_usadas, 2 * len(self._assinaturas), 64)
+            novas = np.empty((capacidade, self.num_permutacoes), dtype=np.uint64)
+            novas[:primeira_linha] = self._assinaturas[:primeira_linha]
+            self._assinaturas = novas
+        self._assinaturas[primeira_linha:self._linhas_usadas] = assinaturas
+
+        for deslocamento, (id_empresa, conjunto) in enumerate(zip(ids, conjuntos)):
+            self._linha_do_id[id_empresa] = primeira_linha + deslocamento
+            self._conjuntos[id_empresa] = conjunto
+        for id_empresa, chaves in zip(ids, self._chaves_bandas(assinaturas).tolist()):
+            for balde, chave in zip(self._baldes, chaves):
+                balde.setdefault(chave, []).append(id_empresa)
+
+    def adicionar(self, id_empresa, tecnologias):
+        """
+        Adiciona (ou substitui) uma empresa no índice.
+
+        Args:
+            id_empresa (int): ID da empresa.
+            tecnologias (iterable): Nomes das tecnologias da empresa. Um conjunto
+                                    vazio não é indexado.
+        """
+        conjunto = frozenset(str(nome) for nome in tecnologias if pd.notna(nome))
+        if not conjunto:
+            self.remover(id_empresa)
+            return
+        tokens = self._tokens(sorted(conjunto))
+        assinatura = self._minhash(tokens, np.array([0]))
+        self._guardar([id_empresa], assinatura, [conjunto])
+
+    def adicionar_tabela(self, df_longo):
+        """Adiciona (ou substitui) todas as empresas de uma tabela longa, de forma vetorizada."""
+        pares = df_longo[[COLUNA_ID, COLUNA_TECNOLOGIA]].dropna().drop_duplicates()
+        pares = pares.sort_values(COLUNA_ID, kind='stable')
+        ids_pares = pares[COLUNA_ID].astype('int64').to_numpy()
+        nomes = pares[COLUNA_TECNOLOGIA].astype(str).to_numpy(dtype=object)
+        if len(pares) == 0:
+            return
+        tokens = self._tokens(nomes)
+        inicios = np.flatnonzero(np.r_[True, ids_pares[1:] != ids_pares[:-1]])
+        fins = np.r_[inicios[1:], len(tokens)]
+
+        # Empresas em lotes de até PARES_POR_BLOCO pares, para limitar a matriz de hashes
+        assinaturas = np.empty((len(inicios), self.num_permutacoes), dtype=np.uint64)
+        empresa = 0
+        while empresa < len(inicios):
+            fim = max(empresa + 1, np.searchsorted(inicios, inicios[empresa] + PARES_POR_BLOCO))
+            inicio_par = inicios[empresa]
+            assinaturas[empresa:fim] = self._minhash(tokens[inicio_par:fins[fim - 1]],
+                                                     inicios[empresa:fim] - inicio_par)
+            empresa = fim
+
+        ids = ids_pares[inicios].tolist()
+        conjuntos = [frozenset(nomes[inicio:fim]) for inicio, fim in zip(inicios, fins)]
+        self._guardar(ids, assinaturas, conjuntos)
+
+    def remover(self, id_empresa):
+        """Remove uma empresa do índice (não faz nada se ela não estiver nele)."""
+        linha = self._linha_do_id.pop(id_empresa, None)
+        if linha is None:
+            return
+        del self._conjuntos[id_empresa]
+        # A linha da assinatura fica sem dono; o espaço é pequeno e evita reindexar
+        chaves = self._chaves_bandas(self._assinaturas[linha:linha + 1])[0].tolist()
+        for balde, chave in zip(self._baldes, chaves):
+            membros = balde[chave]
+            membros.remove(id_empresa)
+            if not membros:
+                del balde[chave]
+
+    # --- Consultas ---
+
+    def _candidatos(self, assinatura):
+        candidatos = set()
+        for balde, chave in zip(self._baldes, self._chaves_bandas(assinatura[None, :])[0].tolist()):
+            candidatos.update(balde.get(chave, ()))
+        return candidatos
+
+    def _ranquear(self, assinatura, conjunto, candidatos, k, limiar):
+        candidatos = list(candidatos)
+        if not candidatos:
+            return pd.DataFrame({COLUNA_ID: pd.Series(dtype='int64'), 'Jaccard_Estimado': pd.Series(dtype='float64'),
+                                 'Jaccard': pd.Series(dtype='float64')})
+        linhas = [self._linha_do_id[id_empresa] for id_empresa in candidatos]
+        estimado = (self._assinaturas[linhas] == assinatura).mean(axis=1)
+        exato = [len(conjunto & self._conjuntos[id_empresa]) / len(conjunto | self._conjuntos[id_empresa])
+                 for id_empresa in candidatos]
+        resultado = pd.DataFrame({COLUNA_ID: candidatos, 'Jaccard_Estimado': estimado.round(4),
+                                  'Jaccard': np.round(exato, 4)})
+        resultado = resultado[resultado['Jaccard'] >= limiar]
+        resultado = resultado.sort_values(['Jaccard', 'Jaccard_Estimado', COLUNA_ID],
+                                          ascending=[False, False, True], kind='stable')
+        return resultado.head(k).reset_index(drop=True)
+
+    def similares(self, id_empresa, k=10, limiar=0.0):
+        """
+        Empresas com a stack mais parecida com a de `id_empresa`, entre as que
+        dividem algum balde LSH com ela.
+
+        Returns:
+            DataFrame: ID, Jaccard_Estimado (pelas assinaturas) e Jaccard (exato), em
+                       ordem decrescente de similaridade, com no máximo `k` linhas.
+        """
+        if id_empresa not in self._linha_do_id:
+            raise KeyError(f"Empresa com ID {id_empresa} não está no índice.")
+        assinatura = self._assinaturas[self._linha_do_id[id_empresa]]
+        candidatos = self._candidatos(assinatura) - {id_empresa}
+        return self._ranquear(assinatura, self._conjuntos[id_empresa], candidatos, k, limiar)
+
+    def similares_ao_conjunto(self, tecnologias, k=10, limiar=0.0):
+        """Como `similares`, para um conjunto de tecnologias que não está no índice."""
+        conjunto = frozenset(str(nome) for nome in tecnologias)
+        if not conjunto:
+            raise ValueError("O conjunto de tecnologias está vazio.")
+        assinatura = self._minhash(self._tokens(sorted(conjunto)), np.array([0]))[0]
+        return self._ranquear(assinatura, conjunto, self._candidatos(assinatura), k, limiar)
+
+    def quase_duplicadas(self, limiar=0.9):
+        """
+        Pares de empresas com Jaccard >= `limiar` (ex: subsidiárias que dividem o
+        mesmo site). Só os pares que caem juntos em algum balde são verificados.
+
+        Returns:
+            DataFrame: ID_A, ID_B (ID_A < ID_B) e Jaccard, em ordem decrescente de Jaccard.
+        """
+        pares = set()
+        for balde in self._baldes:
+            for membros in balde.values():
+                if len(membros) > 1:
+                    pares.update(combinations(sorted(membros), 2))
+
+        linhas = []
+        for id_a, id_b in pares:
+            conjunto_a, conjunto_b = self._conjuntos[id_a], self._conjuntos[id_b]
+            jaccard = len(conjunto_a & conjunto_b) / len(conjunto_a | conjunto_b)
+            if jaccard >= limiar:
+                linhas.append((id_a, id_b, round(jaccard, 4)))
+        resultado = pd.DataFrame(linhas, columns=['ID_A', 'ID_B', 'Jaccard'])
+        return resultado.sort_values(['Jaccard', 'ID_A', 'ID_B'], ascending=[False, True, True],
+                                     kind='stable').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # python similaridade_stacks.py 42 --k 5
+    # python similaridade_stacks.py --duplicadas 0.9
+    parser = argparse.ArgumentParser(description="Empresas com stacks de tecnologia parecidas (MinHash + LSH).")
+    parser.add_argument('ids', nargs='*', type=int, help="IDs das empresas a consultar.")
+    parser.add_argument('--k', type=int, default=10, help="Quantidade de empresas parecidas por consulta.")
+    parser.add_argument('--duplicadas', type=float, metavar='LIMIAR',
+                        help="Lista os pares de empresas com Jaccard maior ou igual ao limiar.")
+    parser.add_argument('--unificado', default='novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv',
+                        help="Tabela longa de tecnologias (CSV ou Parquet).")
+    argumentos = parser.parse_args()
+
+    try:
+        indice = IndiceSimilaridade.de_arquivo(argumentos.unificado)
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo não encontrado: {e}")
+        raise SystemExit(1)
+    print(f"{len(indice)} empresas indexadas.")
+
+    for id_empresa in argumentos.ids:
+        try:
+            print(f"\nEmpresas mais parecidas com a de ID {id_empresa}:")
+            print(indice.similares(id_empresa, argumentos.k).to_string(index=False))
+        except KeyError as e:
+            print(f"Erro: {e.args[0]}")
+
+    if argumentos.duplicadas is not None:
+        duplicadas = indice.quase_duplicadas(argumentos.duplicadas)
+        print(f"\n{len(duplicadas)} pares de empresas com Jaccard >= {argumentos.duplicadas}:")
+        print(duplicadas.to_string(index=False))
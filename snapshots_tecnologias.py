@@ -0,0 +1,405 @@
+import argparse
+import json
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from formatos_tabela import ler_tabela, salvar_tabela
+
+COLUNA_ID = 'ID'
+COLUNA_TECNOLOGIA = 'Nome_Ferramenta_Tecnologia'
+COLUNA_CATEGORIA = 'Categoria_Tecnologia'
+
+PASTA_PADRAO = 'historico_tecnologias'
+ARQUIVO_MANIFESTO = 'manifesto.json'
+ARQUIVO_DICIONARIO = 'dicionario_tecnologias.csv'
+# Um snapshot completo a cada N coletas limita quantos deltas são aplicados para reconstruir uma data
+INTERVALO_COMPLETO_PADRAO = 10
+
+# Par (empresa, tecnologia) codificado num int64: ID nos bits altos, código da tecnologia nos baixos.
+# Ordenar os códigos ordena por ID e, dentro do ID, por tecnologia.
+BITS_TECNOLOGIA = 24
+MASCARA_TECNOLOGIA = (1 << BITS_TECNOLOGIA) - 1
+MAIOR_ID = (1 << (63 - BITS_TECNOLOGIA)) - 1
+# Separador das chaves nome + categoria no dicionário (não aparece nos nomes)
+SEPARADOR_CHAVE = '\x1f'
+
+
+def _validar_data(data):
+    """Aceita date/datetime ou texto ISO ('2025-03-01' ou '2025-03-01T12:00') e devolve o texto ISO."""
+    if isinstance(data, (date, datetime)):
+        return data.isoformat()
+    try:
+        datetime.fromisoformat(data)
+    except (TypeError, ValueError):
+        raise ValueError(f"Data de snapshot inválida: {data!r} (use o formato ISO, ex: '2025-03-01').")
+    return data
+
+
+def _salvar_codigos(caminho, **arrays):
+    """
+    Grava arrays ordenados de códigos num .npz comprimido, guardando as
+    diferenças entre códigos vizinhos: em pares ordenados elas são pequenas e
+    repetitivas, e comprimem muito melhor que os códigos inteiros.
+    """
+    temporario = caminho + '.tmp.npz'
+    np.savez_compressed(temporario, **{nome: np.diff(codigos, prepend=np.int64(0)) for nome, codigos in arrays.items()})
+    os.replace(temporario, caminho)
+
+
+def _carregar_codigos(caminho):
+    with np.load(caminho) as arquivo:
+        return {nome: np.cumsum(arquivo[nome], dtype=np.int64) for nome in arquivo.files}
+
+
+def combinar_deltas(deltas):
+    """
+    Compõe deltas consecutivos (adicionados, removidos) num único delta líquido
+    em relação ao estado inicial, sem reconstruir nenhum snapshot: um par
+    adicionado e depois removido (ou o contrário) se cancela.
+
+    Args:
+        deltas (iterable): Pares (adicionados, removidos) de arrays int64
+                           ordenados e sem repetição, na ordem em que ocorreram.
+
+    Returns:
+        tuple: (adicionados, removidos) líquidos, ordenados e disjuntos.
+    """
+    adicionados = np.empty(0, dtype=np.int64)
+    removidos = np.empty(0, dtype=np.int64)
+    for novos, saidas in deltas:
+        # Operações de conjunto sobre arrays ordenados (intercalação), sem hash por elemento
+        adicionados, removidos = (
+            np.union1d(np.setdiff1d(adicionados, saidas, assume_unique=True),
+                       np.setdiff1d(novos, removidos, assume_unique=True)),
+            np.union1d(np.setdiff1d(removidos, novos, assume_unique=True),
+                       np.setdiff1d(saidas, adicionados, assume_unique=True)),
+        )
+    return adicionados, removidos
+
+
+class ArmazemSnapshots:
+    """
+    Histórico das coletas da tabela longa (Tecnologias_Unificadas), uma entrada
+    por data, que só recebe acréscimos.
+
+    Cada snapshot é o conjunto de pares (ID, tecnologia), codificados em int64
+    (ver BITS_TECNOLOGIA) com um dicionário de tecnologias que também só cresce.
+    Em disco, cada coleta guarda só o que mudou em relação à anterior (pares
+    adicionados e removidos): pares que se repetem entre coletas não são
+    gravados de novo. A cada `intervalo_completo` coletas o conjunto inteiro
+    também é gravado, para que reconstruir uma data aplique poucos deltas.
+
+    As diferenças entre duas datas (adoções e abandonos) e as séries de adoção
+    são calculadas só com os deltas do intervalo, sem carregar snapshots completos.
+
+    Estrutura da pasta:
+        manifesto.json               lista ordenada das coletas (gravada por último,
+                                     de forma atômica: define o que foi concluído)
+        dicionario_tecnologias.csv   Codigo, Nome_Ferramenta_Tecnologia, Categoria_Tecnologia
+        snapshots/<n>.npz            'adicionados', 'removidos' e, nos completos, 'pares'
+
+    Args:
+        pasta (str): Pasta do histórico (criada se não existir).
+        intervalo_completo (int): A cada quantas coletas gravar o conjunto completo.
+    """
+
+    def __init__(self, pasta=PASTA_PADRAO, intervalo_completo=INTERVALO_COMPLETO_PADRAO):
+        self.pasta = pasta
+        self.intervalo_completo = intervalo_completo
+        self._caminho_manifesto = os.path.join(pasta, ARQUIVO_MANIFESTO)
+        self._caminho_dicionario = os.path.join(pasta, ARQUIVO_DICIONARIO)
+        try:
+            with open(self._caminho_manifesto, 'r', encoding='utf-8') as arquivo:
+                self.snapshots = json.load(arquivo)['snapshots']
+        except FileNotFoundError:
+            self.snapshots = []
+
+        if os.path.exists(self._caminho_dicionario):
+            # Textos como 'NA', 'None' ou 'null' são nomes de tecnologia, não valores ausentes
+            dicionario = pd.read_csv(self._caminho_dicionario, dtype=str, keep_default_na=False)
+            self._nomes = dicionario[COLUNA_TECNOLOGIA].to_numpy(dtype=object)
+            self._categorias = dicionario[COLUNA_CATEGORIA].to_numpy(dtype=object)
+        else:
+            self._nomes = np.empty(0, dtype=object)
+            self._categorias = np.empty(0, dtype=object)
+        self._indice_chaves = pd.Index(self._chaves(self._nomes, self._categorias))
+        self._cache = (None, None)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def datas(self):
+        return [snapshot['data'] for snapshot in self.snapshots]
+
+    def _posicao(self, data):
+        data = _validar_data(data)
+        for posicao, snapshot in enumerate(self.snapshots):
+            if snapshot['data'] == data:
+                return posicao
+        raise KeyError(f"Snapshot '{data}' não existe. Datas disponíveis: {self.datas()}")
+
+    def _caminho_snapshot(self, posicao):
+        return os.path.join(self.pasta, 'snapshots', self.snapshots[posicao]['arquivo'])
+
+    # --- Codificação dos pares ---
+
+    @staticmethod
+    def _chaves(nomes, categorias):
+        return pd.Series(nomes, dtype=object) + SEPARADOR_CHAVE + pd.Series(categorias, dtype=object)
+
+    def codificar(self, df_longo, registrar_novas=True):
+        """
+        Converte a tabela longa no array ordenado e sem repetição dos códigos dos pares.
+        Tecnologias (nome + categoria) ainda sem código recebem os próximos códigos
+        se `registrar_novas`; senão, os pares delas são ignorados.
+        """
+        pares = df_longo[[COLUNA_ID, COLUNA_TECNOLOGIA, COLUNA_CATEGORIA]].dropna()
+        ids = pd.to_numeric(pares[COLUNA_ID], errors='raise').to_numpy(dtype=np.int64)
+        if len(ids) and (ids.min() < 0 or ids.max() > MAIOR_ID):
+            raise ValueError(f"IDs fora do intervalo suportado (0 a {MAIOR_ID}).")
+
+        chaves = self._chaves(pares[COLUNA_TECNOLOGIA].astype(str).to_numpy(dtype=object),
+                              pares[COLUNA_CATEGORIA].astype(str).to_numpy(dtype=object))
+        codigos_chave, chaves_unicas = pd.factorize(chaves)
+        codigos_tecnologia = self._indice_chaves.get_indexer(chaves_unicas)
+        novas = codigos_tecnologia < 0
+        if novas.any() and registrar_novas:
+            if len(self._nomes) + novas.sum() > MASCARA_TECNOLOGIA:
+                raise ValueError("O dicionário de tecnologias excedeu o limite de códigos.")
+            nomes_novos, categorias_novas = np.array(
+                [chave.split(SEPARADOR_CHAVE, 1) for chave in chaves_unicas[novas]], dtype=object).T
+            codigos_tecnologia[novas] = np.arange(len(self._nomes), len(self._nomes) + novas.sum())
+            self._nomes = np.concatenate([self._nomes, nomes_novos])
+            self._categorias = np.concatenate([self._categorias, categorias_novas])
+            self._indice_chaves = pd.Index(self._chaves(self._nomes, self._categorias))
+
+        codigos_tecnologia = codigos_tecnologia[codigos_chave]
+        validos = codigos_tecnologia >= 0
+        return np.unique((ids[validos] << BITS_TECNOLOGIA) | codigos_tecnologia[validos].astype(np.int64))
+
+    def decodificar(self, codigos):
+        """Converte códigos de pares de volta para a tabela longa (ID, nome, categoria)."""
+        codigos = np.asarray(codigos, dtype=np.int64)
+        tecnologias = codigos & MASCARA_TECNOLOGIA
+        return pd.DataFrame({
+            COLUNA_ID: codigos >> BITS_TECNOLOGIA,
+            COLUNA_TECNOLOGIA: self._nomes[tecnologias],
+            COLUNA_CATEGORIA: self._categorias[tecnologias],
+        })
+
+    def codigos_da_tecnologia(self, nome, categoria=None):
+        """Códigos do dicionário com esse nome (em qualquer categoria, se `categoria` for None)."""
+        selecionados = self._nomes == nome
+        if categoria is not None:
+            selecionados &= self._categorias == categoria
+        return np.flatnonzero(selecionados)
+
+    # --- Gravação ---
+
+    def adicionar(self, df_longo, data=None):
+        """
+        Registra uma coleta. As datas precisam ser crescentes (o histórico só recebe acréscimos).
+
+        Args:
+            df_longo (DataFrame): Tabela longa da coleta (ID, Nome_Ferramenta_Tecnologia,
+                                  Categoria_Tecnologia).
+            data (str): Data da coleta em ISO (padrão: hoje).
+
+        Returns:
+            dict: A entrada do manifesto (pares, adicionados, removidos...).
+        """
+        data = _validar_data(data or date.today())
+        if self.snapshots and datetime.fromisoformat(data) <= datetime.fromisoformat(self.snapshots[-1]['data']):
+            raise ValueError(f"A data '{data}' não é posterior ao último snapshot ('{self.snapshots[-1]['data']}').")
+
+        pares = self.codificar(df_longo)
+        anteriores = self.codigos(self.snapshots[-1]['data']) if self.snapshots else np.empty(0, dtype=np.int64)
+        adicionados = np.setdiff1d(pares, anteriores, assume_unique=True)
+        removidos = np.setdiff1d(anteriores, pares, assume_unique=True)
+        completo = len(self.snapshots) % self.intervalo_completo == 0
+
+        os.makedirs(os.path.join(self.pasta, 'snapshots'), exist_ok=True)
+        entrada = {
+            'data': data,
+            'arquivo': f"{len(self.snapshots):06d}.npz",
+            'completo': completo,
+            'pares': int(len(pares)),
+            'empresas': int(len(np.unique(pares >> BITS_TECNOLOGIA))),
+            'adicionados': int(len(adicionados)),
+            'removidos': int(len(removidos)),
+        }
+        # A primeira coleta não tem delta: só o conjunto completo
+        arrays = {'adicionados': adicionados, 'removidos': removidos} if self.snapshots else {}
+        if completo:
+            arrays['pares'] = pares
+        _salvar_codigos(os.path.join(self.pasta, 'snapshots', entrada['arquivo']), **arrays)
+
+        # O dicionário antes do manifesto: códigos a mais no dicionário não atrapalham
+        dicionario = pd.DataFrame({'Codigo': np.arange(len(self._nomes)), COLUNA_TECNOLOGIA: self._nomes,
+                                   COLUNA_CATEGORIA: self._categorias})
+        salvar_tabela(dicionario, self._caminho_dicionario)
+        self.snapshots.append(entrada)
+        self._salvar_manifesto()
+        self._cache = (data, pares)
+        return entrada
+
+    def adicionar_arquivo(self, caminho, data=None):
+        """Registra a coleta salva em Tecnologias_Unificadas (CSV ou Parquet)."""
+        return self.adicionar(ler_tabela(caminho, colunas=[COLUNA_ID, COLUNA_TECNOLOGIA, COLUNA_CATEGORIA]), data)
+
+    def _salvar_manifesto(self):
+        temporario = self._caminho_manifesto + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump({'bits_tecnologia': BITS_TECNOLOGIA, 'snapshots': self.snapshots}, arquivo,
+                      indent=2, ensure_ascii=False)
+        os.replace(temporario, self._caminho_manifesto)
+
+    # --- Consultas ---
+
+    def _delta(self, posicao):
+        arrays = _carregar_codigos(self._caminho_snapshot(posicao))
+        return arrays['adicionados'], arrays['removidos']
+
+    def codigos(self, data):
+        """Códigos (ordenados) dos pares da coleta: o último snapshot completo até a data mais os deltas seguintes."""
+        posicao = self._posicao(data)
+        if self._cache[0] == self.snapshots[posicao]['data']:
+            return self._cache[1]
+        base = max(p for p in range(posicao + 1) if self.snapshots[p]['completo'])
+        pares = _carregar_codigos(self._caminho_snapshot(base))['pares']
+        adicionados, removidos = combinar_deltas(self._delta(p) for p in range(base + 1, posicao + 1))
+        pares = np.union1d(np.setdiff1d(pares, removidos, assume_unique=True), adicionados)
+        self._cache = (self.snapshots[posicao]['data'], pares)
+        return pares
+
+    def tabela(self, data):
+        """Tabela longa da coleta dessa data."""
+        return self.decodificar(self.codigos(data))
+
+    def diferenca_codigos(self, data_inicial, data_final):
+        """
+        (adocoes, abandonos) entre duas coletas, como códigos de pares, compondo
+        só os deltas do intervalo. Com data_inicial posterior à final, o sentido se inverte.
+        """
+        inicio, fim = self._posicao(data_inicial), self._posicao(data_final)
+        if inicio > fim:
+            abandonos, adocoes = self.diferenca_codigos(data_final, data_inicial)
+            return adocoes, abandonos
+        return combinar_deltas(self._delta(posicao) for posicao in range(inicio + 1, fim + 1))
+
+    def diferenca(self, data_inicial, data_final):
+        """
+        Adoções (pares presentes só na coleta final) e abandonos (presentes só na
+        inicial) entre duas coletas quaisquer.
+
+        Returns:
+            tuple: (DataFrame de adoções, DataFrame de abandonos), na forma da tabela longa.
+        """
+        adocoes, abandonos = self.diferenca_codigos(data_inicial, data_final)
+        return self.decodificar(adocoes), self.decodificar(abandonos)
+
+    def tendencias(self, data_inicial, data_final):
+        """
+        Por tecnologia: empresas que adotaram, que abandonaram e o saldo entre as
+        duas coletas, ordenado pelo saldo.
+        """
+        adocoes, abandonos = self.diferenca_codigos(data_inicial, data_final)
+        contagens = pd.DataFrame({
+            'Adocoes': np.bincount(adocoes & MASCARA_TECNOLOGIA, minlength=len(self._nomes)),
+            'Abandonos': np.bincount(abandonos & MASCARA_TECNOLOGIA, minlength=len(self._nomes)),
+        })
+        contagens.insert(0, COLUNA_TECNOLOGIA, self._nomes)
+        contagens.insert(1, COLUNA_CATEGORIA, self._categorias)
+        contagens['Saldo'] = contagens['Adocoes'] - contagens['Abandonos']
+        contagens = contagens[(contagens['Adocoes'] > 0) | (contagens['Abandonos'] > 0)]
+        return contagens.sort_values(['Saldo', COLUNA_TECNOLOGIA], ascending=[False, True]).reset_index(drop=True)
+
+    def serie_adocao(self, nome, categoria=None):
+        """
+        Número de empresas que usam a tecnologia em cada coleta. Só a primeira
+        coleta é reconstruída; as demais contagens vêm dos deltas.
+        """
+        codigos_tecnologia = self.codigos_da_tecnologia(nome, categoria)
+        if len(codigos_tecnologia) == 0:
+            raise KeyError(f"Tecnologia '{nome}' não encontrada no histórico.")
+
+        def empresas(codigos):
+            # Uma empresa conta uma vez mesmo com o nome em mais de uma categoria
+            da_tecnologia = codigos[np.isin(codigos & MASCARA_TECNOLOGIA, codigos_tecnologia)]
+            return da_tecnologia >> BITS_TECNOLOGIA
+
+        linhas = []
+        usuarios = None
+        for posicao, snapshot in enumerate(self.snapshots):
+            if usuarios is None:
+                usuarios = pd.Series(empresas(self.codigos(snapshot['data']))).value_counts()
+            else:
+                adicionados, removidos = self._delta(posicao)
+                variacao = pd.Series(empresas(adicionados)).value_counts().sub(
+                    pd.Series(empresas(removidos)).value_counts(), fill_value=0)
+                usuarios = usuarios.add(variacao, fill_value=0)
+                usuarios = usuarios[usuarios > 0]
+            linhas.append({'Data': snapshot['data'], 'Empresas': len(usuarios)})
+        return pd.DataFrame(linhas)
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    # python snapshots_tecnologias.py adicionar novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv --data 2025-03-01
+    # python snapshots_tecnologias.py listar
+    # python snapshots_tecnologias.py diferenca 2025-03-01 2025-06-01 --saida diferencas.csv
+    # python snapshots_tecnologias.py tendencias 2025-03-01 2025-06-01
+    # python snapshots_tecnologias.py serie WordPress --categoria CMS
+    parser = argparse.ArgumentParser(description="Histórico de coletas da tabela de tecnologias.")
+    parser.add_argument('--pasta', default=PASTA_PADRAO, help="Pasta do histórico.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    adicionar = comandos.add_parser('adicionar', help="Registra uma coleta.")
+    adicionar.add_argument('arquivo', help="Tecnologias_Unificadas da coleta (CSV ou Parquet).")
+    adicionar.add_argument('--data', default=None, help="Data da coleta em ISO (padrão: hoje).")
+    comandos.add_parser('listar', help="Lista as coletas registradas.")
+    for nome, ajuda in (('diferenca', "Adoções e abandonos entre duas coletas."),
+                        ('tendencias', "Saldo de adoções por tecnologia entre duas coletas.")):
+        comando = comandos.add_parser(nome, help=ajuda)
+        comando.add_argument('data_inicial')
+        comando.add_argument('data_final')
+        comando.add_argument('--saida', default=None, help="CSV onde salvar o resultado.")
+    serie = comandos.add_parser('serie', help="Empresas que usam uma tecnologia em cada coleta.")
+    serie.add_argument('tecnologia')
+    serie.add_argument('--categoria', default=None)
+    argumentos = parser.parse_args()
+
+    armazem = ArmazemSnapshots(argumentos.pasta)
+    try:
+        if argumentos.comando == 'adicionar':
+            entrada = armazem.adicionar_arquivo(argumentos.arquivo, argumentos.data)
+            print(f"Snapshot '{entrada['data']}' registrado: {entrada['pares']} pares, "
+                  f"{entrada['adicionados']} adicionados e {entrada['removidos']} removidos.")
+        elif argumentos.comando == 'listar':
+            print(pd.DataFrame(armazem.snapshots).to_string(index=False) if len(armazem) else "Nenhum snapshot.")
+        elif argumentos.comando == 'diferenca':
+            adocoes, abandonos = armazem.diferenca(argumentos.data_inicial, argumentos.data_final)
+            print(f"{len(adocoes)} adoções e {len(abandonos)} abandonos.")
+            resultado = pd.concat([adocoes.assign(Mudanca='adocao'), abandonos.assign(Mudanca='abandono')])
+            if argumentos.saida:
+                salvar_tabela(resultado, argumentos.saida)
+                print(f"Diferenças salvas em '{argumentos.saida}'.")
+            else:
+                print(resultado.to_string(index=False))
+        elif argumentos.comando == 'tendencias':
+            resultado = armazem.tendencias(argumentos.data_inicial, argumentos.data_final)
+            if argumentos.saida:
+                salvar_tabela(resultado, argumentos.saida)
+                print(f"Tendências salvas em '{argumentos.saida}'.")
+            else:
+                print(resultado.to_string(index=False))
+        else:
+            print(armazem.serie_adocao(argumentos.tecnologia, argumentos.categoria).to_string(index=False))
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo não encontrado: {e}")
+        raise SystemExit(1)
+    except (KeyError, ValueError) as e:
+        print(f"Erro: {e}")
+        raise SystemExit(1)
@@ -0,0 +1,210 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import instrumentacao
+from formatos_tabela import ler_tabela, salvar_tabela
+
+COLUNA_ID = 'ID'
+COLUNA_TECNOLOGIA = 'Nome_Ferramenta_Tecnologia'
+COLUNA_CATEGORIA = 'Categoria_Tecnologia'
+
+# Formato aceito pelas etapas ao lado de 'csv' e 'parquet'
+FORMATO_COMPACTO = 'compacto'
+EXTENSAO_COMPACTA = '.npz'
+SUFIXO_DICIONARIO = '_dicionario.csv'
+
+MAXIMO_CATEGORIAS = np.iinfo(np.uint8).max + 1
+
+
+def _tipo_codigo_tecnologia(quantidade):
+    # int16 enquanto o dicionário couber (o -1 marca nome ausente)
+    return np.int16 if quantidade <= np.iinfo(np.int16).max else np.int32
+
+
+def _remapear(codigos, mapa):
+    """Troca cada código pelo valor correspondente em `mapa`, preservando o -1 (ausente)."""
+    return np.append(mapa, -1)[codigos]
+
+
+def eh_tabela_compacta(caminho):
+    return caminho.lower().endswith(EXTENSAO_COMPACTA)
+
+
+def caminho_compacto(caminho):
+    """'Tecnologias_Unificadas.csv' -> 'Tecnologias_Unificadas.npz'."""
+    base, extensao = os.path.splitext(caminho)
+    return (base if extensao else caminho) + EXTENSAO_COMPACTA
+
+
+class TabelaCompacta:
+    """
+    Tabela longa (ID, Nome_Ferramenta_Tecnologia, Categoria_Tecnologia) com
+    códigos inteiros no lugar dos textos repetidos em cada linha:
+
+      - ids: int32;
+      - tecnologias: int16 (int32 acima de 32767 nomes), -1 para nome ausente;
+      - categorias: uint8 (até 256 categorias);
+      - nomes_tecnologias / nomes_categorias: os dicionários (cada texto uma vez).
+
+    São 7 bytes por linha, contra dezenas nas colunas de texto, e junções,
+    agrupamentos e remoção de duplicatas passam a ser feitos sobre inteiros.
+
+    Em disco: '<nome>.npz' com os três arrays de códigos (np.load sem
+    conversão de tipos) e '<nome>_dicionario.csv' com Tipo, Codigo e Nome.
+    """
+
+    def __init__(self, ids, tecnologias, categorias, nomes_tecnologias, nomes_categorias):
+        if len(nomes_categorias) > MAXIMO_CATEGORIAS:
+            raise ValueError(f"A tabela compacta suporta até {MAXIMO_CATEGORIAS} categorias "
+                             f"({len(nomes_categorias)} encontradas).")
+        self.nomes_tecnologias = np.asarray(nomes_tecnologias, dtype=object)
+        self.nomes_categorias = np.asarray(nomes_categorias, dtype=object)
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.tecnologias = np.asarray(tecnologias, dtype=_tipo_codigo_tecnologia(len(self.nomes_tecnologias)))
+        self.categorias = np.asarray(categorias, dtype=np.uint8)
+        if not len(self.ids) == len(self.tecnologias) == len(self.categorias):
+            raise ValueError("Os arrays de IDs, tecnologias e categorias precisam ter o mesmo tamanho.")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return (f"TabelaCompacta({len(self)} linhas, {len(self.nomes_tecnologias)} tecnologias, "
+                f"{len(self.nomes_categorias)} categorias)")
+
+    # --- Conversão ---
+
+    @classmethod
+    def de_dataframe(cls, df_longo):
+        """Codifica uma tabela longa (DataFrame). Os dicionários ficam em ordem alfabética."""
+        ids = pd.to_numeric(df_longo[COLUNA_ID], errors='raise')
+        if ids.isna().any():
+            raise ValueError("A tabela longa tem linhas sem ID.")
+        limites = np.iinfo(np.int32)
+        if len(ids) and (ids.min() < limites.min or ids.max() > limites.max):
+            raise ValueError("IDs fora do intervalo de int32.")
+        codigos_tecnologia, nomes_tecnologias = pd.factorize(df_longo[COLUNA_TECNOLOGIA], sort=True)
+        codigos_categoria, nomes_categorias = pd.factorize(df_longo[COLUNA_CATEGORIA], sort=True)
+        if (codigos_categoria < 0).any():
+            raise ValueError("A tabela longa tem linhas sem categoria.")
+        return cls(ids.to_numpy(), codigos_tecnologia, codigos_categoria,
+                   np.asarray(nomes_tecnologias, dtype=object), np.asarray(nomes_categorias, dtype=object))
+
+    def para_dataframe(self, categorico=True):
+        """
+        Volta para a tabela longa. Com `categorico`, os nomes vêm como colunas
+        categóricas sobre os próprios códigos (sem copiar textos por linha).
+        """
+        if categorico:
+            tecnologias = pd.Categorical.from_codes(self.tecnologias, categories=pd.Index(self.nomes_tecnologias))
+            categorias = pd.Categorical.from_codes(self.categorias, categories=pd.Index(self.nomes_categorias))
+        else:
+            tecnologias = np.append(self.nomes_tecnologias, np.nan)[self.tecnologias]
+            categorias = self.nomes_categorias[self.categorias]
+        return pd.DataFrame({COLUNA_ID: self.ids, COLUNA_TECNOLOGIA: tecnologias, COLUNA_CATEGORIA: categorias})
+
+    @classmethod
+    def concatenar(cls, tabelas):
+        """Junta tabelas compactas (na ordem dada), unificando os dicionários."""
+        tabelas = list(tabelas)
+        nomes_tecnologias = np.unique(np.concatenate([t.nomes_tecnologias for t in tabelas] + [np.empty(0, object)]))
+        nomes_categorias = np.unique(np.concatenate([t.nomes_categorias for t in tabelas] + [np.empty(0, object)]))
+        tecnologias, categorias = [], []
+        for tabela in tabelas:
+            tecnologias.append(_remapear(tabela.tecnologias,
+                                         np.searchsorted(nomes_tecnologias, tabela.nomes_tecnologias)))
+            categorias.append(np.searchsorted(nomes_categorias, tabela.nomes_categorias)[tabela.categorias])
+        return cls(np.concatenate([t.ids for t in tabelas] + [np.empty(0, np.int32)]),
+                   np.concatenate(tecnologias + [np.empty(0, np.int64)]),
+                   np.concatenate(categorias + [np.empty(0, np.int64)]),
+                   nomes_tecnologias, nomes_categorias)
+
+    def memoria_bytes(self):
+        """Memória dos códigos mais a dos dicionários."""
+        codigos = self.ids.nbytes + self.tecnologias.nbytes + self.categorias.nbytes
+        dicionarios = (pd.Series(self.nomes_tecnologias, dtype=object).memory_usage(deep=True, index=False)
+                       + pd.Series(self.nomes_categorias, dtype=object).memory_usage(deep=True, index=False))
+        return codigos + dicionarios
+
+    # --- Operações sobre os códigos ---
+
+    def valores_unicos_por_categoria(self):
+        """
+        Pares distintos (categoria, tecnologia), calculados sobre os códigos, no
+        formato de consolidado_valores_unicos.csv (Categoria, Valor_Unico).
+        """
+        validos = self.tecnologias >= 0
+        quantidade = max(len(self.nomes_tecnologias), 1)
+        chaves = np.unique(self.categorias[validos].astype(np.int64) * quantidade + self.tecnologias[validos])
+        df = pd.DataFrame({'Categoria': self.nomes_categorias[chaves // quantidade],
+                           'Valor_Unico': self.nomes_tecnologias[chaves % quantidade]})
+        df['Valor_Unico'] = df['Valor_Unico'].astype(str).str.strip()
+        df = df[df['Valor_Unico'] != ''].drop_duplicates()
+        return df.sort_values(by=['Categoria', 'Valor_Unico']).reset_index(drop=True)
+
+    # --- Disco ---
+
+    def salvar(self, caminho):
+        """Grava '<caminho>.npz' e o dicionário ao lado. Retorna o caminho do .npz."""
+        caminho = caminho_compacto(caminho)
+        pasta = os.path.dirname(caminho)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        dicionario = pd.concat([
+            pd.DataFrame({'Tipo': 'tecnologia', 'Codigo': np.arange(len(self.nomes_tecnologias)),
+                          'Nome': self.nomes_tecnologias}),
+            pd.DataFrame({'Tipo': 'categoria', 'Codigo': np.arange(len(self.nomes_categorias)),
+                          'Nome': self.nomes_categorias}),
+        ], ignore_index=True)
+        salvar_tabela(dicionario, caminho[:-len(EXTENSAO_COMPACTA)] + SUFIXO_DICIONARIO)
+        with instrumentacao.escrita(caminho) as operacao:
+            operacao.linhas = len(self)
+            temporario = caminho + '.tmp.npz'
+            np.savez(temporario, ids=self.ids, tecnologias=self.tecnologias, categorias=self.categorias)
+            os.replace(temporario, caminho)
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho):
+        caminho = caminho_compacto(caminho)
+        # Textos como 'NA' ou 'None' são nomes de tecnologia, não valores ausentes
+        dicionario = pd.read_csv(caminho[:-len(EXTENSAO_COMPACTA)] + SUFIXO_DICIONARIO, dtype={'Nome': str},
+                                 keep_default_na=False)
+        nomes = {tipo: grupo.sort_values('Codigo')['Nome'].to_numpy(dtype=object)
+                 for tipo, grupo in dicionario.groupby('Tipo')}
+        with instrumentacao.leitura(caminho) as operacao:
+            with np.load(caminho) as arquivo:
+                tabela = cls(arquivo['ids'], arquivo['tecnologias'], arquivo['categorias'],
+                             nomes.get('tecnologia', np.empty(0, object)), nomes.get('categoria', np.empty(0, object)))
+            operacao.linhas = len(tabela)
+        return tabela
+
+
+def ler_tabela_longa(caminho):
+    """Carrega a tabela longa como TabelaCompacta, de um .npz ou de CSV/Parquet."""
+    if eh_tabela_compacta(caminho):
+        return TabelaCompacta.carregar(caminho)
+    return TabelaCompacta.de_dataframe(ler_tabela(caminho, colunas=[COLUNA_ID, COLUNA_TECNOLOGIA, COLUNA_CATEGORIA]))
+
+
+def salvar_tabela_longa(tabela, caminho, formato='csv'):
+    """
+    Salva a TabelaCompacta no formato 'compacto' (.npz + dicionário), ou como
+    tabela longa em CSV ou Parquet (particionado por categoria). Retorna o caminho gravado.
+    """
+    if formato == FORMATO_COMPACTO:
+        return tabela.salvar(caminho)
+    return salvar_tabela(tabela.para_dataframe(), caminho, formato, particionar_por=COLUNA_CATEGORIA)
+
+
+if __name__ == "__main__":
+    # --- Como usar ---
+    arquivo_unificado = 'novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv'
+
+    tabela = ler_tabela_longa(arquivo_unificado)
+    memoria_texto = ler_tabela(arquivo_unificado).memory_usage(deep=True).sum()
+    print(tabela)
+    print(f"Memória: {memoria_texto / 1e6:.2f} MB como texto, {tabela.memoria_bytes() / 1e6:.2f} MB compacta.")
+    # tabela.salvar('novos_arquivos_csv_refatorados/Tecnologias_Unificadas.npz')
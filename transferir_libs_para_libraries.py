@@ -1,110 +1,135 @@
 import pandas as pd
 import os
+from formatos_tabela import salvar_tabela
+from instrumentacao import instrumentar
+from catalogo_tabelas import ler
+from reclassificar_tecnologias import (
+    COLUNA_CATEGORIA, COLUNA_TECNOLOGIA, carregar_regras, projetar_categoria, reclassificar
+)
 
-# --- Configuração ---
-arquivo_frameworks_origem = 'tabelas_divididas_corrigido/javascript_frameworks.csv'
-arquivo_libraries_origem = 'tabelas_divididas_corrigido/javascript_libraries.csv'
-arquivo_frameworks_destino = 'novos_arquivos_csv_refatorados/javascript_frameworks_new.csv'
-arquivo_libraries_destino = 'novos_arquivos_csv_refatorados/javascript_libraries_new.csv'
-
-# Lista das bibliotecas que estão incorretamente no arquivo de frameworks
-bibliotecas_a_mover = {
-    'styled-components',
-    'React',
-    'Emotion',
-    'GSAP',
-    'AlloyUI',
-    'Zone.js',
-    'Redux',
-    'Socket.io',
-    'Adobe Client Data Layer',
-    'JSS',
-    'RequireJS',
-    'RxJS',
-    'React Router',
-    'toastr',
-    'Stitches',
-    'AlertifyJS',
-    'Wink'
-}
+# Regras de reclassificação: as bibliotecas a mover são as regras de
+# 'JavaScript frameworks' para 'JavaScript libraries' desta tabela
+arquivo_regras_padrao = 'regras_reclassificacao.csv'
 
 # Nomes das colunas esperadas
 coluna_id = 'ID'
 coluna_frameworks = 'JavaScript frameworks'
 coluna_libraries = 'JavaScript libraries'
 
-# --- Leitura dos Arquivos ---
-try:
-    df_frameworks = pd.read_csv(arquivo_frameworks_origem)
-    print(f"Arquivo '{arquivo_frameworks_origem}' lido com sucesso ({len(df_frameworks)} linhas).")
-except FileNotFoundError:
-    print(f"Erro: Arquivo '{arquivo_frameworks_origem}' não encontrado.")
-    exit() # Termina o script se o arquivo não for encontrado
-except Exception as e:
-    print(f"Erro ao ler '{arquivo_frameworks_origem}': {e}")
-    exit()
-
-try:
-    df_libraries = pd.read_csv(arquivo_libraries_origem)
-    print(f"Arquivo '{arquivo_libraries_origem}' lido com sucesso ({len(df_libraries)} linhas).")
-except FileNotFoundError:
-    print(f"Erro: Arquivo '{arquivo_libraries_origem}' não encontrado.")
-    exit()
-except Exception as e:
-    print(f"Erro ao ler '{arquivo_libraries_origem}': {e}")
-    exit()
-
-# --- Verificação das Colunas ---
-if coluna_frameworks not in df_frameworks.columns or coluna_id not in df_frameworks.columns:
-     print(f"Erro: Colunas '{coluna_id}' ou '{coluna_frameworks}' não encontradas em '{arquivo_frameworks_origem}'.")
-     print(f"Colunas encontradas: {list(df_frameworks.columns)}")
-     exit()
-
-if coluna_libraries not in df_libraries.columns or coluna_id not in df_libraries.columns:
-     print(f"Erro: Colunas '{coluna_id}' ou '{coluna_libraries}' não encontradas em '{arquivo_libraries_origem}'.")
-     print(f"Colunas encontradas: {list(df_libraries.columns)}")
-     exit()
-
-
-# --- Processamento ---
-
-# 1. Identificar as linhas a serem movidas do DataFrame de frameworks
-#    Verifica se o valor na coluna de frameworks está na nossa lista de bibliotecas a mover
-linhas_para_mover = df_frameworks[df_frameworks[coluna_frameworks].isin(bibliotecas_a_mover)].copy()
-print(f"Identificadas {len(linhas_para_mover)} linhas para mover de frameworks para libraries.")
-
-# 2. Criar o novo DataFrame de frameworks (sem as linhas que foram movidas)
-#    Usa o operador ~ (negação) para pegar todas as linhas EXCETO as que estão em 'linhas_para_mover'
-df_frameworks_novo = df_frameworks[~df_frameworks[coluna_frameworks].isin(bibliotecas_a_mover)].copy()
-print(f"Novo arquivo de frameworks terá {len(df_frameworks_novo)} linhas.")
-
-# 3. Preparar as linhas movidas para serem adicionadas ao DataFrame de bibliotecas
-if not linhas_para_mover.empty:
-    # Renomear a coluna de 'JavaScript frameworks' para 'JavaScript libraries'
-    linhas_para_mover.rename(columns={coluna_frameworks: coluna_libraries}, inplace=True)
-    # Selecionar apenas as colunas 'ID' e a nova 'JavaScript libraries'
-    linhas_para_mover = linhas_para_mover[[coluna_id, coluna_libraries]]
-
-    # 4. Criar o novo DataFrame de bibliotecas (combinando o original com as linhas movidas)
-    df_libraries_novo = pd.concat([df_libraries, linhas_para_mover], ignore_index=True)
-    print(f"Novo arquivo de libraries terá {len(df_libraries_novo)} linhas.")
-else:
-    # Se nenhuma linha foi movida, o novo DataFrame de bibliotecas é igual ao original
-    df_libraries_novo = df_libraries.copy()
-    print("Nenhuma linha foi movida. O arquivo de libraries permanecerá o mesmo.")
-
-
-# --- Salvamento dos Novos Arquivos ---
-try:
-    df_frameworks_novo.to_csv(arquivo_frameworks_destino, index=False, encoding='utf-8')
-    print(f"Novo arquivo de frameworks salvo em: '{arquivo_frameworks_destino}'")
-except Exception as e:
-    print(f"Erro ao salvar '{arquivo_frameworks_destino}': {e}")
-
-try:
-    df_libraries_novo.to_csv(arquivo_libraries_destino, index=False, encoding='utf-8')
-    print(f"Novo arquivo de libraries salvo em: '{arquivo_libraries_destino}'")
-except Exception as e:
-    print(f"Erro ao salvar '{arquivo_libraries_destino}': {e}")
-
-print("\nProcesso concluído.")
+
+@instrumentar
+def transferir_bibliotecas(arquivo_frameworks_origem, arquivo_libraries_origem,
+                           arquivo_frameworks_destino, arquivo_libraries_destino, formato_saida='csv',
+                           catalogo=None, arquivo_regras=arquivo_regras_padrao):
+    """
+    Move da tabela de JavaScript frameworks para a tabela de JavaScript libraries
+    as bibliotecas que têm essa regra em `arquivo_regras` e salva as duas tabelas
+    novas. É um caso particular de reclassificar_tecnologias.py, que aplica as
+    demais regras do mesmo arquivo.
+
+    Args:
+        arquivo_frameworks_origem (str): Tabela N:N de 'JavaScript frameworks'.
+        arquivo_libraries_origem (str): Tabela N:N de 'JavaScript libraries'.
+        arquivo_frameworks_destino (str): Onde salvar a nova tabela de frameworks.
+        arquivo_libraries_destino (str): Onde salvar a nova tabela de libraries.
+        formato_saida (str): 'csv' ou 'parquet' (a extensão dos destinos é ajustada).
+        catalogo (CatalogoTabelas): Catálogo compartilhado, para não reler as tabelas (opcional).
+        arquivo_regras (str): Tabela de regras de reclassificação (ex: 'regras_reclassificacao.csv').
+    """
+    # --- Leitura dos Arquivos ---
+    try:
+        df_frameworks = ler(arquivo_frameworks_origem, catalogo)
+        print(f"Arquivo '{arquivo_frameworks_origem}' lido com sucesso ({len(df_frameworks)} linhas).")
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{arquivo_frameworks_origem}' não encontrado.")
+        return
+    except Exception as e:
+        print(f"Erro ao ler '{arquivo_frameworks_origem}': {e}")
+        return
+
+    try:
+        df_libraries = ler(arquivo_libraries_origem, catalogo)
+        print(f"Arquivo '{arquivo_libraries_origem}' lido com sucesso ({len(df_libraries)} linhas).")
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{arquivo_libraries_origem}' não encontrado.")
+        return
+    except Exception as e:
+        print(f"Erro ao ler '{arquivo_libraries_origem}': {e}")
+        return
+
+    try:
+        regras = carregar_regras(arquivo_regras)
+    except FileNotFoundError:
+        print(f"Erro: Arquivo de regras '{arquivo_regras}' não encontrado.")
+        return
+    except Exception as e:
+        print(f"Erro ao ler as regras de '{arquivo_regras}': {e}")
+        return
+    regras = regras[(regras['Categoria_Origem'] == coluna_frameworks)
+                    & (regras['Categoria_Destino'] == coluna_libraries)]
+    print(f"{len(regras)} bibliotecas a mover segundo '{arquivo_regras}'.")
+
+    # --- Verificação das Colunas ---
+    if coluna_frameworks not in df_frameworks.columns or coluna_id not in df_frameworks.columns:
+         print(f"Erro: Colunas '{coluna_id}' ou '{coluna_frameworks}' não encontradas em '{arquivo_frameworks_origem}'.")
+         print(f"Colunas encontradas: {list(df_frameworks.columns)}")
+         return
+
+    if coluna_libraries not in df_libraries.columns or coluna_id not in df_libraries.columns:
+         print(f"Erro: Colunas '{coluna_id}' ou '{coluna_libraries}' não encontradas em '{arquivo_libraries_origem}'.")
+         print(f"Colunas encontradas: {list(df_libraries.columns)}")
+         return
+
+
+    # --- Processamento ---
+
+    # 1. Juntar as duas tabelas N:N em uma tabela longa (libraries primeiro, para que
+    #    as linhas movidas fiquem no fim da nova tabela de libraries)
+    df_longo = pd.concat([
+        df_libraries[[coluna_id, coluna_libraries]]
+            .rename(columns={coluna_libraries: COLUNA_TECNOLOGIA}).assign(**{COLUNA_CATEGORIA: coluna_libraries}),
+        df_frameworks[[coluna_id, coluna_frameworks]]
+            .rename(columns={coluna_frameworks: COLUNA_TECNOLOGIA}).assign(**{COLUNA_CATEGORIA: coluna_frameworks}),
+    ], ignore_index=True)
+
+    # 2. Mover as bibliotecas com o motor de reclassificação (uma regra por biblioteca)
+    df_reclassificado, auditoria = reclassificar(df_longo, regras, remover_duplicadas=False)
+    print(f"Identificadas {len(auditoria)} linhas para mover de frameworks para libraries.")
+
+    # 3. Separar de novo as duas tabelas N:N
+    df_frameworks_novo = projetar_categoria(df_reclassificado, coluna_frameworks)
+    print(f"Novo arquivo de frameworks terá {len(df_frameworks_novo)} linhas.")
+
+    df_libraries_novo = projetar_categoria(df_reclassificado, coluna_libraries)
+    if not auditoria.empty:
+        print(f"Novo arquivo de libraries terá {len(df_libraries_novo)} linhas.")
+    else:
+        print("Nenhuma linha foi movida. O arquivo de libraries permanecerá o mesmo.")
+
+
+    # --- Salvamento dos Novos Arquivos ---
+    try:
+        arquivo_frameworks_destino = salvar_tabela(df_frameworks_novo, arquivo_frameworks_destino, formato_saida)
+        print(f"Novo arquivo de frameworks salvo em: '{arquivo_frameworks_destino}'")
+    except Exception as e:
+        print(f"Erro ao salvar '{arquivo_frameworks_destino}': {e}")
+
+    try:
+        arquivo_libraries_destino = salvar_tabela(df_libraries_novo, arquivo_libraries_destino, formato_saida)
+        print(f"Novo arquivo de libraries salvo em: '{arquivo_libraries_destino}'")
+    except Exception as e:
+        print(f"Erro ao salvar '{arquivo_libraries_destino}': {e}")
+
+    print("\nProcesso concluído.")
+
+
+# --- Configuração ---
+if __name__ == "__main__":
+    arquivo_frameworks_origem = 'tabelas_divididas_corrigido/javascript_frameworks.csv'
+    arquivo_libraries_origem = 'tabelas_divididas_corrigido/javascript_libraries.csv'
+    arquivo_frameworks_destino = 'novos_arquivos_csv_refatorados/javascript_frameworks_new.csv'
+    arquivo_libraries_destino = 'novos_arquivos_csv_refatorados/javascript_libraries_new.csv'
+    formato_saida = 'csv' # 'csv' ou 'parquet' (a extensão dos destinos é ajustada)
+
+    transferir_bibliotecas(arquivo_frameworks_origem, arquivo_libraries_origem,
+                           arquivo_frameworks_destino, arquivo_libraries_destino, formato_saida)
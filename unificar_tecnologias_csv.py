@@ -1,16 +1,93 @@
 import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from catalogo_tabelas import ler
+from create_individuals_files_from_columns import (
+    converter_para_tabela_longa, identificar_colunas_multiplas,
+    salvar_tabela_principal, salvar_tabelas_por_categoria
+)
+from formatos_tabela import eh_arquivo_de_tabela, ler_tabela, salvar_tabela
+from instrumentacao import instrumentar
+from normalizar_tecnologias import normalizar_serie
+from tabela_compacta import TabelaCompacta, salvar_tabela_longa
+
+def _processar_arquivo_tecnologia(caminho_completo_arquivo, catalogo=None):
+    """
+    Lê uma tabela N:N de tecnologia e a converte para o formato longo
+    (ID, Nome_Ferramenta_Tecnologia, Categoria_Tecnologia), já codificado em
+    inteiros (TabelaCompacta).
+
+    Função de nível de módulo para poder rodar em outro processo; as mensagens
+    são devolvidas em vez de impressas, para saírem na ordem dos arquivos. A
+    tabela compacta também deixa menor o que volta do processo filho.
+
+    Returns:
+        tuple: (TabelaCompacta processada ou None, lista de mensagens)
+    """
+    nome_arquivo = os.path.basename(caminho_completo_arquivo)
+    mensagens = [f"Processando arquivo: {nome_arquivo}..."]
+
+    try:
+        # Ler o CSV
+        df_temp = ler(caminho_completo_arquivo, catalogo)
+
+        # Verificar se o DataFrame tem pelo menos duas colunas
+        if df_temp.shape[1] < 2:
+            mensagens.append(f"  Aviso: O arquivo {nome_arquivo} não possui as duas colunas esperadas e será ignorado.")
+            return None, mensagens
+
+        # A primeira coluna é 'ID'
+        coluna_id = df_temp.columns[0]
+
+        # A segunda coluna contém as ferramentas/tecnologias específicas
+        # O nome desta segunda coluna também é a categoria (antes de adicionar .csv)
+        nome_coluna_ferramentas = df_temp.columns[1]
+
+        # Criar o DataFrame processado
+        df_processado = pd.DataFrame()
+        df_processado['ID'] = df_temp[coluna_id]
+        # Nomes canônicos (sem espaços sobrando nem versões), calculados uma vez por nome distinto
+        df_processado['Nome_Ferramenta_Tecnologia'] = normalizar_serie(df_temp[nome_coluna_ferramentas])
+
+        # A categoria da tecnologia é o nome do arquivo sem a extensão .csv
+        # Ou, neste caso, o nome da segunda coluna original
+        categoria_tecnologia = nome_coluna_ferramentas
+        # Se preferir usar o nome do arquivo:
+        # categoria_tecnologia = nome_arquivo.replace(".csv", "")
 
-def unificar_arquivos_tecnologia(pasta_entrada, arquivo_saida="novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv"):
+        df_processado['Categoria_Tecnologia'] = categoria_tecnologia
+        tabela = TabelaCompacta.de_dataframe(df_processado)
+
+        mensagens.append(f"  Arquivo {nome_arquivo} processado com sucesso. Categoria: {categoria_tecnologia}")
+        return tabela, mensagens
+
+    except pd.errors.EmptyDataError:
+        mensagens.append(f"  Aviso: O arquivo {nome_arquivo} está vazio e será ignorado.")
+    except Exception as e:
+        mensagens.append(f"  Erro ao processar o arquivo {nome_arquivo}: {e}")
+    return None, mensagens
+
+@instrumentar
+def unificar_arquivos_tecnologia(pasta_entrada, arquivo_saida="novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv",
+                                 formato='csv', paralelo=False, max_processos=None, catalogo=None):
     """
     Unifica arquivos CSV de tecnologias de uma pasta em um único arquivo CSV.
 
     Args:
-        pasta_entrada (str): O caminho para a pasta contendo os arquivos CSV.
+        pasta_entrada (str): O caminho para a pasta contendo os arquivos CSV (ou Parquet).
         arquivo_saida (str): O nome do arquivo CSV unificado a ser gerado.
+        formato (str): 'csv', 'parquet' ou 'compacto'. Em Parquet a saída é uma pasta
+                       particionada por 'Categoria_Tecnologia'; no formato compacto,
+                       um .npz com os códigos inteiros e o dicionário ao lado
+                       (ver tabela_compacta.py).
+        paralelo (bool): Se True, lê e converte os arquivos em paralelo (um processo por núcleo).
+        max_processos (int): Máximo de processos no modo paralelo (None = número de CPUs).
+        catalogo (CatalogoTabelas): Catálogo compartilhado para não reler tabelas já
+                                    carregadas (só no modo sequencial).
     """
-    lista_dataframes = []
-    arquivo_principal_ignorar = "tabela_principal.csv"
+    lista_tabelas = []
+    arquivo_principal_ignorar = "tabela_principal"
 
     print(f"Procurando arquivos na pasta: {pasta_entrada}")
 
@@ -26,68 +103,105 @@ def unificar_arquivos_tecnologia(pasta_entrada, arquivo_saida="novos_arquivos_cs
 
     arquivos_csv_processados = 0
 
+    arquivos_tecnologia = []
     for nome_arquivo in arquivos_na_pasta:
-        if nome_arquivo.endswith(".csv") and nome_arquivo.lower() != arquivo_principal_ignorar.lower():
-            caminho_completo_arquivo = os.path.join(pasta_entrada, nome_arquivo)
-            print(f"Processando arquivo: {nome_arquivo}...")
-
-            try:
-                # Ler o CSV
-                df_temp = pd.read_csv(caminho_completo_arquivo)
-
-                # Verificar se o DataFrame tem pelo menos duas colunas
-                if df_temp.shape[1] < 2:
-                    print(f"  Aviso: O arquivo {nome_arquivo} não possui as duas colunas esperadas e será ignorado.")
-                    continue
-
-                # A primeira coluna é 'ID'
-                coluna_id = df_temp.columns[0]
-
-                # A segunda coluna contém as ferramentas/tecnologias específicas
-                # O nome desta segunda coluna também é a categoria (antes de adicionar .csv)
-                nome_coluna_ferramentas = df_temp.columns[1]
-
-                # Criar o DataFrame processado
-                df_processado = pd.DataFrame()
-                df_processado['ID'] = df_temp[coluna_id]
-                df_processado['Nome_Ferramenta_Tecnologia'] = df_temp[nome_coluna_ferramentas]
+        caminho_completo_arquivo = os.path.join(pasta_entrada, nome_arquivo)
+        nome_sem_extensao = os.path.splitext(nome_arquivo)[0]
+        if (eh_arquivo_de_tabela(nome_arquivo) and os.path.isfile(caminho_completo_arquivo)
+                and nome_sem_extensao.lower() != arquivo_principal_ignorar.lower()):
+            arquivos_tecnologia.append(caminho_completo_arquivo)
+
+    # executor.map devolve os resultados na ordem dos arquivos, então o
+    # resultado (e as mensagens) é o mesmo do modo sequencial
+    if paralelo and len(arquivos_tecnologia) > 1:
+        processos = max_processos or os.cpu_count() or 1
+        # Lotes de arquivos por tarefa diminuem o custo de comunicação com muitos arquivos pequenos
+        tamanho_lote = max(1, len(arquivos_tecnologia) // (4 * processos))
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_processar_arquivo_tecnologia, arquivos_tecnologia,
+                                           chunksize=tamanho_lote))
+    else:
+        resultados = map(partial(_processar_arquivo_tecnologia, catalogo=catalogo), arquivos_tecnologia)
+
+    for tabela_processada, mensagens in resultados:
+        for mensagem in mensagens:
+            print(mensagem)
+        if tabela_processada is not None:
+            lista_tabelas.append(tabela_processada)
+            arquivos_csv_processados += 1
+
+    if not lista_tabelas:
+        print("\nNenhum arquivo de tecnologia encontrado ou processado para unificar.")
+        return
 
-                # A categoria da tecnologia é o nome do arquivo sem a extensão .csv
-                # Ou, neste caso, o nome da segunda coluna original
-                categoria_tecnologia = nome_coluna_ferramentas
-                # Se preferir usar o nome do arquivo:
-                # categoria_tecnologia = nome_arquivo.replace(".csv", "")
+    # Concatenar as tabelas (só os códigos inteiros e os dicionários são copiados)
+    tabela_unificada = TabelaCompacta.concatenar(lista_tabelas)
 
-                df_processado['Categoria_Tecnologia'] = categoria_tecnologia
+    # Salvar a tabela unificada (CSV, Parquet ou compacta)
+    try:
+        arquivo_saida = salvar_tabela_longa(tabela_unificada, arquivo_saida, formato)
+        print(f"\nArquivo unificado '{arquivo_saida}' criado com sucesso em '{pasta_entrada}'.")
+        print(f"Total de arquivos CSV de tecnologia processados: {arquivos_csv_processados}")
+        print(f"Total de registros no arquivo unificado: {len(tabela_unificada)}")
+    except Exception as e:
+        print(f"\nErro ao salvar o arquivo unificado: {e}")
 
-                lista_dataframes.append(df_processado)
-                arquivos_csv_processados += 1
-                print(f"  Arquivo {nome_arquivo} processado com sucesso. Categoria: {categoria_tecnologia}")
+@instrumentar
+def unificar_a_partir_da_planilha(nome_arquivo, arquivo_saida="novos_arquivos_csv_refatorados/Tecnologias_Unificadas.csv",
+                                  pasta_categorias=None, formato='csv'):
+    """
+    Gera o arquivo unificado direto da planilha larga (ex: 'planilha_sem_duplicatas.csv'),
+    em memória, sem escrever e reler os CSVs por categoria.
 
-            except pd.errors.EmptyDataError:
-                print(f"  Aviso: O arquivo {nome_arquivo} está vazio e será ignorado.")
-            except Exception as e:
-                print(f"  Erro ao processar o arquivo {nome_arquivo}: {e}")
+    Args:
+        nome_arquivo (str): Planilha larga com 'ID' e as colunas de tecnologias separadas por ';'.
+        arquivo_saida (str): O nome do arquivo CSV unificado a ser gerado.
+        pasta_categorias (str): Opcional. Se informada, também grava nela a tabela
+                                principal e os CSVs por categoria (mesmo formato de
+                                create_individuals_files_from_columns.py).
+        formato (str): 'csv' ou 'parquet' (Parquet particionado por 'Categoria_Tecnologia').
+    """
+    try:
+        df = ler_tabela(nome_arquivo)
+        print(f"Arquivo '{nome_arquivo}' lido com sucesso ({len(df)} linhas).")
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado em '{nome_arquivo}'")
+        return
+    except Exception as e:
+        print(f"Erro ao ler o arquivo CSV '{nome_arquivo}': {e}")
+        return
 
-    if not lista_dataframes:
-        print("\nNenhum arquivo de tecnologia encontrado ou processado para unificar.")
+    if 'ID' not in df.columns:
+        print("Erro Crítico: Coluna 'ID' não encontrada no arquivo CSV.")
         return
 
-    # Concatenar todos os DataFrames da lista em um único DataFrame
-    df_unificado = pd.concat(lista_dataframes, ignore_index=True)
+    colunas_multiplas = identificar_colunas_multiplas(df)
+    df_unificado = converter_para_tabela_longa(df, colunas_multiplas)
 
-    # Salvar o DataFrame unificado em um novo arquivo CSV
     try:
-        df_unificado.to_csv(arquivo_saida, index=False)
-        print(f"\nArquivo unificado '{arquivo_saida}' criado com sucesso em '{pasta_entrada}'.")
-        print(f"Total de arquivos CSV de tecnologia processados: {arquivos_csv_processados}")
+        arquivo_saida = salvar_tabela(df_unificado, arquivo_saida, formato, particionar_por='Categoria_Tecnologia')
+        print(f"\nArquivo unificado '{arquivo_saida}' criado com sucesso.")
+        print(f"Total de categorias de tecnologia: {len(colunas_multiplas)}")
         print(f"Total de registros no arquivo unificado: {len(df_unificado)}")
     except Exception as e:
         print(f"\nErro ao salvar o arquivo unificado: {e}")
+        return
+
+    if pasta_categorias:
+        os.makedirs(pasta_categorias, exist_ok=True)
+        colunas_principais = [c for c in df.columns if c not in colunas_multiplas]
+        salvar_tabela_principal(df, colunas_principais, pasta_categorias, formato)
+        salvar_tabelas_por_categoria(df_unificado, pasta_categorias, list(df.columns), formato)
+
+    return df_unificado
 
 # --- COMO USAR ---
-# Especifique o caminho para a sua pasta
-pasta_dos_arquivos = "tabelas_divididas_corrigido"
+if __name__ == "__main__":
+    # Especifique o caminho para a sua pasta
+    pasta_dos_arquivos = "tabelas_divididas_corrigido"
+
+    # Chame a função
+    unificar_arquivos_tecnologia(pasta_dos_arquivos)
 
-# Chame a função
-unificar_arquivos_tecnologia(pasta_dos_arquivos)
\ No newline at end of file
+    # Alternativa: gerar o arquivo unificado direto da planilha, sem os CSVs intermediários
+    # unificar_a_partir_da_planilha('planilha_sem_duplicatas.csv', pasta_categorias=pasta_dos_arquivos)
\ No newline at end of file